@@ -1,7 +1,26 @@
 import { put } from '@vercel/blob';
 import { NextResponse } from 'next/server';
+import type { NextRequest } from 'next/server';
+
+// 该路由不经过 middleware 的会话检查（爬虫脚本没有 next-auth cookie）：
+// 已登录的浏览器请求照常放行，脚本需要带 Authorization: Bearer <BLOB_UPLOAD_TOKEN>
+function isAuthorized(request: NextRequest): boolean {
+  const hasSession = request.cookies.has('next-auth.session-token') || request.cookies.has('__Secure-next-auth.session-token');
+  if (hasSession) {
+    return true;
+  }
+  const token = process.env.BLOB_UPLOAD_TOKEN;
+  return !!token && request.headers.get('authorization') === `Bearer ${token}`;
+}
  
-export async function POST(request: Request): Promise<NextResponse> {
+export async function POST(request: NextRequest): Promise<NextResponse> {
+  if (!isAuthorized(request)) {
+    return NextResponse.json(
+      { error: 'Unauthorized' },
+      { status: 401 }
+    );
+  }
+
   const { searchParams } = new URL(request.url);
   const filename = searchParams.get('filename');
  
@@ -5,7 +5,7 @@ import path from 'path';
 export async function POST(request: Request) {
     // 获取前端传来的参数
     const body = await request.json();
-    const { email, platform } = body;
+    const { email, platform, format } = body;
 
     if (!email) {
         return NextResponse.json(
@@ -14,6 +14,15 @@ export async function POST(request: Request) {
         );
     }
 
+    // 导出格式（仅 jobsdb 脚本支持），默认 xlsx
+    const exportFormats = ['xlsx', 'csv', 'jsonl', 'parquet'];
+    if (format && !exportFormats.includes(format)) {
+        return NextResponse.json(
+            { error: `不支持的导出格式: ${format}` },
+            { status: 400 }
+        );
+    }
+
     // 根据平台选择不同的脚本
     const scriptName = platform === 'jobsdb' ? 'jobsdb_scraper.py' : 'my_scraper.py';
     const scriptPath = path.resolve(process.cwd(), `scripts/${scriptName}`);
@@ -24,32 +33,62 @@ export async function POST(request: Request) {
             const pythonPath = process.env.PYTHON_PATH || path.resolve(process.cwd(), 'venv/bin/python3');
             
             // 将邮箱作为命令行参数传递给 Python
-            const pythonProcess = spawn(pythonPath, [scriptPath, email]);
+            const args = [scriptPath, email];
+            if (platform === 'jobsdb' && format) {
+                args.push('--format', format);
+            }
+            const pythonProcess = spawn(pythonPath, args);
             
-            let stdoutData = '';
+            // Python 输出按行分隔的 JSON 事件（见 scripts/events.py）：
+            // progress 状态消息、每条记录一个 record 事件、最后一个 summary 事件（不含记录）
+            const records: any[] = [];
+            let summary: any = null;
+            let failure: any = null;
+            // 旧格式脚本（如 my_scraper.py）最后一行就是完整结果
+            let legacyResult: any = null;
+            let lineBuffer = '';
             let stderrData = '';
             
-            // 监听 Python 的实时输出(用于显示登录状态)
-            pythonProcess.stdout.on('data', (data) => {
-                const output = data.toString();
-                stdoutData += output;
-                
-                // 尝试解析状态消息并打印到控制台
+            const handleLine = (line: string) => {
+                if (!line.trim()) {
+                    return;
+                }
+                let message: any;
                 try {
-                    const lines = output.trim().split('\n');
-                    for (const line of lines) {
-                        try {
-                            const statusMsg = JSON.parse(line);
-                            if (statusMsg.status) {
-                                console.log('Python Status:', statusMsg);
-                            }
-                        } catch (e) {
-                            // 单行不是 JSON,继续
-                        }
-                    }
+                    message = JSON.parse(line);
                 } catch (e) {
-                    // 不是 JSON,继续累积
+                    // 单行不是 JSON,忽略
+                    return;
+                }
+                switch (message?.event) {
+                    case 'record':
+                        records.push(message.data);
+                        break;
+                    case 'summary':
+                        summary = message;
+                        break;
+                    case 'error':
+                        failure = message;
+                        break;
+                    case 'progress':
+                        console.log('Python Status:', message);
+                        break;
+                    default:
+                        if (message && !Array.isArray(message) && message.status && !('success' in message)) {
+                            console.log('Python Status:', message);
+                        } else {
+                            legacyResult = message;
+                        }
                 }
+            };
+            
+            // 数据块可能在任意位置截断，只处理完整的行，剩余部分留到下一块
+            pythonProcess.stdout.setEncoding('utf8');
+            pythonProcess.stdout.on('data', (chunk: string) => {
+                lineBuffer += chunk;
+                const lines = lineBuffer.split('\n');
+                lineBuffer = lines.pop() ?? '';
+                lines.forEach(handleLine);
             });
 
             pythonProcess.stderr.on('data', (data) => {
@@ -58,18 +97,20 @@ export async function POST(request: Request) {
             });
 
             pythonProcess.on('close', (code) => {
-                if (code === 0) {
-                    try {
-                        // 获取最后一个有效的 JSON 输出
-                        const lines = stdoutData.trim().split('\n');
-                        const lastLine = lines[lines.length - 1];
-                        const jsonData = JSON.parse(lastLine);
-                        resolve({ data: jsonData, error: null });
-                    } catch (e) {
-                        reject(new Error(`Invalid JSON output: ${stdoutData}`));
-                    }
+                handleLine(lineBuffer);
+                lineBuffer = '';
+                
+                if (code === 0 && summary) {
+                    const { v, event, ...result } = summary;
+                    resolve({ data: { ...result, data: records }, error: null });
+                } else if (code === 0 && legacyResult !== null) {
+                    resolve({ data: legacyResult, error: null });
+                } else if (code === 0) {
+                    reject(new Error('Script finished without a summary event'));
                 } else {
-                    reject(new Error(`Script exited with code ${code}: ${stderrData}`));
+                    const message = failure?.error || `Script exited with code ${code}: ${stderrData}`;
+                    // 已经收到的记录随错误一起返回，运行在后期失败时不至于全部丢失
+                    resolve({ data: { success: false, partial: true, count: records.length, data: records }, error: message });
                 }
             });
 
@@ -83,7 +124,7 @@ export async function POST(request: Request) {
         const { data, error } = await runScript(email);
         
         if (error) {
-            return NextResponse.json({ error }, { status: 500 });
+            return NextResponse.json({ ...data, error }, { status: 500 });
         }
         
         return NextResponse.json(data);
@@ -23,6 +23,7 @@ export function middleware(req: NextRequest) {
 export const config = {
   matcher: [
     // 匹配除以下之外的所有请求 (包括 NextAuth 内部路由)
-    '/((?!api/auth|_next/static|_next/image|favicon.ico|signin).*)',
+    // api/blob/upload 由爬虫脚本直接调用，没有会话 cookie，在路由里自行校验令牌
+    '/((?!api/auth|api/blob/upload|_next/static|_next/image|favicon.ico|signin).*)',
   ],
 }
\ No newline at end of file
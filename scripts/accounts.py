@@ -0,0 +1,26 @@
+"""
+账号相关的公共工具
+本地缓存文件里不直接保存邮箱，统一使用邮箱的哈希作为键
+"""
+import os
+import hashlib
+
+# 每个账号独立的会话目录：sessions/<account_key>/ 下保存会话 cookies 和浏览器 profile
+SESSIONS_DIR = os.environ.get("JOBSDB_SESSIONS_DIR", "sessions")
+
+
+def account_key(email):
+    """返回账号在本地存储中使用的键（邮箱小写后的 sha256 前 16 位）"""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:16]
+
+
+def account_dir(email, base_dir=SESSIONS_DIR):
+    """返回账号的会话目录（不存在时创建）"""
+    path = os.path.join(base_dir, account_key(email))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def profile_dir(email, base_dir=SESSIONS_DIR):
+    """账号独立的 Chrome profile 目录（同一 profile 不能被两个浏览器同时使用）"""
+    return os.path.abspath(os.path.join(account_dir(email, base_dir), "chrome-profile"))
@@ -0,0 +1,193 @@
+"""
+本地申请记录库（SQLite）
+
+按 (账号, 职位链接) 保存每条申请记录，记录首次/最近一次看到的时间和状态变化历史，
+支持增量爬取：列表按时间倒序排列，连续遇到若干条"已存在且状态未变"的记录时
+即可停止加载和解析，只返回新增和更新的记录。
+"""
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from accounts import account_key
+
+DB_FILE = "applications.db"
+
+# 连续这么多条已知且状态未变的记录后停止（容忍少量排序抖动）
+STOP_STREAK = 3
+
+INSERT = "insert"
+UPDATE = "update"
+UNCHANGED = "unchanged"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    account TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    title TEXT,
+    company TEXT,
+    date TEXT,
+    status TEXT,
+    link TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (account, record_key)
+);
+CREATE TABLE IF NOT EXISTS status_history (
+    account TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    status TEXT,
+    seen_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_status_history
+    ON status_history (account, record_key);
+"""
+
+
+def record_key(record):
+    """记录的唯一键：优先用职位链接，没有链接时用标题+公司+日期的哈希"""
+    if record.get("link"):
+        return record["link"]
+    raw = "|".join(str(record.get(field, "")) for field in ("title", "company", "date"))
+    return "sha1:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class ApplicationStore:
+    """申请记录库，线程安全（内部串行化访问）"""
+
+    def __init__(self, filepath=DB_FILE):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(filepath, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def known_statuses(self, email, keys):
+        """批量查询已保存的状态：{record_key: status}"""
+        account = account_key(email)
+        keys = list(keys)
+        result = {}
+        with self._lock:
+            # SQLite 默认最多 999 个绑定参数，分批查询
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT record_key, status FROM applications "
+                    f"WHERE account = ? AND record_key IN ({placeholders})",
+                    [account, *batch],
+                )
+                result.update(rows)
+        return result
+
+    def upsert(self, email, records):
+        """
+        写入一批记录，返回 [(变化类型, 记录), ...]
+        未变化的记录只更新 last_seen，不出现在返回值中
+        """
+        account = account_key(email)
+        now = _now()
+        changes = []
+        with self._lock, self._conn:
+            for record in records:
+                key = record_key(record)
+                row = self._conn.execute(
+                    "SELECT status FROM applications WHERE account = ? AND record_key = ?",
+                    (account, key),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO applications VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (account, key, record.get("title"), record.get("company"),
+                         record.get("date"), record.get("status"), record.get("link"), now, now),
+                    )
+                    change = INSERT
+                elif row[0] != record.get("status"):
+                    self._conn.execute(
+                        "UPDATE applications SET title = ?, company = ?, date = ?, status = ?, "
+                        "link = ?, last_seen = ? WHERE account = ? AND record_key = ?",
+                        (record.get("title"), record.get("company"), record.get("date"),
+                         record.get("status"), record.get("link"), now, account, key),
+                    )
+                    change = UPDATE
+                else:
+                    self._conn.execute(
+                        "UPDATE applications SET last_seen = ? WHERE account = ? AND record_key = ?",
+                        (now, account, key),
+                    )
+                    continue
+                self._conn.execute(
+                    "INSERT INTO status_history VALUES (?, ?, ?, ?)",
+                    (account, key, record.get("status"), now),
+                )
+                changes.append((change, record))
+        return changes
+
+    def count(self, email):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM applications WHERE account = ?", (account_key(email),)
+            ).fetchone()[0]
+
+
+class IncrementalCutoff:
+    """判断增量爬取在列表的哪个位置可以停止"""
+
+    def __init__(self, store, email, streak=STOP_STREAK):
+        self.store = store
+        self.email = email
+        self.streak = streak
+
+    def find_cutoff(self, records):
+        """
+        返回应截断的位置：从该位置起连续 streak 条记录都已存在且状态未变
+        没有达到条件时返回 None
+        """
+        return self.scanner().feed(records)
+
+    def scanner(self):
+        """边加载边判断时使用：每批只检查新记录"""
+        return CutoffScanner(self)
+
+
+class CutoffScanner:
+    """
+    按顺序逐批传入记录，判断截断位置
+    只查询和扫描新传入的一批，连续命中的计数跨批延续，避免每批都重新扫描已加载的全部记录
+    """
+
+    def __init__(self, cutoff):
+        self.cutoff = cutoff
+        self.scanned = 0
+        self.position = None
+        self._run = 0
+
+    def feed(self, batch):
+        """
+        传入紧接着上一批的新记录，返回截断位置（相对于已传入的全部记录）
+        没有达到条件时返回 None；找到后之后的调用都返回同一位置
+        """
+        if self.position is not None:
+            return self.position
+        cutoff = self.cutoff
+        known = cutoff.store.known_statuses(cutoff.email, (record_key(r) for r in batch))
+        for record in batch:
+            if known.get(record_key(record), object()) == record.get("status"):
+                self._run += 1
+                if self._run >= cutoff.streak:
+                    self.position = self.scanned - self._run + 1
+                    self.scanned += 1
+                    return self.position
+            else:
+                self._run = 0
+            self.scanned += 1
+        return None
@@ -0,0 +1,222 @@
+"""
+批量爬取多个账号
+
+通过进程池并发爬取，并发数可配置；每个账号使用独立的会话目录
+sessions/<account_key>/（会话 cookies + Chrome profile）和独立的导出目录，互不覆盖。
+子进程的输出事件经队列汇总到主进程，统一加上 "account" 字段后写出；
+最后输出一个按账号汇总的 summary 事件。单个账号失败（包括子进程崩溃）不会中断其他账号。
+
+用法:
+    python batch_scrape.py a@example.com b@example.com --concurrency 2
+    python batch_scrape.py --accounts-file accounts.txt --format csv
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from accounts import account_key, profile_dir
+from events import SUMMARY, as_event, write_event, emit, progress, summary_fields
+from enrich import ENRICH
+from exporters import FORMATS, DEFAULT_FORMAT
+from jobsdb_scraper import EXTRACT_MODES, EXTRACT_MODE
+from lean_mode import LEAN_MODE
+from resource_governor import JobWatchdog, reap_orphans, JOB_TIMEOUT
+
+DEFAULT_CONCURRENCY = 2
+
+
+class _QueueWriter:
+    """子进程的 stdout：按行解析事件并放入队列，交给主进程写出"""
+
+    def __init__(self, queue, email):
+        self.queue = queue
+        self.email = email
+        self._buffer = ""
+
+    def write(self, data):
+        self._buffer += data
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                self._put(line)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._buffer.strip():
+            self._put(self._buffer)
+        self._buffer = ""
+
+    def _put(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            message = line
+        self.queue.put((self.email, as_event(message)))
+
+
+def scrape_one(email, options, queue):
+    """在子进程中爬取一个账号，返回汇总（不含记录）；异常转换为失败结果"""
+    from jobsdb_scraper import setup_driver, scrape_account, close_driver, EXCEL_OUTPUT_DIR
+
+    writer = _QueueWriter(queue, email)
+    original_stdout, sys.stdout = sys.stdout, writer
+    driver = None
+    try:
+        driver = setup_driver(
+            headless=options["headless"], profile_dir=profile_dir(email), lean=options["lean"]
+        )
+        # 卡住的账号超时后强制结束浏览器，不会一直占着进程池的一个位置
+        with JobWatchdog(driver, options["job_timeout"]):
+            result = scrape_account(
+                driver, email,
+                extract_mode=options["extract_mode"],
+                http_fastpath=options["http_fastpath"],
+                incremental=options["incremental"],
+                export_format=options["export_format"],
+                enrich=options["enrich"],
+                output_dir=os.path.join(EXCEL_OUTPUT_DIR, account_key(email)),
+            )
+        return summary_fields(result)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    finally:
+        if driver:
+            close_driver(driver)
+        writer.close()
+        sys.stdout = original_stdout
+
+
+def _relay_events(queue):
+    """主进程：把子进程的事件加上账号字段后写出，收到 None 时结束"""
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        email, event = item
+        event["account"] = email
+        # 子进程的 summary 由主进程统一汇总，这里不转发
+        if event["event"] == SUMMARY:
+            continue
+        write_event(event)
+
+
+def _report(email, result):
+    progress("success" if result.get("success") else "failed",
+             result.get("message") or result.get("error"), account=email)
+
+
+def _run_pool(emails, options, queue, concurrency):
+    """在一个进程池里爬取一组账号，返回 (结果, 因进程池损坏而未完成的账号)"""
+    results, crashed = {}, []
+    with ProcessPoolExecutor(max_workers=min(concurrency, len(emails))) as executor:
+        futures = {email: executor.submit(scrape_one, email, options, queue) for email in emails}
+        for email, future in futures.items():
+            try:
+                results[email] = future.result()
+            except BrokenProcessPool:
+                crashed.append(email)
+                continue
+            except Exception as e:
+                results[email] = {"success": False, "error": str(e)}
+            _report(email, results[email])
+    return results, crashed
+
+
+def run_batch(emails, options, concurrency=DEFAULT_CONCURRENCY):
+    """并发爬取全部账号，返回 {email: 结果}（顺序与输入一致）"""
+    manager = multiprocessing.Manager()
+    queue = manager.Queue()
+    relay = threading.Thread(target=_relay_events, args=(queue,), daemon=True)
+    relay.start()
+
+    try:
+        results, crashed = _run_pool(emails, options, queue, concurrency)
+        if crashed:
+            # 子进程异常退出会让整个进程池失效，无法判断是哪个账号导致的；
+            # 未完成的账号逐个在独立进程池中重试，只有真正出问题的账号失败
+            progress("warning", f"爬虫子进程异常退出，逐个重试 {len(crashed)} 个未完成的账号")
+            for email in crashed:
+                retried, still_crashed = _run_pool([email], options, queue, 1)
+                results.update(retried)
+                if still_crashed:
+                    results[email] = {"success": False, "error": "爬虫子进程异常退出"}
+                    _report(email, results[email])
+    finally:
+        queue.put(None)
+        relay.join()
+        manager.shutdown()
+
+    return {email: results[email] for email in emails}
+
+
+def _read_accounts(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量并发爬取多个 JobsDB 账号")
+    parser.add_argument("emails", nargs="*", help="JobsDB 登录邮箱")
+    parser.add_argument("--accounts-file", help="每行一个邮箱的文件（# 开头为注释）")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="同时运行的浏览器数")
+    parser.add_argument("--extract-mode", choices=EXTRACT_MODES, default=EXTRACT_MODE)
+    parser.add_argument("--format", dest="export_format", choices=FORMATS, default=DEFAULT_FORMAT)
+    parser.add_argument("--http-fastpath", action="store_true")
+    parser.add_argument("--incremental", action="store_true")
+    parser.add_argument("--enrich", action="store_true", default=ENRICH, help="补充职位详情（地点、薪资等）")
+    parser.add_argument("--lean", action="store_true", default=LEAN_MODE, help="精简模式（拦截图片、字体、广告等请求）")
+    parser.add_argument("--show-browser", action="store_true", help="显示浏览器窗口（默认无头）")
+    parser.add_argument("--job-timeout", type=int, default=JOB_TIMEOUT,
+                        help="单个账号的硬超时（秒），超时后强制结束浏览器；0 表示不限制")
+    args = parser.parse_args()
+
+    emails = list(args.emails)
+    if args.accounts_file:
+        emails.extend(_read_accounts(args.accounts_file))
+    # 按账号去重（同一账号不能同时使用同一个 profile）
+    unique = {}
+    for email in emails:
+        unique.setdefault(account_key(email), email)
+    emails = list(unique.values())
+    if not emails:
+        parser.error("未提供任何邮箱地址")
+
+    options = {
+        "headless": not args.show_browser,
+        "extract_mode": args.extract_mode,
+        "http_fastpath": args.http_fastpath,
+        "incremental": args.incremental,
+        "export_format": args.export_format,
+        "lean": args.lean,
+        "enrich": args.enrich,
+        "job_timeout": args.job_timeout,
+    }
+    # 之前的批量运行崩溃时可能留下 chromedriver / Chrome 进程
+    reaped = reap_orphans()
+    if reaped:
+        progress("info", f"已清理 {reaped} 个残留的浏览器进程")
+    progress("init", f"开始批量爬取 {len(emails)} 个账号，并发数 {args.concurrency}")
+    results = run_batch(emails, options, max(1, args.concurrency))
+
+    succeeded = [email for email, result in results.items() if result.get("success")]
+    emit(
+        SUMMARY,
+        success=len(succeeded) == len(results),
+        succeeded=len(succeeded),
+        failed=len(results) - len(succeeded),
+        count=sum(result.get("count", 0) for result in results.values()),
+        accounts=[{"account": email, **result} for email, result in results.items()],
+    )
+    sys.exit(0 if succeeded else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+导出器基准测试
+
+对每种格式分别导出 1k / 10k / 100k 条合成记录，测量写出速度（行/秒）和进程峰值内存（RSS）。
+每个用例在独立子进程中运行，峰值内存互不影响；记录由生成器逐条产生，不预先放进列表。
+xlsx-inmemory 是原来 save_to_excel 的普通 Workbook 写法，作为对照。
+
+用法:
+    python bench_exporters.py --sizes 1000 10000 100000 --formats xlsx csv jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+from exporters import FORMATS, COLUMNS, export_records
+from synthetic_pages import synthetic_record
+
+REFERENCE_FORMAT = "xlsx-inmemory"
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 上单位是 KB，macOS 上是字节
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+
+
+def _records(count):
+    for index in range(count):
+        yield synthetic_record(index)
+
+
+def _export_inmemory(records, filepath):
+    """原来的写法：普通 Workbook，全部行留在内存里直到保存"""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append([label for _, label, _ in COLUMNS])
+    for cell in ws[1]:
+        cell.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        cell.font = Font(bold=True, color="FFFFFF")
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    for record in records:
+        ws.append([record.get(name, "") for name, _, _ in COLUMNS])
+    for index, (_, _, width) in enumerate(COLUMNS, start=1):
+        ws.column_dimensions[get_column_letter(index)].width = width
+    wb.save(filepath)
+    return filepath
+
+
+def run_case(fmt, count, output_dir):
+    """子进程内执行单个用例"""
+    # 先导入依赖，峰值内存的基线不包含写出本身
+    if fmt.startswith("xlsx"):
+        import openpyxl  # noqa: F401
+    elif fmt == "parquet":
+        import pyarrow.parquet  # noqa: F401
+    baseline = _peak_rss_mb()
+
+    start = time.perf_counter()
+    if fmt == REFERENCE_FORMAT:
+        path = _export_inmemory(_records(count), os.path.join(output_dir, "reference.xlsx"))
+    else:
+        path = export_records(_records(count), fmt, f"bench.{fmt}", output_dir=output_dir)
+    elapsed = time.perf_counter() - start
+
+    peak = _peak_rss_mb()
+    return {
+        "format": fmt,
+        "rows": count,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(count / elapsed) if elapsed else None,
+        "peak_rss_mb": peak,
+        "peak_rss_growth_mb": round(peak - baseline, 1),
+        "file_kb": round(os.path.getsize(path) / 1024, 1),
+    }
+
+
+def bench_case(fmt, count):
+    with tempfile.TemporaryDirectory() as output_dir:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", fmt, str(count), output_dir],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["未知错误"])[-1]
+        return {"format": fmt, "rows": count, "error": error}
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出器基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--formats", nargs="+", default=list(FORMATS) + [REFERENCE_FORMAT],
+                        choices=list(FORMATS) + [REFERENCE_FORMAT])
+    parser.add_argument("--child", nargs=3, metavar=("FORMAT", "ROWS", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        fmt, count, output_dir = args.child
+        print(json.dumps(run_case(fmt, int(count), output_dir)))
+        return
+
+    results = [bench_case(fmt, count) for count in args.sizes for fmt in args.formats]
+    print(json.dumps({"benchmark": "exporters", "results": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+离线解析基准测试
+
+使用 synthetic_pages 生成不同规模、不同标记变体的快照，测量 offline_parser 的解析
+耗时（单进程与进程池），并核对解析结果与合成数据一致。不需要 Chrome。
+
+用法:
+    python bench_parser.py --sizes 100 1000 5000 --workers 4
+"""
+import sys
+import json
+import time
+import argparse
+
+from offline_parser import parse_html, DEFAULT_BASE_URL
+from synthetic_pages import VARIANTS, render_applications_page, synthetic_record
+
+
+def bench_case(count, variant, workers):
+    html = render_applications_page(count, variant)
+    start = time.perf_counter()
+    _, card_count, records = parse_html(html, DEFAULT_BASE_URL, workers=workers)
+    elapsed = time.perf_counter() - start
+
+    expected = [synthetic_record(i, DEFAULT_BASE_URL) for i in range(count)]
+    return {
+        "cards": count,
+        "variant": variant,
+        "workers": workers,
+        "seconds": round(elapsed, 4),
+        "records_per_second": round(len(records) / elapsed) if elapsed else None,
+        "correct": card_count == count and records == expected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线解析基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--workers", type=int, default=4, help="进程池大小")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.sizes:
+        for variant in args.variants:
+            results.append(bench_case(count, variant, workers=1))
+            results.append(bench_case(count, variant, workers=args.workers))
+
+    print(json.dumps({"benchmark": "offline_parser", "results": results}, indent=2))
+    sys.exit(0 if all(r["correct"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+端到端爬取基准测试
+
+在本地替身服务器（jobsdb_standin.py）上运行真实的 scrape_application_history 和
+save_to_excel（无头 Chrome），不需要真实账号和网络。每个用例在独立子进程中运行：
+子进程启动替身服务器、设置 JOBSDB_BASE_URL 后再导入 jobsdb_scraper，
+通过 /login/verify 写入会话 cookie，然后爬取并导出。
+
+每个用例记录：
+- seconds            爬取 + 导出的端到端耗时（不含浏览器启动，单独记为 startup_seconds）
+- commands           WebDriver 命令数（按阶段拆分见 phases）
+- python_peak_rss_mb 爬虫进程的峰值内存
+- browser_peak_rss_mb chromedriver 及全部 Chrome 进程的峰值内存之和（采样，需要 psutil）
+- correct            提取结果是否与合成数据完全一致
+
+用法:
+    python bench_scrape.py --sizes 10 100 1000 5000
+    python bench_scrape.py --variants automation styled --list-modes scroll load_more
+    python bench_scrape.py --save-baseline     # 把本次结果保存为基线
+    python bench_scrape.py --check             # 与基线对比，超出容差时退出码为 1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(SCRIPT_DIR, "bench_baselines", "scrape.json")
+
+DEFAULT_SIZES = [10, 100, 1000, 5000]
+# 无限滚动每批追加的卡片数（与真实页面的每页条数相近）
+BATCH_SIZE = 20
+CASE_TIMEOUT = 1800
+# 与基线对比的指标
+CHECKED_METRICS = ("seconds", "commands", "python_peak_rss_mb", "browser_peak_rss_mb")
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 上单位是 KB，macOS 上是字节
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / (1024 * 1024), 1)
+
+
+class BrowserMemorySampler:
+    """后台线程定期采样 chromedriver 进程树的 RSS 之和，记录峰值；没有 psutil 时不采样"""
+
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _sample(self, psutil):
+        root = psutil.Process(self.pid)
+        total = 0
+        for process in [root] + root.children(recursive=True):
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+
+    def _run(self):
+        try:
+            import psutil
+        except ImportError:
+            return
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak or 0, self._sample(psutil))
+            except psutil.Error:
+                break
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return round(self.peak / (1024 * 1024), 1) if self.peak else None
+
+
+def case_key(case):
+    return f"{case['variant']}/{case['list_mode']}/{case['extract_mode']}/{case['count']}"
+
+
+def run_case(case, headless=True):
+    """子进程内执行单个用例（当前目录为临时目录，选择器统计等本地文件不会污染仓库）"""
+    from jobsdb_standin import start_standin, StandinConfig
+    from synthetic_pages import synthetic_record
+
+    count = case["count"]
+    # pages 模式下浏览器路径不翻页，所有卡片放在同一页
+    page_size = count if case["list_mode"] == "pages" else BATCH_SIZE
+    server, base_url = start_standin(config=StandinConfig(
+        count, page_size, case["variant"], list_mode=case["list_mode"]
+    ))
+    os.environ["JOBSDB_BASE_URL"] = base_url
+
+    import jobsdb_scraper as scraper
+    from instrumentation import start_run, finish_run, phase
+
+    start_run("bench")
+    started = time.perf_counter()
+    with phase("driver_startup"):
+        driver = scraper.setup_driver(headless=headless)
+    startup = time.perf_counter() - started
+    sampler = BrowserMemorySampler(driver.service.process.pid).start()
+    try:
+        # 替身服务器的验证链接直接写入会话 cookie，相当于已登录
+        with phase("login"):
+            driver.get(f"{base_url}/login/verify")
+        started = time.perf_counter()
+        applications = scraper.scrape_application_history(driver, extract_mode=case["extract_mode"])
+        scraped = time.perf_counter() - started
+        with phase("export"):
+            scraper.save_to_excel(applications, "bench.xlsx")
+        total = time.perf_counter() - started
+    finally:
+        driver.quit()
+        browser_peak = sampler.stop()
+        server.shutdown()
+
+    report = finish_run(True, len(applications))
+    expected = [synthetic_record(index, base_url) for index in range(count)]
+    return dict(
+        case,
+        records=len(applications),
+        correct=applications == expected,
+        seconds=round(total, 3),
+        scrape_seconds=round(scraped, 3),
+        export_seconds=round(total - scraped, 3),
+        startup_seconds=round(startup, 3),
+        commands=report["commands"],
+        phases={item["name"]: {"seconds": item["duration"], "commands": item["commands"]}
+                for item in report["phases"]},
+        python_peak_rss_mb=_peak_rss_mb(),
+        browser_peak_rss_mb=browser_peak,
+    )
+
+
+def bench_case(case, headless=True):
+    args = [sys.executable, os.path.join(SCRIPT_DIR, "bench_scrape.py"), "--child", json.dumps(case)]
+    if not headless:
+        args.append("--headed")
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            completed = subprocess.run(
+                args, capture_output=True, text=True, cwd=work_dir, timeout=CASE_TIMEOUT
+            )
+        except subprocess.TimeoutExpired:
+            return dict(case, error=f"超过 {CASE_TIMEOUT} 秒未完成")
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["未知错误"])[-1]
+        return dict(case, error=error)
+    # 爬虫的进度事件也写在 stdout，结果是最后一行
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """返回超出基线容差的指标列表（基线中没有的用例跳过）"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(case_key(result))
+        if previous is None or "error" in result:
+            continue
+        if not result.get("correct", True):
+            regressions.append({"case": case_key(result), "metric": "correct",
+                                "baseline": True, "current": False})
+        for key in CHECKED_METRICS:
+            if result.get(key) is None or previous.get(key) is None:
+                continue
+            if result[key] > previous[key] * (1 + tolerance):
+                regressions.append({
+                    "case": case_key(result),
+                    "metric": key,
+                    "baseline": previous[key],
+                    "current": result[key],
+                })
+    return regressions
+
+
+def main():
+    from synthetic_pages import VARIANTS
+    from jobsdb_standin import LIST_MODES
+
+    parser = argparse.ArgumentParser(description="端到端爬取基准测试（本地替身服务器 + 无头 Chrome）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--list-modes", nargs="+", default=["scroll"], choices=LIST_MODES)
+    parser.add_argument("--extract-modes", nargs="+", default=["browser"], choices=["browser", "snapshot"])
+    parser.add_argument("--headed", action="store_true", help="使用有界面的浏览器")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="与基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许比基线差的比例")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(json.loads(args.child), headless=not args.headed), ensure_ascii=False))
+        return
+
+    cases = [
+        {"count": count, "variant": variant, "list_mode": list_mode, "extract_mode": extract_mode}
+        for count in args.sizes
+        for variant in args.variants
+        for list_mode in args.list_modes
+        for extract_mode in args.extract_modes
+    ]
+    results = [bench_case(case, headless=not args.headed) for case in cases]
+    report = {"benchmark": "scrape", "results": results}
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(BASELINE_FILE):
+            with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        for result in results:
+            if "error" not in result:
+                baseline[case_key(result)] = {key: result.get(key) for key in CHECKED_METRICS}
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+
+    exit_code = 0
+    if args.check and os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare_with_baseline(results, baseline, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+启动耗时基准测试
+
+测量两项指标（各重复多次取中位数）：
+- import_time：全新解释器中 `import jobsdb_scraper` 的耗时
+- first_get：从 setup_driver() 开始到第一次 driver.get 完成的耗时，
+  其中单独记录驱动路径解析（resolve）耗时
+
+用法:
+    python bench_startup.py --runs 5
+    python bench_startup.py --save-baseline     # 把本次结果保存为基线
+    python bench_startup.py --check             # 与基线对比，超出容差时退出码为 1
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(SCRIPT_DIR, "bench_baselines", "startup.json")
+
+# 用一个不依赖网络的页面，只衡量浏览器本身的启动
+FIRST_PAGE = "data:text/html,<title>bench</title><p>ok</p>"
+
+_IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import jobsdb_scraper; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import_time():
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET],
+        cwd=SCRIPT_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_first_get(headless=True):
+    from driver_cache import resolve_chromedriver
+    from jobsdb_scraper import setup_driver
+
+    t0 = time.perf_counter()
+    resolve_chromedriver()
+    resolve_time = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    driver = setup_driver(headless=headless)
+    try:
+        driver.get(FIRST_PAGE)
+        first_get = time.perf_counter() - t1
+    finally:
+        driver.quit()
+    return resolve_time, first_get
+
+
+def run_benchmark(runs, headless=True, skip_browser=False):
+    import_times = [measure_import_time() for _ in range(runs)]
+    result = {
+        "runs": runs,
+        "import_time": round(statistics.median(import_times), 4),
+    }
+    if not skip_browser:
+        resolves, first_gets = [], []
+        for _ in range(runs):
+            resolve_time, first_get = measure_first_get(headless=headless)
+            resolves.append(resolve_time)
+            first_gets.append(first_get)
+        result["resolve_time"] = round(statistics.median(resolves), 4)
+        result["first_get"] = round(statistics.median(first_gets), 4)
+    return result
+
+
+def compare_with_baseline(result, baseline, tolerance):
+    """返回超出基线容差的指标列表"""
+    regressions = []
+    for key in ("import_time", "resolve_time", "first_get"):
+        if key not in result or key not in baseline:
+            continue
+        limit = baseline[key] * (1 + tolerance)
+        if result[key] > limit:
+            regressions.append({
+                "metric": key,
+                "baseline": baseline[key],
+                "current": result[key],
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--headed", action="store_true", help="使用有界面的浏览器")
+    parser.add_argument("--skip-browser", action="store_true", help="只测量 import 耗时")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="与基线对比")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许比基线慢的比例")
+    args = parser.parse_args()
+
+    sys.path.insert(0, SCRIPT_DIR)
+    result = run_benchmark(args.runs, headless=not args.headed, skip_browser=args.skip_browser)
+    report = {"benchmark": "startup", "result": result}
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    exit_code = 0
+    if args.check and os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare_with_baseline(result, baseline, args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
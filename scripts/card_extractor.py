@@ -0,0 +1,116 @@
+"""
+浏览器内批量提取职位卡片
+
+把卡片选择器和各字段的候选选择器一次性发送到页面，在一次 execute_script 调用中
+完成全部卡片的字段提取，返回 JSON 数组，取代逐卡片、逐选择器的 find_element。
+
+字段语义与原先的 Python 循环一致：按顺序尝试候选选择器，命中元素后取其文本，
+文本非空即停止；命中但文本为空时继续尝试下一个，全部为空则保留最后一次命中的空文本，
+一个都没命中时使用默认值。启用选择器统计时，候选的尝试顺序按历史命中率调整。
+"""
+from jobsdb_selectors import CARD_SELECTORS, CARD_FIELDS, LINK_SELECTOR
+
+# 选择器统计中使用的页面类型
+PAGE_TYPE = "applications"
+
+EXTRACT_CARDS_SCRIPT = """
+var cardSelectors = arguments[0], fields = arguments[1], linkSelector = arguments[2];
+// onlyNew 为真时只提取还没有被标记过的卡片，并在提取后打上标记（流式加载使用）
+var onlyNew = arguments[3], SEEN = 'data-acr-seen';
+
+function query(root, selector, all) {
+    try {
+        return all ? root.querySelectorAll(selector) : root.querySelector(selector);
+    } catch (e) {
+        // 无效选择器视为未命中
+        return all ? [] : null;
+    }
+}
+
+var cards = [], cardSelector = null;
+for (var i = 0; i < cardSelectors.length; i++) {
+    cards = query(document, cardSelectors[i], true);
+    if (cards.length) { cardSelector = cardSelectors[i]; break; }
+}
+var total = cards.length;
+if (onlyNew) {
+    cards = Array.prototype.filter.call(cards, function (card) { return !card.hasAttribute(SEEN); });
+}
+
+// 每个字段每个候选选择器的命中/未命中次数，供选择器统计使用
+var stats = {};
+for (var f = 0; f < fields.length; f++) {
+    var size = fields[f][1].length;
+    stats[fields[f][0]] = { hits: new Array(size).fill(0), misses: new Array(size).fill(0) };
+}
+
+var records = [];
+for (var c = 0; c < cards.length; c++) {
+    var card = cards[c], record = {};
+    for (var f = 0; f < fields.length; f++) {
+        var name = fields[f][0], selectors = fields[f][1], value = fields[f][2];
+        for (var s = 0; s < selectors.length; s++) {
+            var el = query(card, selectors[s], false);
+            if (el) { value = (el.innerText || '').trim(); }
+            if (el && value) { stats[name].hits[s]++; break; }
+            stats[name].misses[s]++;
+        }
+        record[name] = value;
+    }
+    var link = query(card, linkSelector, false);
+    record.link = link ? (link.getAttribute('href') === null ? null : link.href) : '';
+    records.push(record);
+    if (onlyNew) { card.setAttribute(SEEN, '1'); }
+}
+return { selector: cardSelector, count: total, records: records, stats: stats };
+"""
+
+
+def ranked_selectors(stats, card_selectors=CARD_SELECTORS, fields=CARD_FIELDS):
+    """按选择器统计排列卡片选择器和各字段的候选列表"""
+    if stats is None:
+        return list(card_selectors), fields
+    return stats.ordered(PAGE_TYPE, "card", card_selectors), [
+        (name, stats.ordered(PAGE_TYPE, name, selectors), default)
+        for name, selectors, default in fields
+    ]
+
+
+def run_extraction(driver, card_selectors, fields, link_selector=LINK_SELECTOR, only_new=False):
+    """执行一次页面内提取，返回原始结果 {selector, count, records, stats}"""
+    return driver.execute_script(
+        EXTRACT_CARDS_SCRIPT,
+        list(card_selectors),
+        [[name, list(selectors), default] for name, selectors, default in fields],
+        link_selector,
+        only_new,
+    ) or {}
+
+
+def record_extraction_stats(stats, card_selectors, fields, matched_selector, field_stats):
+    """把一次（或累计的）提取命中情况写入选择器统计"""
+    stats.record_match(PAGE_TYPE, "card", list(card_selectors), matched_selector)
+    for name, selectors, _ in fields:
+        counts = field_stats.get(name)
+        if counts:
+            stats.record_counts(PAGE_TYPE, name, selectors, counts["hits"], counts["misses"])
+
+
+def extract_cards(driver, card_selectors=CARD_SELECTORS, fields=CARD_FIELDS,
+                  link_selector=LINK_SELECTOR, stats=None):
+    """
+    一次往返提取页面上所有卡片
+    返回 (命中的卡片选择器, 卡片总数, 记录列表)；没有标题的卡片已被跳过
+    传入 stats（SelectorStats）时按历史命中率排列候选选择器，并记录本次的命中情况
+    """
+    if stats is not None:
+        card_selectors, fields = ranked_selectors(stats, card_selectors, fields)
+
+    result = run_extraction(driver, card_selectors, fields, link_selector)
+    records = [record for record in result.get("records", []) if record.get("title")]
+
+    if stats is not None:
+        record_extraction_stats(
+            stats, card_selectors, fields, result.get("selector"), result.get("stats", {})
+        )
+    return result.get("selector"), result.get("count", 0), records
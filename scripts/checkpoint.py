@@ -0,0 +1,138 @@
+"""
+爬取断点
+
+浏览器崩溃或进程被杀掉时，已经提取的记录不应该丢失。爬取过程中定期把进度写到
+sessions/<account_key>/checkpoint.json（先写临时文件再 os.replace，任何时刻文件都是完整的）：
+- phase     进行到哪一步（listing / extracted / processed）
+- url       已解析出的申请记录页面 URL，恢复时直接打开，不再探测
+- records   已提取的记录（processed 阶段为增量筛选、详情补充之后的最终记录）
+- position  列表已加载的卡片数，恢复时先不提取地加载到这个位置
+
+同一账号再次运行时从断点继续，成功完成后删除断点。选项不同（如增量模式）的断点不会被复用，
+超过 CHECKPOINT_TTL 的断点视为过期。
+
+环境变量:
+    JOBSDB_RESUME=0              不从断点恢复（仍会写断点）
+    JOBSDB_CHECKPOINT_TTL=86400  断点有效期（秒）
+    JOBSDB_CHECKPOINT_INTERVAL=5 两次写断点的最小间隔（秒）
+"""
+import os
+import json
+import time
+import threading
+
+from accounts import account_dir, SESSIONS_DIR
+
+CHECKPOINT_FILE = "checkpoint.json"
+FORMAT_VERSION = 1
+RESUME = os.environ.get("JOBSDB_RESUME", "1") != "0"
+CHECKPOINT_TTL = int(os.environ.get("JOBSDB_CHECKPOINT_TTL", 24 * 3600))
+SAVE_INTERVAL = float(os.environ.get("JOBSDB_CHECKPOINT_INTERVAL", 5))
+
+# 阶段
+LISTING = "listing"        # 已打开申请记录页面，正在加载/提取列表
+EXTRACTED = "extracted"    # 列表已完整提取
+PROCESSED = "processed"    # 增量筛选和详情补充已完成，只差导出
+
+_lock = threading.Lock()
+
+
+def checkpoint_file(email, base_dir=SESSIONS_DIR):
+    return os.path.join(account_dir(email, base_dir), CHECKPOINT_FILE)
+
+
+class Checkpoint:
+    """一个账号的爬取断点；update() 按最小间隔节流写盘，save() 立即写盘"""
+
+    def __init__(self, email, options=None, base_dir=SESSIONS_DIR, interval=SAVE_INTERVAL):
+        self.path = checkpoint_file(email, base_dir)
+        # 影响记录内容的选项，不一致的断点不能复用
+        self.options = options or {}
+        self.interval = interval
+        self.phase = None
+        self.url = None
+        self.records = []
+        self.position = 0
+        self.started_at = time.time()
+        self.updated_at = None
+        self.resumed = False
+        self._saved_at = 0.0
+
+    @classmethod
+    def load(cls, email, options=None, base_dir=SESSIONS_DIR, ttl=CHECKPOINT_TTL,
+             interval=SAVE_INTERVAL):
+        """读取可以复用的断点，不存在、已过期或选项不一致时返回 None（并删除无效的断点）"""
+        checkpoint = cls(email, options, base_dir, interval)
+        if not os.path.exists(checkpoint.path):
+            return None
+        try:
+            with open(checkpoint.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            checkpoint.clear()
+            return None
+        if (data.get("version") != FORMAT_VERSION
+                or data.get("options") != checkpoint.options
+                or time.time() - (data.get("updated_at") or 0) > ttl):
+            checkpoint.clear()
+            return None
+
+        checkpoint.phase = data.get("phase")
+        checkpoint.url = data.get("url")
+        checkpoint.records = data.get("records") or []
+        checkpoint.position = data.get("position") or 0
+        checkpoint.started_at = data.get("started_at") or checkpoint.started_at
+        checkpoint.updated_at = data.get("updated_at")
+        checkpoint.resumed = True
+        return checkpoint
+
+    @property
+    def known_links(self):
+        return [record["link"] for record in self.records if record.get("link")]
+
+    def update(self, phase=None, url=None, records=None, position=None, force=False):
+        """更新断点内容，距离上次写盘超过最小间隔（或 force=True）时写盘"""
+        if phase is not None:
+            self.phase = phase
+        if url is not None:
+            self.url = url
+        if records is not None:
+            self.records = list(records)
+        if position is not None:
+            self.position = position
+        if force or time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def add_records(self, batch, position=None):
+        """追加一批新提取的记录"""
+        self.records.extend(batch)
+        self.update(position=position)
+
+    def save(self):
+        if self.phase is None:
+            return
+        self.updated_at = time.time()
+        data = {
+            "version": FORMAT_VERSION,
+            "options": self.options,
+            "phase": self.phase,
+            "url": self.url,
+            "position": self.position,
+            "started_at": self.started_at,
+            "updated_at": self.updated_at,
+            "records": self.records,
+        }
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with _lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        self._saved_at = time.monotonic()
+
+    def clear(self):
+        """爬取成功后删除断点"""
+        with _lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self.phase = None
+        self.records = []
@@ -0,0 +1,137 @@
+"""
+chromedriver 路径解析与缓存
+
+首次运行时通过 webdriver_manager 下载/查找驱动，并把结果连同当时的 Chrome 版本
+写入本地清单文件；之后只要 Chrome 版本没变，就直接使用清单中的驱动路径，
+不再做版本查询和缓存检查。
+
+用法:
+    python driver_cache.py            # 解析并固定驱动（已固定时直接输出）
+    python driver_cache.py --refresh  # 忽略清单，强制重新解析
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+MANIFEST_FILE = ".chromedriver_manifest.json"
+
+# 显式指定驱动路径时跳过一切解析
+CHROMEDRIVER_PATH_ENV = "CHROMEDRIVER_PATH"
+
+_VERSION_RE = re.compile(r"(\d+\.\d+\.\d+\.\d+)")
+
+# 各平台常见的 Chrome 可执行文件位置
+_CHROME_BINARIES = {
+    "darwin": [
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+        "/Applications/Chromium.app/Contents/MacOS/Chromium",
+    ],
+    "linux": [
+        "google-chrome",
+        "google-chrome-stable",
+        "chromium",
+        "chromium-browser",
+    ],
+}
+
+
+def detect_chrome_version():
+    """返回本机 Chrome 版本号字符串，检测不到时返回 None"""
+    if sys.platform.startswith("win"):
+        return _detect_windows_chrome_version()
+
+    platform_key = "darwin" if sys.platform == "darwin" else "linux"
+    for binary in _CHROME_BINARIES[platform_key]:
+        path = binary if os.path.isabs(binary) else shutil.which(binary)
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            output = subprocess.run(
+                [path, "--version"], capture_output=True, text=True, timeout=10
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = _VERSION_RE.search(output)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _detect_windows_chrome_version():
+    # Windows 上 chrome.exe --version 不输出内容，改为读取注册表
+    for key in (r"HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon",
+                r"HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon"):
+        try:
+            output = subprocess.run(
+                ["reg", "query", key, "/v", "version"],
+                capture_output=True, text=True, timeout=10
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = _VERSION_RE.search(output)
+        if match:
+            return match.group(1)
+    return None
+
+
+def load_manifest(filepath=MANIFEST_FILE):
+    if not os.path.exists(filepath):
+        return None
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(manifest, filepath=MANIFEST_FILE):
+    # 先写临时文件再替换，避免并发运行时读到半个文件
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, filepath)
+
+
+def resolve_chromedriver(refresh=False, filepath=MANIFEST_FILE):
+    """
+    返回 chromedriver 可执行文件路径
+    清单中的驱动存在且 Chrome 版本未变化时直接返回，否则重新解析并更新清单
+    """
+    pinned = os.environ.get(CHROMEDRIVER_PATH_ENV)
+    if pinned:
+        return pinned
+
+    chrome_version = detect_chrome_version()
+    manifest = None if refresh else load_manifest(filepath)
+    if manifest and os.path.exists(manifest.get("driver_path", "")):
+        # 检测不到 Chrome 版本时无法判断是否过期，沿用已固定的驱动
+        if chrome_version is None or manifest.get("chrome_version") == chrome_version:
+            return manifest["driver_path"]
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    driver_path = ChromeDriverManager().install()
+    save_manifest({
+        "chrome_version": chrome_version,
+        "driver_path": driver_path,
+        "resolved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, filepath)
+    return driver_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="解析并固定 chromedriver 路径")
+    parser.add_argument("--refresh", action="store_true", help="忽略已有清单，强制重新解析")
+    args = parser.parse_args()
+
+    path = resolve_chromedriver(refresh=args.refresh)
+    print(json.dumps({
+        "status": "info",
+        "chrome_version": detect_chrome_version(),
+        "driver_path": path,
+    }, ensure_ascii=False))
@@ -0,0 +1,278 @@
+"""
+职位详情补充
+
+申请记录列表只有 title/company/date/status/link，工作地点、薪资、工作类型和职位描述
+需要逐个访问 link 指向的详情页。详情页用带连接池的 keep-alive HTTP 会话并发请求
+（登录后从浏览器复制 cookies，不占用浏览器），并且：
+- 按 host 限速，多个线程共享同一个限速器，避免触发站点的频率限制
+- 每个 URL 的解析结果和 ETag/Last-Modified 缓存在磁盘上（.detail_cache/），
+  之后的运行发送条件请求，304 时直接复用缓存的字段
+- 优先读取页面内嵌的 JSON-LD（JobPosting），缺失的字段再用 jobsdb_selectors.DETAIL_FIELDS 解析
+
+单个详情页失败只会让该记录的补充字段为空（有缓存时使用缓存），不影响整次爬取。
+
+环境变量:
+    JOBSDB_ENRICH=1                    默认开启详情补充
+    JOBSDB_ENRICH_WORKERS=8            并发请求数
+    JOBSDB_ENRICH_RATE=2               每个 host 每秒最多请求数（0 表示不限速）
+    JOBSDB_ENRICH_MAX_AGE=3600         缓存不超过这么久（秒）时不再发请求（默认总是条件请求）
+    JOBSDB_DETAIL_CACHE_DIR=.detail_cache
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from jobsdb_selectors import DETAIL_FIELDS
+from offline_parser import first_text
+
+ENRICH = os.environ.get("JOBSDB_ENRICH") == "1"
+WORKERS = int(os.environ.get("JOBSDB_ENRICH_WORKERS", 8))
+RATE = float(os.environ.get("JOBSDB_ENRICH_RATE", 2))
+MAX_AGE = int(os.environ["JOBSDB_ENRICH_MAX_AGE"]) if os.environ.get("JOBSDB_ENRICH_MAX_AGE") else None
+CACHE_DIR = os.environ.get("JOBSDB_DETAIL_CACHE_DIR", ".detail_cache")
+REQUEST_TIMEOUT = 15
+# Excel 单元格最多 32767 个字符
+MAX_DESCRIPTION = 32000
+
+DETAIL_KEYS = [name for name, _, _ in DETAIL_FIELDS]
+
+# 单条记录的补充结果
+FETCHED = "fetched"
+NOT_MODIFIED = "not_modified"
+CACHED = "cached"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+_JSON_LD_RE = re.compile(
+    r'<script[^>]+type=["\']application/ld\+json["\'][^>]*>(.*?)</script>', re.S | re.I
+)
+
+
+class HostRateLimiter:
+    """按 host 的令牌间隔限速（线程安全）：每个 host 记录下一次允许请求的时间"""
+
+    def __init__(self, rate=RATE):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class DetailCache:
+    """磁盘缓存：每个 URL 一个 JSON 文件（文件名为 URL 的 sha1）"""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def put(self, url, entry):
+        path = self._path(url)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(entry, url=url), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+# ---- 详情页解析 ----
+
+def _job_posting(html):
+    """页面内嵌 JSON-LD 中的 JobPosting 对象，没有时返回 None"""
+    for match in _JSON_LD_RE.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        items = data if isinstance(data, list) else data.get("@graph", [data]) if isinstance(data, dict) else []
+        for item in items:
+            if isinstance(item, dict) and item.get("@type") == "JobPosting":
+                return item
+    return None
+
+
+def _plain_text(fragment):
+    """JSON-LD 里的描述通常是 HTML 片段，转换为纯文本"""
+    if not fragment or "<" not in fragment:
+        return " ".join((fragment or "").split())
+    import lxml.html
+
+    return " ".join(lxml.html.fragment_fromstring(fragment, create_parent="div").text_content().split())
+
+
+def _location(posting):
+    locations = posting.get("jobLocation") or []
+    if isinstance(locations, dict):
+        locations = [locations]
+    names = []
+    for location in locations:
+        address = location.get("address") if isinstance(location, dict) else location
+        if isinstance(address, dict):
+            parts = [address.get(key) for key in ("addressLocality", "addressRegion", "addressCountry")]
+            parts = [part.get("name") if isinstance(part, dict) else part for part in parts]
+            address = ", ".join(dict.fromkeys(part for part in parts if part))
+        if address:
+            names.append(address)
+    return "; ".join(names)
+
+
+def _salary(posting):
+    salary = posting.get("baseSalary")
+    if not isinstance(salary, dict):
+        return salary or ""
+    value = salary.get("value")
+    unit = ""
+    if isinstance(value, dict):
+        unit = value.get("unitText", "")
+        low, high = value.get("minValue"), value.get("maxValue")
+        if low is not None and high is not None and low != high:
+            amount = f"{low:,} - {high:,}" if isinstance(low, (int, float)) else f"{low} - {high}"
+        else:
+            amount = value.get("value", low if low is not None else high)
+            amount = f"{amount:,}" if isinstance(amount, (int, float)) else amount
+    else:
+        amount = value
+    if amount in (None, ""):
+        return ""
+    parts = [salary.get("currency"), str(amount), f"per {unit.lower()}" if unit else None]
+    return " ".join(part for part in parts if part)
+
+
+def _work_type(posting):
+    types = posting.get("employmentType") or []
+    if isinstance(types, str):
+        types = [types]
+    # FULL_TIME -> Full time
+    return ", ".join(t.replace("_", " ").capitalize() for t in types if t)
+
+
+def parse_detail(html):
+    """从详情页 HTML 解析补充字段：JSON-LD 优先，缺失的字段用选择器补齐"""
+    fields = {}
+    posting = _job_posting(html)
+    if posting is not None:
+        fields = {
+            "location": _location(posting),
+            "salary": _salary(posting),
+            "work_type": _work_type(posting),
+            "description": _plain_text(posting.get("description")),
+        }
+    missing = [field for field in DETAIL_FIELDS if not fields.get(field[0])]
+    if missing:
+        import lxml.html
+
+        root = lxml.html.document_fromstring(html)
+        for name, selectors, default in missing:
+            fields[name] = first_text(root, selectors, default)
+    fields["description"] = fields["description"][:MAX_DESCRIPTION]
+    return fields
+
+
+# ---- 并发补充 ----
+
+class DetailEnricher:
+    """
+    并发请求详情页并把字段合并到记录里
+    session 需要是线程安全使用的 keep-alive 会话（连接池不小于 workers），
+    用完后调用 close() 关闭线程池和会话
+    """
+
+    def __init__(self, session, workers=WORKERS, rate=RATE, cache_dir=CACHE_DIR,
+                 max_age=MAX_AGE, timeout=REQUEST_TIMEOUT):
+        self.session = session
+        self.cache = DetailCache(cache_dir)
+        self.limiter = HostRateLimiter(rate)
+        self.max_age = max_age
+        self.timeout = timeout
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="enrich")
+
+    def _fetch(self, url):
+        """返回 (字段, 结果)；失败时有缓存则返回缓存的字段"""
+        entry = self.cache.get(url)
+        if entry and self.max_age is not None and time.time() - entry.get("checked_at", 0) < self.max_age:
+            return entry["fields"], CACHED
+
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        cached_fields = entry["fields"] if entry else None
+        self.limiter.wait(url)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except Exception:
+            return cached_fields, FAILED
+
+        if response.status_code == 304 and entry:
+            entry["checked_at"] = time.time()
+            self.cache.put(url, entry)
+            return entry["fields"], NOT_MODIFIED
+        # 被重定向到登录页也算失败（会话失效或详情页需要登录）
+        if response.status_code != 200 or "login" in urlparse(response.url).path.lower():
+            return cached_fields, FAILED
+
+        fields = parse_detail(response.text)
+        now = time.time()
+        self.cache.put(url, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fields": fields,
+            "fetched_at": now,
+            "checked_at": now,
+        })
+        return fields, FETCHED
+
+    def _enrich_one(self, record):
+        url = record.get("link")
+        fields, outcome = None, SKIPPED
+        if url:
+            try:
+                fields, outcome = self._fetch(url)
+            except Exception:
+                outcome = FAILED
+        for key in DETAIL_KEYS:
+            record[key] = (fields or {}).get(key, "")
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def enrich(self, records):
+        """并发补充一批记录（原地修改），返回同一个列表"""
+        records = list(records)
+        list(self._executor.map(self._enrich_one, records))
+        return records
+
+    def report(self):
+        return {key: self.stats.get(key, 0) for key in (FETCHED, NOT_MODIFIED, CACHED, FAILED, SKIPPED)}
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
@@ -0,0 +1,101 @@
+"""
+爬虫脚本的输出协议（按行分隔的 JSON 事件，NDJSON）
+
+stdout 每行一个事件，每个事件都带协议版本 "v" 和事件类型 "event"：
+- progress  状态消息    {"v": 1, "event": "progress", "status": "info", "message": "..."}
+- record    一条记录    {"v": 1, "event": "record", "seq": 0, "data": {...}}
+- summary   最终结果    {"v": 1, "event": "summary", "success": true, "count": 12, ...}
+                        不重复记录本身，读取方按 record 事件自行收集
+- error     失败        {"v": 1, "event": "error", "status": "failed", "error": "..."}
+progress 事件保留原来的 "status" 字段，只看 status 的旧读取方仍然可用。
+
+记录提取出来就立即写出，但攒够一小批或间隔一段时间才 flush 一次，
+避免逐条 flush 的系统调用开销，同时脚本中途失败时已写出的记录不会丢失。
+"""
+import sys
+import json
+import time
+
+PROTOCOL_VERSION = 1
+
+PROGRESS = "progress"
+RECORD = "record"
+SUMMARY = "summary"
+ERROR = "error"
+
+# 每攒够多少条记录 flush 一次
+FLUSH_EVERY = 25
+# 距离上次 flush 超过多少秒时不等攒够也 flush
+FLUSH_INTERVAL = 0.5
+
+
+def make_event(kind, **fields):
+    return {"v": PROTOCOL_VERSION, "event": kind, **fields}
+
+
+def write_event(event, flush=True, stream=None):
+    stream = stream or sys.stdout
+    stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+    if flush:
+        stream.flush()
+
+
+def emit(kind, **fields):
+    write_event(make_event(kind, **fields))
+
+
+def progress(status, message, **fields):
+    """写出一条状态消息"""
+    emit(PROGRESS, status=status, message=message, **fields)
+
+
+def summary_fields(result):
+    """最终结果去掉记录列表（记录已经以 record 事件写出）"""
+    return {key: value for key, value in result.items() if key != "data"}
+
+
+def emit_summary(result):
+    emit(SUMMARY, **summary_fields(result))
+
+
+def emit_error(message, **fields):
+    emit(ERROR, status="failed", error=message, **fields)
+
+
+def as_event(message):
+    """
+    把一行输出转换成事件：已经是事件时原样返回，
+    旧格式的状态消息（只有 status/message）补上版本号作为 progress 事件
+    """
+    if isinstance(message, dict) and "event" in message:
+        return message
+    if isinstance(message, dict):
+        return make_event(PROGRESS, **message)
+    return make_event(PROGRESS, status="log", message=str(message))
+
+
+class RecordStream:
+    """按小批量 flush 的记录写出器，seq 从 0 开始连续编号"""
+
+    def __init__(self, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, records):
+        for record in records:
+            write_event(make_event(RECORD, seq=self.count, data=record), flush=False)
+            self.count += 1
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.flush()
+        if self._pending and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            sys.stdout.flush()
+            self._pending = 0
+        self._last_flush = time.monotonic()
@@ -0,0 +1,95 @@
+"""
+导出结果去重
+
+同样的爬取结果每次运行都会生成一个新的带时间戳的导出文件并重新上传，磁盘和 Blob 存储只增不减。
+开启后导出文件先在内存缓冲区里生成，同时对规整后的记录集合（按顺序）计算摘要，
+和同一账号、同一格式上次成功导出的摘要比较（见 pipeline.py）：
+- 未变化：不写文件、不上传，沿用上次的文件路径和上传结果
+- 有变化：配置了上传地址时直接从内存上传，不写本地文件（上传失败时退回写本地文件）；
+  没有上传地址时写到导出目录
+
+摘要索引保存在导出目录下的 export_index.json。上次的文件被删除、或上传地址变了，都视为需要重新导出。
+
+环境变量:
+    JOBSDB_SKIP_UNCHANGED=1   开启去重（默认每次都导出）
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+from accounts import account_key
+from exporters import EXPORT_DIR
+
+SKIP_UNCHANGED = os.environ.get("JOBSDB_SKIP_UNCHANGED") == "1"
+INDEX_FILE = "export_index.json"
+
+_lock = threading.Lock()
+
+
+def index_key(email, fmt):
+    """索引中区分账号和导出格式的键"""
+    return f"{account_key(email)}/{fmt}"
+
+
+class RecordDigest:
+    """按顺序累积记录集合的摘要，可以边处理边更新（记录应已经过 pipeline.normalise_record 规整）"""
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.count = 0
+
+    def update(self, records):
+        for record in records:
+            line = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+            self._hash.update(line.encode("utf-8") + b"\n")
+            self.count += 1
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+class ExportIndex:
+    """每个账号 + 格式最近一次成功导出的摘要、文件路径和上传结果"""
+
+    def __init__(self, output_dir=EXPORT_DIR):
+        self.path = os.path.join(output_dir, INDEX_FILE)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def lookup(self, key, digest, upload_url=None):
+        """摘要未变、且上次的导出结果仍然可用时返回上次的条目，否则返回 None"""
+        entry = self._load().get(key)
+        if not entry or entry.get("digest") != digest:
+            return None
+        if upload_url:
+            if entry.get("upload_url") != upload_url or not entry.get("upload"):
+                return None
+        elif not entry.get("path") or not os.path.exists(entry["path"]):
+            return None
+        return entry
+
+    def record(self, key, digest, count, path=None, upload=None, upload_url=None):
+        entry = {
+            "digest": digest,
+            "count": count,
+            "path": path,
+            "upload": upload,
+            "upload_url": upload_url,
+            "exported_at": time.time(),
+        }
+        with _lock:
+            data = self._load()
+            data[key] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        return entry
@@ -0,0 +1,277 @@
+"""
+申请记录导出
+
+所有导出器都是流式的：记录可以来自列表、迭代器或生成器，逐条写出，内存占用不随行数增长，
+因此可以在记录还在产生时就开始写文件。
+- xlsx     openpyxl write-only 模式，表头样式和列宽与原来的 save_to_excel 一致
+- csv      UTF-8 带 BOM，Excel 直接打开不乱码
+- jsonl    每行一条完整记录（保留额外字段，如增量模式的 change）
+- parquet  列式格式，按批写出 row group，需要安装 pyarrow
+
+用法:
+    with open_exporter("csv") as exporter:
+        for record in records:
+            exporter.write(record)
+    path = exporter.path
+
+    path = export_records(records, "xlsx")
+    data = export_bytes(records, "xlsx")     # 在内存里生成，不写磁盘
+"""
+import io
+import os
+import csv
+import json
+from datetime import datetime
+
+EXPORT_DIR = "scraped_data"
+FORMATS = ("xlsx", "csv", "jsonl", "parquet")
+DEFAULT_FORMAT = os.environ.get("JOBSDB_EXPORT_FORMAT", "xlsx")
+
+# (字段名, 表头, 列宽)
+COLUMNS = [
+    ("title", "职位名称", 40),
+    ("company", "公司名称", 30),
+    ("date", "投递日期", 15),
+    ("status", "状态", 15),
+    ("link", "职位链接", 50),
+]
+
+# 开启职位详情补充（enrich.py）时追加的列
+ENRICHED_COLUMNS = COLUMNS + [
+    ("location", "工作地点", 25),
+    ("salary", "薪资", 25),
+    ("work_type", "工作类型", 15),
+    ("description", "职位描述", 80),
+]
+
+# parquet 每攒够这么多行写一个 row group
+PARQUET_BATCH_ROWS = 10000
+
+
+class Exporter:
+    """
+    导出器基类：write() 逐条写入，close() 完成文件并返回路径
+    target 可以是文件路径，也可以是二进制缓冲区（如 io.BytesIO，此时 path 为 None，close() 不关闭缓冲区）
+    """
+
+    extension = None
+    # 文件只追加写出、写到一半也是有效前缀（可以边写边上传，见 pipeline.py）
+    streamable = False
+
+    def __init__(self, target, columns=COLUMNS):
+        if isinstance(target, (str, os.PathLike)):
+            self.path = os.path.abspath(target)
+            self.target = self.path
+        else:
+            self.path = None
+            self.target = target
+        self.columns = columns
+        self.count = 0
+
+    def write(self, record):
+        self._write(record)
+        self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+        return self.count
+
+    def _write(self, record):
+        raise NotImplementedError
+
+    def flush(self):
+        """把已写入的记录刷到文件（只对 streamable 的格式有意义）"""
+
+    def close(self):
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        # 写出失败时不留下不完整的文件
+        if exc_type is not None and self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+        return False
+
+    def _row(self, record):
+        return [record.get(name, "") for name, _, _ in self.columns]
+
+    def _open_text(self, encoding, newline=None):
+        if self.path is not None:
+            return open(self.path, "w", encoding=encoding, newline=newline)
+        return io.TextIOWrapper(self.target, encoding=encoding, newline=newline)
+
+
+class _TextExporter(Exporter):
+    """按行写出文本的导出器"""
+
+    streamable = True
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            if self.path is None:
+                # 写到缓冲区时只分离，不关闭调用方的缓冲区
+                self._file.flush()
+                self._file.detach()
+            else:
+                self._file.close()
+            self._file = None
+        return self.path
+
+
+class XlsxExporter(Exporter):
+    extension = "xlsx"
+
+    def __init__(self, target, columns=COLUMNS, sheet_title="投递记录"):
+        super().__init__(target, columns)
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, Alignment, PatternFill
+        from openpyxl.utils import get_column_letter
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_title)
+
+        # write-only 模式下列宽必须在写入第一行之前设置
+        for index, (_, _, width) in enumerate(columns, start=1):
+            self._sheet.column_dimensions[get_column_letter(index)].width = width
+
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        header = []
+        for _, label, _ in columns:
+            cell = WriteOnlyCell(self._sheet, value=label)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = header_alignment
+            header.append(cell)
+        self._sheet.append(header)
+        self._closed = False
+
+    def _write(self, record):
+        self._sheet.append(self._row(record))
+
+    def close(self):
+        if not self._closed:
+            self._workbook.save(self.target)
+            self._closed = True
+        return self.path
+
+
+class CsvExporter(_TextExporter):
+    extension = "csv"
+
+    def __init__(self, target, columns=COLUMNS):
+        super().__init__(target, columns)
+        self._file = self._open_text("utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([label for _, label, _ in columns])
+
+    def _write(self, record):
+        self._writer.writerow(self._row(record))
+
+
+class JsonlExporter(_TextExporter):
+    extension = "jsonl"
+
+    def __init__(self, target, columns=COLUMNS):
+        super().__init__(target, columns)
+        self._file = self._open_text("utf-8")
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class ParquetExporter(Exporter):
+    extension = "parquet"
+
+    def __init__(self, target, columns=COLUMNS, batch_rows=PARQUET_BATCH_ROWS):
+        super().__init__(target, columns)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("导出 parquet 需要安装 pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string()) for name, _, _ in columns])
+        self._writer = pq.ParquetWriter(self.target, self._schema)
+        self._batch_rows = batch_rows
+        self._batch = {name: [] for name, _, _ in columns}
+        self._pending = 0
+
+    def _write(self, record):
+        for name, _, _ in self.columns:
+            value = record.get(name)
+            self._batch[name].append(None if value is None else str(value))
+        self._pending += 1
+        if self._pending >= self._batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        table = self._pa.Table.from_pydict(self._batch, schema=self._schema)
+        self._writer.write_table(table)
+        self._batch = {name: [] for name, _, _ in self.columns}
+        self._pending = 0
+
+    def close(self):
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+        return self.path
+
+
+EXPORTERS = {
+    "xlsx": XlsxExporter,
+    "csv": CsvExporter,
+    "jsonl": JsonlExporter,
+    "parquet": ParquetExporter,
+}
+
+
+def default_filename(fmt, prefix="jobsdb_applications"):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{prefix}_{timestamp}.{EXPORTERS[fmt].extension}"
+
+
+def create_exporter(fmt, target, columns=COLUMNS):
+    """创建写到 target（文件路径或二进制缓冲区）的导出器"""
+    if fmt not in EXPORTERS:
+        raise ValueError(f"不支持的导出格式: {fmt}（可选: {', '.join(FORMATS)}）")
+    return EXPORTERS[fmt](target, columns=columns)
+
+
+def open_exporter(fmt=DEFAULT_FORMAT, filename=None, output_dir=EXPORT_DIR, columns=COLUMNS):
+    """创建指定格式的导出器（目录不存在时自动创建）"""
+    if fmt not in EXPORTERS:
+        raise ValueError(f"不支持的导出格式: {fmt}（可选: {', '.join(FORMATS)}）")
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename or default_filename(fmt))
+    return create_exporter(fmt, filepath, columns)
+
+
+def export_records(records, fmt=DEFAULT_FORMAT, filename=None, output_dir=EXPORT_DIR,
+                   columns=COLUMNS):
+    """把记录（列表或任意迭代器）导出为文件，返回绝对路径"""
+    with open_exporter(fmt, filename, output_dir, columns) as exporter:
+        exporter.write_many(records)
+    return exporter.path
+
+
+def export_bytes(records, fmt=DEFAULT_FORMAT, columns=COLUMNS):
+    """在内存缓冲区里生成导出文件，返回文件内容（不写磁盘）"""
+    buffer = io.BytesIO()
+    exporter = create_exporter(fmt, buffer, columns)
+    exporter.write_many(records)
+    exporter.close()
+    return buffer.getvalue()
@@ -0,0 +1,272 @@
+"""
+失败现场快照
+
+爬取失败时保存当时的页面，用于排查选择器失效、页面改版等问题：
+- DOM（page_source，已经取过快照 HTML 时直接复用）和截图（PNG）；
+  开启 MHTML 时再通过 CDP Page.captureSnapshot 保存带样式和图片的完整页面
+- 只有失败时才采集；从浏览器取数据在失败的线程里完成（有超时，浏览器卡死时放弃），
+  gzip 压缩和写盘交给后台线程，失败路径不会被大字符串的序列化和写文件拖慢
+- 按账号和运行分目录：debug_snapshots/<account_key>/<运行>/<序号>_<原因>.html.gz，
+  并发的运行互不覆盖；每次采集在 debug_snapshots/index.jsonl 追加一行索引
+- 目录总大小超过上限时按运行从旧到新删除，索引中同步去掉已删除的条目；
+  多个进程共用快照目录（route.ts 每个请求启动一个 CLI），索引的追加和轮转持有文件锁，
+  最近 ROTATE_GRACE 秒内还有写入的运行目录（可能属于其他进程正在进行的运行）不会被删除
+- 待写队列满时（短时间内大量失败）直接丢弃新的快照，只计数，不阻塞爬取
+
+读取: gzip -dc debug_snapshots/<account_key>/<运行>/1_container_missing.html.gz
+      python offline_parser.py debug_snapshots/<account_key>/<运行>/1_no_records.html.gz
+
+环境变量:
+    JOBSDB_SNAPSHOT_DIR=debug_snapshots
+    JOBSDB_SNAPSHOT_MAX_MB=200        快照目录总大小上限
+    JOBSDB_SNAPSHOT_SCREENSHOT=0      不保存截图
+    JOBSDB_SNAPSHOT_MHTML=1           同时保存 MHTML（较大，默认关闭）
+"""
+import os
+import gzip
+import json
+import time
+import queue
+import atexit
+import shutil
+import threading
+
+from accounts import account_key
+from file_lock import file_lock
+from instrumentation import current_run
+
+SNAPSHOT_DIR = os.environ.get("JOBSDB_SNAPSHOT_DIR", "debug_snapshots")
+MAX_TOTAL_MB = float(os.environ.get("JOBSDB_SNAPSHOT_MAX_MB", 200))
+SCREENSHOT = os.environ.get("JOBSDB_SNAPSHOT_SCREENSHOT", "1") != "0"
+MHTML = os.environ.get("JOBSDB_SNAPSHOT_MHTML") == "1"
+INDEX_FILE = "index.jsonl"
+# 从浏览器取快照的最长时间（秒）
+CAPTURE_TIMEOUT = 10
+# 最多排队等待写盘的快照数
+MAX_PENDING = 4
+# 进程退出前等待写完的最长时间（秒）
+FLUSH_TIMEOUT = 10
+# 轮转时不删除最近这么多秒内有写入的运行目录（大于单次任务的硬超时）
+ROTATE_GRACE = 3600
+
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def run_directory(email=None, base_dir=SNAPSHOT_DIR):
+    """当前运行的快照目录（按账号、运行开始时间、进程和线程区分，不创建）"""
+    run = current_run()
+    email = email or (run.email if run is not None else None)
+    started = run.started_at if run is not None else time.time()
+    name = "%s-%d-%d" % (
+        time.strftime("%Y%m%d-%H%M%S", time.localtime(started)), os.getpid(), threading.get_ident() % 100000
+    )
+    return os.path.join(base_dir, account_key(email) if email else "unknown", name)
+
+
+def _next_sequence(directory):
+    """同一次运行中的快照序号"""
+    counters = getattr(_local, "counters", None)
+    if counters is None:
+        counters = _local.counters = {}
+    counters[directory] = counters.get(directory, 0) + 1
+    return counters[directory]
+
+
+def _collect(driver, html, screenshot, mhtml):
+    """从浏览器读取页面内容，返回 (url, {后缀: bytes})"""
+    url = None
+    files = {}
+    try:
+        url = driver.current_url
+    except Exception:
+        pass
+    if html is None:
+        html = driver.page_source
+    files["html"] = html.encode("utf-8")
+    if screenshot:
+        try:
+            files["png"] = driver.get_screenshot_as_png()
+        except Exception:
+            pass
+    if mhtml:
+        try:
+            files["mhtml"] = driver.execute_cdp_cmd("Page.captureSnapshot", {"format": "mhtml"})["data"].encode("utf-8")
+        except Exception:
+            pass
+    return url, files
+
+
+class SnapshotWriter:
+    """后台写出快照的线程：压缩、写盘、追加索引、按大小轮转"""
+
+    def __init__(self, base_dir=SNAPSHOT_DIR, max_total_mb=MAX_TOTAL_MB, max_pending=MAX_PENDING,
+                 grace=ROTATE_GRACE):
+        self.base_dir = base_dir
+        self.grace = grace
+        self.max_total_bytes = int(max_total_mb * 1024 * 1024)
+        self.dropped = 0
+        self.written = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="failure-snapshots", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """排队写出，队列已满时丢弃并返回 False"""
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """等待已排队的快照写完（最多 timeout 秒）"""
+        deadline = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < deadline:
+            time.sleep(0.05)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._write(job)
+                self.written += 1
+            except Exception:
+                # 诊断信息写不出来不应该影响任何东西
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _write(self, job):
+        os.makedirs(job["directory"], exist_ok=True)
+        written = []
+        for suffix, data in job["files"].items():
+            # PNG 本身已经压缩过，不再 gzip
+            name = f"{job['stem']}.{suffix}" if suffix == "png" else f"{job['stem']}.{suffix}.gz"
+            path = os.path.join(job["directory"], name)
+            if suffix == "png":
+                with open(path, "wb") as f:
+                    f.write(data)
+            else:
+                with gzip.open(path, "wb", compresslevel=6) as f:
+                    f.write(data)
+            written.append({"file": name, "bytes": os.path.getsize(path), "raw_bytes": len(data)})
+
+        entry = {
+            "time": job["time"],
+            "account": job["account"],
+            "run": os.path.basename(job["directory"]),
+            "directory": job["directory"],
+            "reason": job["reason"],
+            "url": job["url"],
+            "error": job["error"],
+            "files": written,
+        }
+        index_path = os.path.join(self.base_dir, INDEX_FILE)
+        with _lock, file_lock(index_path):
+            with open(index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._rotate()
+
+    def _run_directories(self):
+        runs = []
+        for account in os.listdir(self.base_dir):
+            account_path = os.path.join(self.base_dir, account)
+            if not os.path.isdir(account_path):
+                continue
+            for run in os.listdir(account_path):
+                path = os.path.join(account_path, run)
+                if os.path.isdir(path):
+                    size = sum(
+                        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+                    )
+                    runs.append((os.path.getmtime(path), path, size))
+        return sorted(runs)
+
+    def _rotate(self):
+        """总大小超过上限时从最旧的运行开始删除（调用方持有 _lock 和索引的文件锁）"""
+        runs = self._run_directories()
+        total = sum(size for _, _, size in runs)
+        removed = set()
+        recent = time.time() - self.grace
+        # 至少保留最新的一次运行
+        for modified, path, size in runs[:-1]:
+            if total <= self.max_total_bytes or modified >= recent:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            removed.add(path)
+            # 账号下已经没有运行目录时一并删除
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                pass
+            total -= size
+        if not removed:
+            return
+        index_path = os.path.join(self.base_dir, INDEX_FILE)
+        with open(index_path, "r", encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        kept = [line for line in lines if json.loads(line).get("directory") not in removed]
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(kept)
+        os.replace(tmp_path, index_path)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter()
+            atexit.register(_writer.flush)
+        return _writer
+
+
+def capture_failure(driver, reason, html=None, email=None, error=None,
+                    screenshot=SCREENSHOT, mhtml=MHTML, timeout=CAPTURE_TIMEOUT):
+    """
+    保存失败现场，返回 DOM 快照的路径（写盘在后台进行）；没有可用的浏览器和 html、
+    取快照超时或待写队列已满时返回 None
+    已经取过 page_source 时传入 html，避免再次序列化整个页面
+    """
+    result = {}
+
+    def collect():
+        try:
+            result["value"] = _collect(driver, html, screenshot, mhtml)
+        except Exception:
+            pass
+
+    if driver is None and html is None:
+        return None
+    if driver is None:
+        result["value"] = (None, {"html": html.encode("utf-8")})
+    else:
+        # 浏览器卡死时 page_source 可能阻塞很久，超时就放弃，让失败尽快返回
+        thread = threading.Thread(target=collect, name="failure-snapshot-collect", daemon=True)
+        thread.start()
+        thread.join(timeout)
+    if "value" not in result:
+        return None
+
+    url, files = result["value"]
+    directory = run_directory(email)
+    stem = f"{_next_sequence(directory)}_{reason}"
+    job = {
+        "time": time.time(),
+        "account": os.path.basename(os.path.dirname(directory)),
+        "directory": directory,
+        "stem": stem,
+        "reason": reason,
+        "url": url,
+        "error": error,
+        "files": files,
+    }
+    if not writer().submit(job):
+        return None
+    return os.path.join(directory, f"{stem}.html.gz")
@@ -0,0 +1,54 @@
+"""
+跨进程文件锁
+
+route.ts 每个请求启动一个 CLI 进程，多个进程会同时读改写同一个共享文件（指标文件、快照索引等），
+线程锁只能保护进程内的并发。锁文件为 <path>.lock，POSIX 上用 fcntl.flock，Windows 上用 msvcrt.locking。
+"""
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = 30
+
+
+def _try_lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """持有 path 的排他锁（同一进程内的不同线程之间同样互斥）；timeout 秒内拿不到时抛出 TimeoutError"""
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        deadline = time.time() + timeout
+        while True:
+            try:
+                _try_lock(f)
+                break
+            except OSError:
+                if time.time() >= deadline:
+                    raise TimeoutError(f"等待文件锁超时: {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            _unlock(f)
@@ -0,0 +1,291 @@
+"""
+已登录后的 HTTP 快速路径
+
+把浏览器里的 cookies 转移到带连接池的 keep-alive requests.Session，直接请求申请记录页面，
+不再渲染、滚动和查询 DOM：
+1. 优先读取页面里服务端渲染的 JSON（__NEXT_DATA__、window.SEEK_REDUX_DATA 等）
+2. 没有 JSON 时用 offline_parser 解析返回的 HTML 卡片
+3. 按 JSON 中的分页信息或 rel="next" 链接继续请求后续页
+
+任何一步失败都抛出 FastPathUnavailable，调用方回退到 Selenium 路径。
+可以用 jobsdb_standin.py 启动的本地替身服务器测试。
+"""
+import re
+import json
+from urllib.parse import urljoin, urlparse, urlencode, parse_qsl, urlunparse
+
+from application_store import record_key
+from offline_parser import parse_html, available as offline_parser_available, MISSING_DEPENDENCY
+
+# 单个会话的连接池大小（同一 host 的并发 keep-alive 连接数）
+POOL_SIZE = 8
+REQUEST_TIMEOUT = 15
+MAX_PAGES = 200
+
+_NEXT_DATA_RE = re.compile(
+    r'<script[^>]+id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S
+)
+_WINDOW_STATE_RE = re.compile(
+    r'window\.(?:SEEK_REDUX_DATA|__APOLLO_STATE__|__INITIAL_STATE__)\s*=\s*(\{.*?\});?\s*</script>', re.S
+)
+_REL_NEXT_RE = re.compile(r'<a[^>]+rel="next"[^>]*href="([^"]+)"|<a[^>]+href="([^"]+)"[^>]*rel="next"')
+
+_TITLE_KEYS = ("title", "jobTitle", "job_title")
+_COMPANY_KEYS = ("companyName", "company", "advertiserName", "advertiser")
+_DATE_KEYS = ("appliedAt", "appliedDate", "applicationDate", "dateApplied", "createdAt", "date")
+_STATUS_KEYS = ("status", "applicationStatus", "statusLabel")
+_LINK_KEYS = ("url", "jobUrl", "link", "href")
+_ID_KEYS = ("jobId", "job_id", "id")
+
+
+class FastPathUnavailable(Exception):
+    """HTTP 快速路径无法使用（未登录、页面结构未知等），需要回退到浏览器"""
+
+
+def browser_cookies(driver):
+    """
+    浏览器中的全部 cookies（WebDriver 格式）
+    优先用 CDP 读取所有域名的 cookies，这样浏览器还停在空白页（cookies 由 CDP 注入）时也能取到；
+    CDP 不可用时退回 get_cookies()，只能取到当前页面域名下的 cookies
+    """
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+    except Exception:
+        return driver.get_cookies()
+    result = []
+    for cookie in cookies:
+        item = {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "domain": cookie.get("domain"),
+            "path": cookie.get("path", "/"),
+            "secure": cookie.get("secure", False),
+            "httpOnly": cookie.get("httpOnly", False),
+        }
+        if not cookie.get("session") and cookie.get("expires", -1) > 0:
+            item["expiry"] = int(cookie["expires"])
+        if cookie.get("sameSite"):
+            item["sameSite"] = cookie["sameSite"]
+        result.append(item)
+    return result
+
+
+def session_from_driver(driver, pool_size=POOL_SIZE):
+    """用浏览器当前的 cookies 和 User-Agent 构造一个 keep-alive 会话"""
+    return session_from_cookies(
+        browser_cookies(driver), driver.execute_script("return navigator.userAgent"), pool_size
+    )
+
+
+def session_from_cookies(cookies, user_agent=None, pool_size=POOL_SIZE):
+    """用 WebDriver 格式的 cookies 构造一个 keep-alive 会话（不需要浏览器）"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504)),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "Accept": "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-HK,en;q=0.9,zh-HK;q=0.8",
+    })
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain"),
+            path=cookie.get("path", "/"),
+        )
+    return session
+
+
+def _is_login_redirect(response):
+    return "login" in urlparse(response.url).path.lower()
+
+
+def _embedded_payload(html):
+    """取出页面内嵌的 JSON 状态，没有时返回 None"""
+    for pattern in (_NEXT_DATA_RE, _WINDOW_STATE_RE):
+        match = pattern.search(html)
+        if not match:
+            continue
+        try:
+            return json.loads(match.group(1))
+        except ValueError:
+            continue
+    return None
+
+
+def _first_value(item, keys):
+    for key in keys:
+        value = item.get(key)
+        if isinstance(value, dict):
+            value = value.get("name") or value.get("label") or value.get("description")
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _looks_like_application(item):
+    # 只有标题的对象（导航菜单等）不算，至少还要有公司或职位 ID
+    if not isinstance(item, dict) or _first_value(item, _TITLE_KEYS) is None:
+        return False
+    return _first_value(item, _COMPANY_KEYS) is not None or _first_value(item, _ID_KEYS) is not None
+
+
+def _find_application_list(node):
+    """深度优先查找第一个由"职位记录"组成的列表"""
+    if isinstance(node, list):
+        if node and all(_looks_like_application(item) for item in node):
+            return node
+        children = node
+    elif isinstance(node, dict):
+        children = node.values()
+    else:
+        return None
+    for child in children:
+        found = _find_application_list(child)
+        if found is not None:
+            return found
+    return None
+
+
+def _find_pagination(node):
+    """查找包含分页信息的对象"""
+    if isinstance(node, dict):
+        if "hasNextPage" in node or "totalPages" in node or "nextPage" in node:
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = _find_pagination(child)
+        if found is not None:
+            return found
+    return None
+
+
+def _normalise(item, base_url):
+    link = _first_value(item, _LINK_KEYS)
+    if link is None:
+        job_id = _first_value(item, _ID_KEYS)
+        link = f"/job/{job_id}" if job_id is not None else ""
+    return {
+        "title": str(_first_value(item, _TITLE_KEYS)).strip(),
+        "company": str(_first_value(item, _COMPANY_KEYS) or "未知公司").strip(),
+        "date": str(_first_value(item, _DATE_KEYS) or "未知").strip(),
+        "status": str(_first_value(item, _STATUS_KEYS) or "已投递").strip(),
+        "link": urljoin(base_url, link) if link else "",
+    }
+
+
+def _with_page(url, page):
+    parts = urlparse(url)
+    query = dict(parse_qsl(parts.query))
+    query["page"] = str(page)
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+def parse_applications_page(html, page_url):
+    """
+    解析一页申请记录
+    返回 (记录列表, 下一页 URL 或 None, 来源 "payload"/"html")
+    """
+    payload = _embedded_payload(html)
+    if payload is not None:
+        items = _find_application_list(payload)
+        if items is not None:
+            records = [_normalise(item, page_url) for item in items]
+            pagination = _find_pagination(payload) or {}
+            next_url = None
+            next_page = pagination.get("nextPage")
+            if next_page:
+                if str(next_page).isdigit():
+                    next_url = _with_page(page_url, next_page)
+                else:
+                    next_url = urljoin(page_url, str(next_page))
+            elif pagination.get("hasNextPage") or (
+                pagination.get("totalPages") and
+                int(pagination.get("page", 1)) < int(pagination["totalPages"])
+            ):
+                next_url = _with_page(page_url, int(pagination.get("page", 1)) + 1)
+            return records, next_url, "payload"
+
+    if not offline_parser_available():
+        raise FastPathUnavailable(MISSING_DEPENDENCY)
+    _, _, records = parse_html(html, page_url, workers=1)
+    match = _REL_NEXT_RE.search(html)
+    next_url = urljoin(page_url, match.group(1) or match.group(2)) if match else None
+    return records, next_url, "html"
+
+
+def fetch_applications(session, url, max_pages=MAX_PAGES, stop_when=None):
+    """
+    从 url 开始逐页抓取申请记录
+    每抓到一页调用 stop_when(该页的新记录)，返回真时不再请求后续页（增量爬取）
+    返回 (最终的列表页 URL, 记录列表, 来源)；无法使用时抛出 FastPathUnavailable
+    """
+    import requests
+
+    records, seen_keys, seen_pages = [], set(), set()
+    page_url, source, first_url = url, None, None
+
+    while page_url and len(seen_pages) < max_pages and page_url not in seen_pages:
+        seen_pages.add(page_url)
+        try:
+            response = session.get(page_url, timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            raise FastPathUnavailable(f"请求失败: {str(e)}")
+        if _is_login_redirect(response):
+            raise FastPathUnavailable("会话未登录或已过期")
+        if response.status_code != 200:
+            if first_url is None:
+                raise FastPathUnavailable(f"HTTP {response.status_code}: {page_url}")
+            break
+        first_url = first_url or response.url
+
+        page_records, next_url, page_source = parse_applications_page(response.text, response.url)
+        source = source or page_source
+        # 没有链接的记录按标题+公司+日期去重，与记录库使用同一个键
+        new_records = [r for r in page_records if record_key(r) not in seen_keys]
+        if not new_records:
+            break
+        seen_keys.update(record_key(r) for r in new_records)
+        records.extend(new_records)
+        if stop_when is not None and stop_when(new_records):
+            break
+        page_url = next_url
+
+    if not records:
+        raise FastPathUnavailable(f"页面中没有找到申请记录: {url}")
+    return first_url, records, source
+
+
+def fetch_applications_via_http(driver, candidate_urls, make_stop_when=None):
+    """
+    依次尝试候选 URL，第一个成功的结果即返回 (列表页 URL, 记录列表, 来源)
+    make_stop_when() 为每个候选 URL 创建一个新的 stop_when，换 URL 时重新开始判断
+    全部失败时抛出 FastPathUnavailable
+    """
+    session = session_from_driver(driver)
+    errors = []
+    try:
+        for url in candidate_urls:
+            try:
+                stop_when = make_stop_when() if make_stop_when is not None else None
+                return fetch_applications(session, url, stop_when=stop_when)
+            except FastPathUnavailable as e:
+                errors.append(str(e))
+    finally:
+        session.close()
+    raise FastPathUnavailable("; ".join(errors))
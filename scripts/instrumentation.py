@@ -0,0 +1,312 @@
+"""
+爬取过程的分阶段计时与 WebDriver 调用统计
+
+每次运行（一个账号的一次爬取）按阶段记录：
+- 耗时（同名阶段多次进入时累加，嵌套阶段的耗时同时计入外层阶段）
+- WebDriver 命令数（按命令名统计，只计入最内层阶段）
+- 选择器查找失败次数（find_element 未找到、find_elements 为空、probe_any 全部未命中）
+- 浏览器进程树的资源占用（attach_resources() 提供时，见 resource_governor）
+
+运行结束时生成机器可读的报告（随最终结果输出），并可选写出 Prometheus 文本格式的
+指标文件，供 node_exporter 的 textfile collector 等监控抓取。
+统计按线程隔离，常驻 worker 中并发的任务互不干扰。
+"""
+import os
+import re
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from accounts import account_key
+from file_lock import file_lock
+
+# 设置后每次运行结束都会更新该指标文件
+METRICS_FILE = os.environ.get("JOBSDB_METRICS_FILE")
+
+# 不在任何阶段内的命令计入这里
+UNATTRIBUTED = "other"
+
+# 这些命令找不到元素时算作选择器查找失败
+_FIND_ONE = {"findElement", "findChildElement"}
+_FIND_MANY = {"findElements", "findChildElements"}
+
+_local = threading.local()
+
+
+class _Phase:
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.duration = 0.0
+        self.entries = 0
+        self.commands = Counter()
+        self.failed_lookups = 0
+
+    def report(self):
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "duration": round(self.duration, 3),
+            "entries": self.entries,
+            "commands": sum(self.commands.values()),
+            "command_breakdown": dict(self.commands.most_common()),
+            "failed_lookups": self.failed_lookups,
+        }
+
+
+class RunMetrics:
+    """一次运行的统计"""
+
+    def __init__(self, email=None):
+        self.email = email
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.phases = {}
+        self.stack = []
+        self.finished = None
+        # 返回浏览器资源统计的函数（resource_governor.SessionGovernor.stats）
+        self.resource_probe = None
+
+    def _phase(self, name, parent=None):
+        if name not in self.phases:
+            self.phases[name] = _Phase(name, parent)
+        return self.phases[name]
+
+    def _current(self):
+        return self.stack[-1] if self.stack else self._phase(UNATTRIBUTED)
+
+    def count_command(self, command, failed=False):
+        phase = self._current()
+        phase.commands[command] += 1
+        if failed:
+            phase.failed_lookups += 1
+
+    def count_failed_lookup(self):
+        self._current().failed_lookups += 1
+
+    def report(self, success=None, records=None):
+        phases = [phase.report() for phase in self.phases.values()
+                  if phase.entries or phase.commands or phase.failed_lookups]
+        report = {
+            "total_duration": round(time.perf_counter() - self._started, 3),
+            "commands": sum(item["commands"] for item in phases),
+            "failed_lookups": sum(item["failed_lookups"] for item in phases),
+            "phases": phases,
+        }
+        if success is not None:
+            report["success"] = success
+        if records is not None:
+            report["records"] = records
+        if self.resource_probe is not None:
+            try:
+                report["resources"] = self.resource_probe()
+            except Exception:
+                pass
+        return report
+
+
+def start_run(email=None):
+    """开始一次新的运行（替换当前线程上一次的统计）"""
+    _local.run = RunMetrics(email)
+    _local.report = None
+    return _local.run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def finish_run(success, records=None):
+    """结束当前线程的运行并返回报告；同一次运行重复调用返回第一次的报告"""
+    run = current_run()
+    if run is None:
+        return None
+    if run.finished is None:
+        run.finished = run.report(success, records)
+        _local.report = run.finished
+    return run.finished
+
+
+def last_report():
+    """当前线程最近一次结束的运行报告（失败时用来附在错误事件里）"""
+    return getattr(_local, "report", None)
+
+
+@contextmanager
+def phase(name):
+    """记录一个阶段；没有进行中的运行时什么也不做"""
+    run = current_run()
+    if run is None or run.finished is not None:
+        yield
+        return
+    parent = run.stack[-1].name if run.stack else None
+    span = run._phase(name, parent)
+    span.entries += 1
+    run.stack.append(span)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        span.duration += time.perf_counter() - started
+        run.stack.pop()
+
+
+def attach_resources(probe):
+    """让当前运行的报告带上浏览器资源统计（生成报告时调用 probe()）"""
+    run = current_run()
+    if run is not None and run.finished is None:
+        run.resource_probe = probe
+
+
+def count_failed_lookup():
+    run = current_run()
+    if run is not None and run.finished is None:
+        run.count_failed_lookup()
+
+
+def instrument_driver(driver):
+    """
+    包装 driver.execute，统计每条 WebDriver 命令（一次 HTTP 往返）
+    重复调用是安全的；只统计调用线程当前进行中的运行
+    """
+    if getattr(driver, "_acr_instrumented", False):
+        return driver
+    original_execute = driver.execute
+
+    def execute(driver_command, params=None):
+        run = current_run()
+        if run is None or run.finished is not None:
+            return original_execute(driver_command, params)
+        try:
+            response = original_execute(driver_command, params)
+        except Exception as e:
+            run.count_command(
+                driver_command, failed=driver_command in _FIND_ONE and _is_no_such_element(e)
+            )
+            raise
+        run.count_command(
+            driver_command,
+            failed=driver_command in _FIND_MANY and not (response or {}).get("value"),
+        )
+        return response
+
+    driver.execute = execute
+    driver._acr_instrumented = True
+    return driver
+
+
+def _is_no_such_element(error):
+    from selenium.common.exceptions import NoSuchElementException
+    return isinstance(error, NoSuchElementException)
+
+
+# ---- Prometheus 文本格式的指标文件 ----
+
+_METRICS = [
+    ("jobsdb_scrape_duration_seconds", "gauge", "Duration of the last scrape run"),
+    ("jobsdb_scrape_success", "gauge", "Whether the last scrape run succeeded"),
+    ("jobsdb_scrape_records", "gauge", "Records returned by the last scrape run"),
+    ("jobsdb_scrape_last_run_timestamp_seconds", "gauge", "Start time of the last scrape run"),
+    ("jobsdb_scrape_phase_seconds", "gauge", "Time spent in each phase of the last scrape run"),
+    ("jobsdb_scrape_phase_webdriver_commands", "gauge",
+     "WebDriver commands issued in each phase of the last scrape run"),
+    ("jobsdb_scrape_phase_failed_lookups", "gauge",
+     "Failed selector lookups in each phase of the last scrape run"),
+    ("jobsdb_browser_rss_megabytes", "gauge", "Browser process tree RSS at the end of the last scrape run"),
+    ("jobsdb_browser_peak_rss_megabytes", "gauge", "Peak browser process tree RSS of the session"),
+    ("jobsdb_browser_cpu_seconds", "gauge", "CPU time used by the browser process tree of the session"),
+    ("jobsdb_browser_processes", "gauge", "Processes in the browser process tree"),
+    ("jobsdb_browser_navigations", "gauge", "Navigations performed by the browser session"),
+]
+
+_SAMPLE_LINE = re.compile(r'^(\w+)\{([^}]*)\}\s+(\S+)$')
+_metrics_lock = threading.Lock()
+
+
+def _labels(**labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def _samples(account, started_at, report):
+    samples = [
+        ("jobsdb_scrape_duration_seconds", _labels(account=account), report["total_duration"]),
+        ("jobsdb_scrape_success", _labels(account=account), int(bool(report.get("success")))),
+        ("jobsdb_scrape_records", _labels(account=account), report.get("records") or 0),
+        ("jobsdb_scrape_last_run_timestamp_seconds", _labels(account=account), int(started_at)),
+    ]
+    for item in report["phases"]:
+        labels = _labels(account=account, phase=item["name"])
+        samples.append(("jobsdb_scrape_phase_seconds", labels, item["duration"]))
+        samples.append(("jobsdb_scrape_phase_webdriver_commands", labels, item["commands"]))
+        samples.append(("jobsdb_scrape_phase_failed_lookups", labels, item["failed_lookups"]))
+    resources = report.get("resources") or {}
+    for name, key in (
+        ("jobsdb_browser_rss_megabytes", "rss_mb"),
+        ("jobsdb_browser_peak_rss_megabytes", "peak_rss_mb"),
+        ("jobsdb_browser_cpu_seconds", "cpu_seconds"),
+        ("jobsdb_browser_processes", "processes"),
+        ("jobsdb_browser_navigations", "navigations"),
+    ):
+        if resources.get(key) is not None:
+            samples.append((name, _labels(account=account), resources[key]))
+    return samples
+
+
+def _read_samples(filepath):
+    if not os.path.exists(filepath):
+        return []
+    samples = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for line in f:
+            match = _SAMPLE_LINE.match(line.strip())
+            if match:
+                samples.append(match.groups())
+    return samples
+
+
+def write_metrics(filepath, email, report, started_at=None):
+    """
+    更新指标文件：替换该账号的全部样本，保留其他账号的样本
+    账号标签使用 account_key，不把邮箱写进监控系统；
+    读改写期间持有文件锁，并发的 CLI 进程不会互相覆盖对方的样本
+    """
+    if not filepath or report is None:
+        return
+    account = account_key(email) if email else "unknown"
+    own_label = f'account="{account}"'
+    with _metrics_lock, file_lock(filepath):
+        samples = [
+            sample for sample in _read_samples(filepath)
+            if own_label not in sample[1].split(",")
+        ]
+        samples.extend(_samples(account, started_at or time.time(), report))
+
+        lines = []
+        for name, kind, help_text in _METRICS:
+            rows = [sample for sample in samples if sample[0] == name]
+            if not rows:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{{{labels}}} {value}" for _, labels, value in rows)
+
+        directory = os.path.dirname(os.path.abspath(filepath))
+        os.makedirs(directory, exist_ok=True)
+        # 先写临时文件再替换，抓取方不会读到写了一半的文件
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, filepath)
+
+
+def finish_and_export(success, records=None, metrics_file=METRICS_FILE):
+    """结束当前运行，按需写出指标文件，返回报告"""
+    run = current_run()
+    if run is None:
+        return None
+    first = run.finished is None
+    report = finish_run(success, records)
+    if first and metrics_file:
+        write_metrics(metrics_file, run.email, report, run.started_at)
+    return report
@@ -1,34 +1,95 @@
 import sys
 import json
+import argparse
 import time
-import pickle
 import os
-from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+# openpyxl 和 webdriver_manager 导入较慢，且失败路径用不到，延迟到实际需要时再导入
+from driver_cache import resolve_chromedriver
+from checkpoint import Checkpoint, RESUME, LISTING, EXTRACTED, PROCESSED
+from enrich import DetailEnricher, ENRICH, WORKERS as ENRICH_WORKERS
+from export_index import SKIP_UNCHANGED, index_key as export_index_key
+from failure_snapshots import capture_failure
+from exporters import export_records, FORMATS, DEFAULT_FORMAT, COLUMNS, ENRICHED_COLUMNS
+from pipeline import Pipeline
+from uploader import UPLOAD_URL
+from events import progress, RecordStream, emit_summary, emit_error
+from instrumentation import (
+    phase, start_run, current_run, instrument_driver, finish_and_export, last_report, METRICS_FILE,
+    attach_resources,
+)
+from jobsdb_selectors import CONTAINER_SELECTORS
+from lean_mode import (
+    LEAN_MODE, configure_options as configure_lean_options, enable_blocking,
+    reset_network_stats, drain as drain_network_log, network_report,
+)
+from list_loader import StreamingListLoader
+from mailbox_login import MAILBOX, MAIL_TIMEOUT, open_verification_link
+from offline_parser import parse_html, available as offline_parser_available, MISSING_DEPENDENCY
+from resource_governor import SessionGovernor, JobWatchdog, JOB_TIMEOUT, shutdown_driver, reap_orphans
+from replay import (
+    RECORD_DIR, LIST_SNAPSHOT, snapshot, start_recording, stop_recording, recording_path
+)
+from selector_stats import get_stats, probe_any
+from http_fastpath import (
+    fetch_applications_via_http, browser_cookies, session_from_driver, FastPathUnavailable
+)
+from url_resolver import (
+    resolve_applications_url, cached_url as cached_applications_url,
+    invalidate as invalidate_applications_url,
+)
+from session_store import SessionStore, inject_cookies, validate_session, VALID, INVALID, UNKNOWN
+from application_store import ApplicationStore, IncrementalCutoff, INSERT, UPDATE
+from waits import (
+    wait_for, wait_for_page, wait_report, reset_wait_log, install_page_probe,
+    document_ready, any_present, input_value_is,
+    element_clickable, url_changed,
+)
 
 # 配置常量
-COOKIES_FILE = "jobsdb_cookies.pkl"
+# 会话按账号保存在 sessions/<account_key>/session.json（见 session_store）
 EXCEL_OUTPUT_DIR = "scraped_data"
-JOBSDB_URL = "https://hk.jobsdb.com"
+# 可通过环境变量指向本地替身服务器（jobsdb_standin.py）
+JOBSDB_URL = os.environ.get("JOBSDB_BASE_URL", "https://hk.jobsdb.com")
 # 正确的登录 URL
-LOGIN_URL = "https://hk.jobsdb.com/login"
+LOGIN_URL = f"{JOBSDB_URL}/login"
+# 申请历史页面的常见路径
+APPLICATION_PATHS = [
+    "/profile/applications",
+    "/my-activity/applied-jobs",
+    "/applications",
+    "/profile/job-applications",
+]
+# 浏览器和会话验证请求共用的用户代理
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+# 字段提取方式：browser（浏览器内一次提取）或 snapshot（页面快照离线解析）
+EXTRACT_MODES = ("browser", "snapshot")
+EXTRACT_MODE = os.environ.get("JOBSDB_EXTRACT_MODE", "browser")
+# 登录后优先用 HTTP 直接抓取申请记录，失败再回退到浏览器
+HTTP_FASTPATH = os.environ.get("JOBSDB_HTTP_FASTPATH") == "1"
+# 增量爬取：只返回本地记录库中没有或状态变化的记录
+INCREMENTAL = os.environ.get("JOBSDB_INCREMENTAL") == "1"
 
-def setup_driver():
-    """初始化 Chrome WebDriver（使用自动驱动管理）"""
+def setup_driver(headless=False, profile_dir=None, lean=LEAN_MODE, record=False):
+    """
+    初始化 Chrome WebDriver（驱动路径由 driver_cache 解析并缓存）
+    提供 profile_dir 时使用独立的浏览器 profile 目录（批量并发时每个账号一个）
+    lean=True 时使用精简模式：拦截图片/字体/广告等请求，eager 加载策略（见 lean_mode）
+    record=True 时开启 performance 日志，供录制模式保存响应正文（见 replay）
+    """
     options = webdriver.ChromeOptions()
     
     # 开发环境：保持浏览器可见以便调试
-    # 生产环境：取消注释下面两行启用无头模式
-    # options.add_argument('--headless=new')
-    # options.add_argument('--window-size=1920,1080')
+    # 生产环境：传入 headless=True 启用无头模式
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080')
+    
+    if profile_dir:
+        options.add_argument(f'--user-data-dir={profile_dir}')
     
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
@@ -37,12 +98,20 @@ def setup_driver():
     options.add_experimental_option('useAutomationExtension', False)
     
     # 设置用户代理
-    options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    
+    if lean:
+        configure_lean_options(options)
+    elif record:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
     
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
+        service = Service(resolve_chromedriver())
+        driver = instrument_driver(webdriver.Chrome(service=service, options=options))
         driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        install_page_probe(driver)
+        if lean:
+            enable_blocking(driver)
         driver.set_page_load_timeout(30)
         return driver
     except Exception as e:
@@ -52,154 +121,139 @@ def setup_driver():
         }), file=sys.stderr)
         raise
 
-def save_cookies(driver, filepath=COOKIES_FILE):
-    """保存 cookies 到文件"""
+def save_session(driver, email, sessions):
+    """登录成功后保存该账号的会话"""
     try:
-        with open(filepath, 'wb') as f:
-            pickle.dump(driver.get_cookies(), f)
-        print(json.dumps({
-            "status": "info",
-            "message": "Cookies 已保存"
-        }))
-        sys.stdout.flush()
+        sessions.save(email, browser_cookies(driver))
+        progress("info", "Session 已保存")
     except Exception as e:
-        print(json.dumps({
-            "status": "warning",
-            "message": f"保存 Cookies 失败: {str(e)}"
-        }))
-        sys.stdout.flush()
+        progress("warning", f"保存 Session 失败: {str(e)}")
 
-def load_cookies(driver, filepath=COOKIES_FILE):
-    """从文件加载 cookies"""
-    if not os.path.exists(filepath):
+def restore_session(driver, email, sessions):
+    """
+    恢复已保存的会话，确认可以直接使用时返回 True
+    - 没有会话或登录 cookies 已过期：直接返回 False，不加载任何页面
+    - 最近验证过：注入 cookies 后直接返回 True
+    - 否则用一个轻量 HTTP 请求验证，无法判断时才打开首页检查
+    """
+    state = sessions.load(email)
+    if state is None:
         return False
-    try:
+    if state.expired:
+        progress("info", "已保存的 session 已过期，需要重新登录")
+        sessions.invalidate(email)
+        return False
+    
+    if not inject_cookies(driver, state.cookies):
+        # 没有 CDP 时只能先进入 JobsDB 域名再写入 cookies，不必等页面完全稳定
         driver.get(JOBSDB_URL)
-        time.sleep(2)
-        
-        with open(filepath, 'rb') as f:
-            cookies = pickle.load(f)
-            for cookie in cookies:
-                try:
-                    driver.add_cookie(cookie)
-                except:
-                    continue
+        wait_for(driver, document_ready, 10, "load_cookies")
+        for cookie in state.cookies:
+            try:
+                driver.add_cookie(cookie)
+            except Exception:
+                continue
+    
+    if state.verified_recently():
+        progress("login_success", "使用保存的 session 登录成功（最近已验证）")
         return True
-    except Exception as e:
-        print(json.dumps({
-            "status": "warning",
-            "message": f"加载 Cookies 失败: {str(e)}"
-        }))
-        sys.stdout.flush()
+    
+    with phase("session_check"):
+        check_url = cached_applications_url(email) or f"{JOBSDB_URL}{APPLICATION_PATHS[0]}"
+        verdict = validate_session(state.cookies, check_url, USER_AGENT)
+        if verdict == UNKNOWN:
+            # HTTP 请求无法判断（网络错误、页面不存在等），退回到浏览器检查登录按钮
+            driver.get(JOBSDB_URL)
+            wait_for_page(driver, 10, "session_check")
+            verdict = INVALID if driver.find_elements(By.LINK_TEXT, "Sign in") else VALID
+    
+    if verdict == INVALID:
+        progress("info", "已保存的 session 已失效，需要重新登录")
+        sessions.invalidate(email)
         return False
+    
+    sessions.mark_verified(email)
+    progress("login_success", "使用保存的 session 登录成功")
+    return True
 
-def wait_for_login_completion(driver, timeout=300):
+def wait_for_login_completion(driver, timeout=300, manual=True):
     """
     等待用户完成邮箱验证并登录
     检测多个可能的登录成功标志
+    manual=False 表示验证链接已经自动打开，只需确认登录结果，不提示用户
     """
-    print(json.dumps({
-        "status": "waiting_verification",
-        "message": "请检查邮箱并点击验证链接完成登录"
-    }))
-    sys.stdout.flush()
+    if manual:
+        progress("waiting_verification", "请检查邮箱并点击验证链接完成登录")
     
     start_time = time.time()
-    check_interval = 2  # 每2秒检查一次
+    check_interval = 2  # 每2秒检查一次（等待的是用户操作，无需更频繁）
+    next_reminder = 30
+    
+    # 尝试多种方式确认登录成功
+    login_indicators = [
+        # 用户菜单/头像
+        "[data-cy='user-menu']",
+        "[data-automation='user-menu']",
+        "button[aria-label*='Account']",
+        "button[aria-label*='Profile']",
+        # 常见的已登录元素
+        ".user-avatar",
+        ".profile-menu",
+        "[class*='UserMenu']",
+        "[class*='userMenu']",
+        # 通过检查是否有"登出"按钮
+        "a[href*='logout']",
+        "button[data-cy*='logout']"
+    ]
     
-    while time.time() - start_time < timeout:
+    def login_detected(driver):
+        nonlocal next_reminder
+        
+        # 每30秒提醒一次
+        elapsed = time.time() - start_time
+        if elapsed >= next_reminder:
+            remaining = int(timeout - elapsed)
+            progress("waiting", f"仍在等待登录... (剩余 {remaining} 秒)")
+            next_reminder += 30
+        
         try:
             current_url = driver.current_url
             
             # 检查 URL 是否已经离开登录页面
-            if "login" not in current_url.lower() and "oauth" not in current_url.lower():
-                # 尝试多种方式确认登录成功
-                login_indicators = [
-                    # 用户菜单/头像
-                    "[data-cy='user-menu']",
-                    "[data-automation='user-menu']",
-                    "button[aria-label*='Account']",
-                    "button[aria-label*='Profile']",
-                    # 常见的已登录元素
-                    ".user-avatar",
-                    ".profile-menu",
-                    "[class*='UserMenu']",
-                    "[class*='userMenu']",
-                    # 通过检查是否有"登出"按钮
-                    "a[href*='logout']",
-                    "button[data-cy*='logout']"
-                ]
-                
-                for selector in login_indicators:
-                    try:
-                        driver.find_element(By.CSS_SELECTOR, selector)
-                        print(json.dumps({
-                            "status": "login_success",
-                            "message": "登录成功！"
-                        }))
-                        sys.stdout.flush()
-                        return True
-                    except NoSuchElementException:
-                        continue
-                
-                # 如果URL变了但找不到登录标志，等待一下再检查
-                time.sleep(3)
-                
-            time.sleep(check_interval)
+            if "login" in current_url.lower() or "oauth" in current_url.lower():
+                return False
             
-            # 每30秒提醒一次
-            elapsed = time.time() - start_time
-            if int(elapsed) % 30 == 0 and elapsed > 0:
-                remaining = int(timeout - elapsed)
-                print(json.dumps({
-                    "status": "waiting",
-                    "message": f"仍在等待登录... (剩余 {remaining} 秒)"
-                }))
-                sys.stdout.flush()
-                
-        except Exception as e:
-            time.sleep(check_interval)
-            continue
+            for selector in login_indicators:
+                if driver.find_elements(By.CSS_SELECTOR, selector):
+                    return True
+        except Exception:
+            # 页面跳转过程中可能暂时无法访问，下次轮询再试
+            pass
+        return False
+    
+    if wait_for(driver, login_detected, timeout, "login_completion", poll=check_interval):
+        progress("login_success", "登录成功！")
+        return True
     
     return False
 
-def login_to_jobsdb(driver, email):
+def login_to_jobsdb(driver, email, sessions=None, mailbox=MAILBOX):
     """
     处理 JobsDB 登录流程
+    会话按账号保存（sessions 为 SessionStore，默认 sessions/<account_key>/session.json）
+    配置了 mailbox（IMAP / maildir，见 mailbox_login）时自动从邮箱读取并打开验证链接
     """
+    sessions = sessions or SessionStore()
     try:
-        # 1. 先尝试加载已保存的 cookies
-        if load_cookies(driver):
-            driver.get(JOBSDB_URL)
-            time.sleep(3)
-            
-            # 检查是否已登录（通过查找登录按钮的缺失来判断）
-            try:
-                # 如果找到登录按钮，说明未登录
-                driver.find_element(By.LINK_TEXT, "Sign in")
-                print(json.dumps({
-                    "status": "info",
-                    "message": "已保存的 session 已过期，需要重新登录"
-                }))
-                sys.stdout.flush()
-            except NoSuchElementException:
-                # 找不到登录按钮，说明已经登录
-                print(json.dumps({
-                    "status": "login_success",
-                    "message": "使用保存的 session 登录成功"
-                }))
-                sys.stdout.flush()
+        # 1. 先尝试恢复已保存的会话
+        with phase("cookie_load"):
+            if restore_session(driver, email, sessions):
                 return True
         
         # 2. 需要重新登录
-        print(json.dumps({
-            "status": "login_required",
-            "message": "正在打开登录页面..."
-        }))
-        sys.stdout.flush()
+        progress("login_required", "正在打开登录页面...")
         
         driver.get(LOGIN_URL)
-        time.sleep(3)
         
         # 3. 查找并填写邮箱输入框
         # JobsDB 可能使用不同的输入框标识
@@ -212,30 +266,21 @@ def login_to_jobsdb(driver, email):
             "input[autocomplete='email']"
         ]
         
+        # 所有候选选择器在同一个等待里轮询，按历史命中率取第一个命中的
         email_input = None
-        for selector in email_selectors:
-            try:
-                email_input = WebDriverWait(driver, 5).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
-                if email_input:
-                    break
-            except:
-                continue
+        email_selector = probe_any(driver, "login", "email_input", email_selectors, 15)
+        if email_selector:
+            email_input = driver.find_element(By.CSS_SELECTOR, email_selector)
         
         if not email_input:
             raise Exception("找不到邮箱输入框，页面结构可能已更改")
         
-        print(json.dumps({
-            "status": "info",
-            "message": "找到邮箱输入框，正在填写..."
-        }))
-        sys.stdout.flush()
+        progress("info", "找到邮箱输入框，正在填写...")
         
         email_input.clear()
-        time.sleep(1)
+        wait_for(driver, input_value_is(email_input, ""), 2, "email_clear")
         email_input.send_keys(email)
-        time.sleep(2)
+        wait_for(driver, input_value_is(email_input, email), 3, "email_filled")
         
         # 4. 查找并点击提交按钮
         button_selectors = [
@@ -259,18 +304,23 @@ def login_to_jobsdb(driver, email):
         if not submit_button:
             raise Exception("找不到提交按钮，页面结构可能已更改")
         
-        print(json.dumps({
-            "status": "info",
-            "message": "正在提交邮箱..."
-        }))
-        sys.stdout.flush()
+        progress("info", "正在提交邮箱...")
         
+        wait_for(driver, element_clickable(submit_button), 3, "submit_enabled")
+        submitted_from = driver.current_url
+        submitted_at = time.time()
         submit_button.click()
-        time.sleep(3)
-        
-        # 5. 等待邮箱验证
-        if wait_for_login_completion(driver):
-            save_cookies(driver)
+        wait_for(driver, url_changed(submitted_from), 5, "submit_navigation")
+        
+        # 5. 等待邮箱验证（配置了邮箱时自动打开验证链接，失败再等待人工点击）
+        opened = False
+        if mailbox:
+            with phase("mailbox_login"):
+                opened = open_verification_link(
+                    driver, mailbox, email, submitted_at, site_url=JOBSDB_URL, timeout=MAIL_TIMEOUT
+                )
+        if (opened and wait_for_login_completion(driver, 30, manual=False)) or wait_for_login_completion(driver):
+            save_session(driver, email, sessions)
             return True
         else:
             raise Exception("登录超时，请确认已点击邮箱验证链接")
@@ -280,397 +330,613 @@ def login_to_jobsdb(driver, email):
     except Exception as e:
         raise Exception(f"登录失败: {str(e)}")
 
-def scrape_application_history(driver):
+def is_valid_listing_page(driver):
+    """
+    检查当前页面不是登录页或 404 页
+    只看 URL、标题和一级标题，避免把整个 DOM 序列化成 page_source
+    """
+    if "login" in driver.current_url.lower():
+        return False
+    return not driver.execute_script(
+        "var h1 = document.querySelector('h1');"
+        "return /\\b404\\b/.test(document.title) || /\\b404\\b/.test(h1 ? h1.textContent : '');"
+    )
+
+def scrape_application_history(driver, email=None, extract_mode=EXTRACT_MODE, on_list_loaded=None,
+                               cutoff=None, on_records=None, checkpoint=None, base_url=None):
     """
     爬取投递记录
+    提供 email 时先并发探测/读取该账号缓存的申请记录页面 URL
+    提供 cutoff（IncrementalCutoff）时，加载到已知且状态未变的记录就停止，只返回其之前的记录
+    extract_mode="snapshot" 时只取一次页面快照离线解析，列表加载完成后即调用
+    on_list_loaded() 让调用方提前释放浏览器
+    提供 on_records 时每提取出一批记录就调用 on_records(批次)，用于流式输出
+    （增量模式下记录在截断前不确定，不要同时提供 cutoff 和 on_records）
+    提供 checkpoint（Checkpoint）时定期保存进度；断点里有 URL 和已提取的记录时
+    直接打开该 URL，并跳过已提取过的卡片
+    base_url 覆盖站点地址（默认 JOBSDB_URL，replay.py 回放时指向回放服务器）
     """
+    if extract_mode == "snapshot" and not offline_parser_available():
+        progress("warning", f"{MISSING_DEPENDENCY}，改为在浏览器内提取")
+        extract_mode = "browser"
     applications = []
+    snapshot_html = None
+    captured = False
+    resumed = checkpoint is not None and checkpoint.phase == LISTING
     
     try:
-        print(json.dumps({
-            "status": "scraping",
-            "message": "正在导航到申请记录页面..."
-        }))
-        sys.stdout.flush()
-        
-        # 方法1: 尝试直接访问申请历史页面的常见URL
-        possible_urls = [
-            f"{JOBSDB_URL}/profile/applications",
-            f"{JOBSDB_URL}/my-activity/applied-jobs",
-            f"{JOBSDB_URL}/applications",
-            f"{JOBSDB_URL}/profile/job-applications",
-        ]
+        progress("scraping", "正在导航到申请记录页面...")
         
-        for url in possible_urls:
-            try:
-                driver.get(url)
-                time.sleep(3)
+        with phase("url_resolution"):
+            possible_urls = [f"{base_url or JOBSDB_URL}{path}" for path in APPLICATION_PATHS]
+            navigated = False
+            # 已经在浏览器里打开过但无效的 URL，方法2 不再重复访问
+            tried = set()
+            
+            # 从断点恢复：直接打开上次成功的页面
+            if resumed and checkpoint.url:
+                driver.get(checkpoint.url)
+                wait_for_page(driver, 10, "applications_url")
+                if is_valid_listing_page(driver):
+                    navigated = True
+                    progress("info", f"从断点恢复，直接访问: {checkpoint.url}")
+            
+            # 方法1: 用 HTTP 并发探测候选 URL（按账号缓存结果），浏览器只导航一次
+            if email and not navigated:
+                try:
+                    resolved_url, resolved_from, _ = resolve_applications_url(
+                        driver, email, possible_urls
+                    )
+                except Exception as e:
+                    resolved_url, resolved_from = None, None
+                    progress("warning", f"探测申请记录 URL 失败: {str(e)}")
                 
-                # 检查页面是否有效（不是404或重定向到登录）
-                if "login" not in driver.current_url.lower() and "404" not in driver.page_source:
-                    print(json.dumps({
-                        "status": "info",
-                        "message": f"成功访问: {url}"
-                    }))
-                    sys.stdout.flush()
-                    break
-            except:
-                continue
-        
-        # 方法2: 如果直接访问失败，尝试通过导航菜单找到申请记录
-        try:
-            # 点击用户菜单
-            menu_selectors = [
-                "[data-cy='user-menu']",
-                "[data-automation='user-menu']",
-                "button[aria-label*='Account']",
-                ".user-avatar"
-            ]
+                if resolved_url:
+                    driver.get(resolved_url)
+                    wait_for_page(driver, 10, "applications_url")
+                    if is_valid_listing_page(driver):
+                        navigated = True
+                        progress("info", f"成功访问: {resolved_url}（{resolved_from}）")
+                    else:
+                        # 探测只看状态码，软 404 等页面也会返回 200
+                        tried.add(resolved_url)
+                        invalidate_applications_url(email)
+            
+            # 方法2: 探测没有得到有效页面时逐个直接访问其余候选 URL
+            if not navigated:
+                for url in [url for url in possible_urls if url not in tried]:
+                    try:
+                        driver.get(url)
+                        wait_for_page(driver, 10, "applications_url")
+                        
+                        # 检查页面是否有效（不是404或重定向到登录）
+                        if is_valid_listing_page(driver):
+                            navigated = True
+                            progress("info", f"成功访问: {url}")
+                            break
+                    except:
+                        continue
             
-            for selector in menu_selectors:
+            # 方法3: 如果直接访问失败，尝试通过导航菜单找到申请记录
+            if not navigated:
                 try:
-                    menu = driver.find_element(By.CSS_SELECTOR, selector)
-                    menu.click()
-                    time.sleep(2)
-                    
-                    # 查找"我的申请"或类似链接
-                    applications_links = driver.find_elements(By.XPATH, 
-                        "//a[contains(text(), 'Applications') or contains(text(), 'My applications') or contains(text(), '我的申请')]")
+                    # 点击用户菜单
+                    menu_selectors = [
+                        "[data-cy='user-menu']",
+                        "[data-automation='user-menu']",
+                        "button[aria-label*='Account']",
+                        ".user-avatar"
+                    ]
                     
-                    if applications_links:
-                        applications_links[0].click()
-                        time.sleep(3)
-                        break
+                    for selector in menu_selectors:
+                        try:
+                            menu = driver.find_element(By.CSS_SELECTOR, selector)
+                            menu.click()
+                            
+                            # 查找"我的申请"或类似链接
+                            applications_links = wait_for(driver, any_present([
+                                "//a[contains(text(), 'Applications') or contains(text(), 'My applications') or contains(text(), '我的申请')]"
+                            ], by=By.XPATH), 5, "user_menu")
+                            
+                            if applications_links:
+                                applications_links[1][0].click()
+                                wait_for_page(driver, 10, "applications_menu")
+                                break
+                        except:
+                            continue
                 except:
-                    continue
-        except:
-            pass
+                    pass
         
-        print(json.dumps({
-            "status": "scraping",
-            "message": "正在分析页面结构..."
-        }))
-        sys.stdout.flush()
-        
-        # 等待页面加载 - 尝试多个可能的选择器
-        page_loaded = False
-        possible_container_selectors = [
-            "[data-automation='job-list']",
-            "[data-cy='job-list']",
-            ".job-card",
-            ".application-item",
-            "[class*='ApplicationCard']",
-            "[class*='JobCard']",
-            "[class*='application-card']",
-            "article",
-            "[role='article']"
-        ]
+        snapshot(driver, "url_resolution")
+        progress("scraping", "正在分析页面结构...")
         
-        for selector in possible_container_selectors:
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                )
-                page_loaded = True
-                print(json.dumps({
-                    "status": "info",
-                    "message": f"找到内容容器: {selector}"
-                }))
-                sys.stdout.flush()
-                break
-            except:
-                continue
+        # 等待页面加载 - 所有候选选择器按历史命中率排序后合并为一次等待
+        with phase("list_loading"):
+            container_selector = probe_any(
+                driver, "applications", "container", CONTAINER_SELECTORS, 15
+            )
+        page_loaded = container_selector is not None
+        if page_loaded:
+            progress("info", f"找到内容容器: {container_selector}")
+            if checkpoint is not None:
+                checkpoint.update(phase=LISTING, url=driver.current_url, force=True)
         
         if not page_loaded:
-            # 保存页面HTML用于调试
-            with open("jobsdb_page_debug.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
+            # 缓存的 URL 可能已经失效，下次重新探测
+            if email:
+                invalidate_applications_url(email)
             
-            raise Exception("无法找到申请记录容器，页面HTML已保存到 jobsdb_page_debug.html 供调试")
+            snapshot(driver, "container_missing")
+            # 保存页面用于调试（压缩和写盘在后台进行）
+            path = capture_failure(driver, "container_missing", email=email)
+            captured = True
+            raise Exception("无法找到申请记录容器" + (f"，页面快照已保存到 {path} 供调试" if path else ""))
         
         # 滚动加载所有内容
-        print(json.dumps({
-            "status": "scraping",
-            "message": "正在加载所有申请记录..."
-        }))
-        sys.stdout.flush()
-        
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scroll_attempts = 0
-        max_scrolls = 10
-        
-        while scroll_attempts < max_scrolls:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            new_height = driver.execute_script("return document.body.scrollHeight")
+        progress("scraping", "正在加载所有申请记录...")
+        
+        loader = StreamingListLoader(driver, stats=get_stats())
+        
+        if extract_mode == "snapshot":
+            # 先把列表加载完整（增量模式下边加载边提取，用于判断何时停止）
+            scanner = cutoff.scanner() if cutoff is not None else None
+            for batch in loader.batches(extract=scanner is not None):
+                if scanner is not None and scanner.feed(batch) is not None:
+                    break
             
-            if new_height == last_height:
-                break
+            # 取一次快照后浏览器就不再需要，解析在本地完成
+            with phase("extraction"):
+                snapshot_html = driver.page_source
+                page_url = driver.current_url
+                snapshot(driver, LIST_SNAPSHOT, snapshot_html)
+                if on_list_loaded:
+                    on_list_loaded()
+                card_selector, card_count, applications = parse_html(snapshot_html, page_url)
+            if on_records:
+                on_records(applications)
+        else:
+            scanner = cutoff.scanner() if cutoff is not None else None
+            if resumed and checkpoint.records:
+                # 断点里已有的记录直接沿用，页面上对应的卡片不再提取
+                applications.extend(checkpoint.records)
+                if on_records:
+                    on_records(checkpoint.records)
+                if scanner is not None:
+                    scanner.feed(checkpoint.records)
+                skipped = loader.skip_known(checkpoint.known_links, checkpoint.position)
+                progress("info", f"从断点恢复 {len(checkpoint.records)} 条记录，跳过 {skipped} 个已提取的卡片")
             
-            last_height = new_height
-            scroll_attempts += 1
-        
-        # 查找所有职位卡片
-        job_card_selectors = [
-            "[data-automation='job-card']",
-            "[data-cy='job-card']",
-            ".job-card",
-            ".application-item",
-            "[class*='ApplicationCard']",
-            "[class*='JobCard']",
-            "article[class*='application']",
-            "div[class*='application-card']"
-        ]
+            # 每批新卡片出现后立即提取（一次 execute_script），加载与解析交替进行
+            for batch in loader.batches():
+                applications.extend(batch)
+                if checkpoint is not None:
+                    checkpoint.add_records(batch, loader.card_count)
+                if on_records:
+                    on_records(batch)
+                progress("info", f"已解析 {len(applications)} 条记录（已加载 {loader.card_count} 个卡片）...")
+                
+                # 增量模式：已经加载到上次爬过的记录，不必继续加载
+                if scanner is not None and scanner.feed(batch) is not None:
+                    break
+            card_selector, card_count = loader.card_selector, loader.card_count
+            snapshot(driver, LIST_SNAPSHOT)
         
-        job_cards = []
-        for selector in job_card_selectors:
-            job_cards = driver.find_elements(By.CSS_SELECTOR, selector)
-            if job_cards:
-                print(json.dumps({
-                    "status": "info",
-                    "message": f"找到 {len(job_cards)} 个职位卡片（使用选择器: {selector}）"
-                }))
-                sys.stdout.flush()
-                break
-        
-        if not job_cards:
+        if not card_count:
             raise Exception("找不到任何职位卡片，可能没有申请记录或页面结构已变更")
         
-        # 提取每个职位的信息
-        for idx, card in enumerate(job_cards):
-            try:
-                # 职位名称 - 尝试多个选择器
-                title = None
-                title_selectors = [
-                    "h3", "h2", "h4",
-                    ".job-title",
-                    "[data-automation='job-title']",
-                    "[class*='JobTitle']",
-                    "[class*='title']",
-                    "a[class*='title']"
-                ]
-                
-                for selector in title_selectors:
-                    try:
-                        title_elem = card.find_element(By.CSS_SELECTOR, selector)
-                        title = title_elem.text.strip()
-                        if title:
-                            break
-                    except:
-                        continue
-                
-                if not title:
-                    continue  # 跳过无法获取标题的卡片
-                
-                # 公司名称
-                company = "未知公司"
-                company_selectors = [
-                    ".company-name",
-                    "[data-automation='company-name']",
-                    "[class*='CompanyName']",
-                    "[class*='company']",
-                    "span[class*='company']"
-                ]
-                
-                for selector in company_selectors:
-                    try:
-                        company_elem = card.find_element(By.CSS_SELECTOR, selector)
-                        company = company_elem.text.strip()
-                        if company:
-                            break
-                    except:
-                        continue
-                
-                # 投递日期
-                date = "未知"
-                date_selectors = [
-                    "time",
-                    ".date",
-                    ".apply-date",
-                    "[class*='date']",
-                    "span[class*='date']"
-                ]
-                
-                for selector in date_selectors:
-                    try:
-                        date_elem = card.find_element(By.CSS_SELECTOR, selector)
-                        date = date_elem.text.strip()
-                        if date:
-                            break
-                    except:
-                        continue
-                
-                # 状态
-                status = "已投递"
-                status_selectors = [
-                    ".status",
-                    "[data-automation='status']",
-                    "[class*='Status']",
-                    "span[class*='status']",
-                    ".badge"
-                ]
-                
-                for selector in status_selectors:
-                    try:
-                        status_elem = card.find_element(By.CSS_SELECTOR, selector)
-                        status = status_elem.text.strip()
-                        if status:
-                            break
-                    except:
-                        continue
-                
-                # 职位链接
-                link = ""
-                try:
-                    link_elem = card.find_element(By.CSS_SELECTOR, "a")
-                    link = link_elem.get_attribute("href")
-                except:
-                    pass
-                
-                applications.append({
-                    "title": title,
-                    "company": company,
-                    "date": date,
-                    "status": status,
-                    "link": link
-                })
-                
-                if (idx + 1) % 10 == 0:
-                    print(json.dumps({
-                        "status": "info",
-                        "message": f"已解析 {idx + 1}/{len(job_cards)} 条记录..."
-                    }))
-                    sys.stdout.flush()
-                
-            except Exception as e:
-                # 跳过无法解析的卡片
-                continue
+        progress("info", f"找到 {card_count} 个职位卡片（使用选择器: {card_selector}）")
         
         if not applications:
-            # 保存页面用于调试
-            with open("jobsdb_page_debug.html", "w", encoding="utf-8") as f:
-                f.write(driver.page_source)
-            
-            raise Exception("未能解析任何投递记录，页面HTML已保存到 jobsdb_page_debug.html")
+            snapshot(driver, "no_records", snapshot_html)
+            # snapshot 模式下浏览器可能已经释放，直接使用解析过的快照
+            path = capture_failure(
+                None if snapshot_html is not None else driver, "no_records", snapshot_html, email=email
+            )
+            captured = True
+            raise Exception("未能解析任何投递记录" + (f"，页面快照已保存到 {path}" if path else ""))
         
-        print(json.dumps({
-            "status": "success",
-            "message": f"成功爬取 {len(applications)} 条申请记录"
-        }))
-        sys.stdout.flush()
+        if cutoff is not None:
+            applications = apply_cutoff(applications, cutoff)
+        
+        progress("success", f"成功爬取 {len(applications)} 条申请记录")
         
         return applications
         
     except TimeoutException:
+        capture_failure(driver, "timeout", snapshot_html, email=email, error="页面加载超时")
         raise Exception("页面加载超时，请检查网络连接")
     except Exception as e:
+        if not captured:
+            capture_failure(driver, "error", snapshot_html, email=email, error=str(e))
         raise Exception(f"爬取失败: {str(e)}")
 
 def save_to_excel(data, filename=None):
-    """将数据保存为 Excel 文件"""
-    if not os.path.exists(EXCEL_OUTPUT_DIR):
-        os.makedirs(EXCEL_OUTPUT_DIR)
+    """将数据保存为 Excel 文件（流式写出，data 可以是列表或迭代器）"""
+    return export_records(data, "xlsx", filename, output_dir=EXCEL_OUTPUT_DIR)
+
+def apply_cutoff(applications, cutoff):
+    """增量模式下截掉已爬过的部分"""
+    position = cutoff.find_cutoff(applications)
+    if position is None:
+        return applications
+    progress("info", f"第 {position + 1} 条起为已保存且状态未变的记录，停止解析")
+    return applications[:position]
+
+def scrape_with_http(driver, cutoff=None):
+    """
+    HTTP 快速路径：复用浏览器 cookies 直接请求申请记录
+    成功返回记录列表，不可用时返回 None（调用方回退到浏览器）
+    """
+    progress("scraping", "正在通过 HTTP 直接获取申请记录...")
     
-    if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"jobsdb_applications_{timestamp}.xlsx"
+    def make_stop_when():
+        # 每个候选 URL 一个扫描器，每页只检查新增的记录
+        scanner = cutoff.scanner()
+        return lambda page_records: scanner.feed(page_records) is not None
     
-    filepath = os.path.join(EXCEL_OUTPUT_DIR, filename)
+    try:
+        url, applications, source = fetch_applications_via_http(
+            driver, [f"{JOBSDB_URL}{path}" for path in APPLICATION_PATHS],
+            make_stop_when=make_stop_when if cutoff is not None else None
+        )
+    except FastPathUnavailable as e:
+        progress("info", f"HTTP 快速路径不可用，回退到浏览器: {str(e)}")
+        return None
+    except Exception as e:
+        # 网络错误、返回内容无法解析等同样回退，不让快速路径中断整次爬取
+        progress("warning", f"HTTP 快速路径出错，回退到浏览器: {type(e).__name__}: {str(e)}")
+        return None
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "投递记录"
+    if cutoff is not None:
+        applications = apply_cutoff(applications, cutoff)
     
-    # 设置表头
-    headers = ["职位名称", "公司名称", "投递日期", "状态", "职位链接"]
-    ws.append(headers)
+    progress("success", f"通过 HTTP 获取 {len(applications)} 条申请记录（{source}: {url}）")
+    return applications
+
+def scrape_account(driver, email, extract_mode=EXTRACT_MODE, release_driver=None,
+                   http_fastpath=HTTP_FASTPATH, incremental=INCREMENTAL, metrics_file=METRICS_FILE,
+                   export_format=DEFAULT_FORMAT, sessions=None, output_dir=EXCEL_OUTPUT_DIR,
+                   enrich=ENRICH, resume=RESUME, mailbox=MAILBOX, upload_url=UPLOAD_URL,
+                   skip_unchanged=SKIP_UNCHANGED):
+    """
+    使用已初始化的浏览器完成一次完整的爬取（登录 -> 爬取 -> 导出）
+    不负责关闭浏览器，供一次性 CLI 和常驻 worker 共用；
+    snapshot 模式下列表加载完成后会调用 release_driver() 提前释放浏览器；
+    incremental 模式下只返回相对本地记录库新增和状态变化的记录
+    记录以 record 事件流式写到 stdout；返回值仍包含完整的 data，
+    写出最终结果时用 events.emit_summary() 去掉 data；
+    各阶段耗时和 WebDriver 命令数放在 timings 中，设置 metrics_file 时同时更新指标文件；
+    export_format 选择导出格式（xlsx / csv / jsonl / parquet）；
+    sessions 为会话存储（默认按账号保存在 sessions/ 下），导出文件写到 output_dir；
+    enrich 开启时并发请求职位详情页，补充工作地点、薪资、工作类型和描述；
+    爬取进度定期写入断点，resume 开启时从同一账号上次未完成的断点继续，成功后删除断点；
+    mailbox 为需要重新登录时读取验证邮件的邮箱；
+    登录后的各步骤组成流水线（pipeline.py）：提取出的记录边规整、补充详情、写导出文件，
+    设置 upload_url 时同时上传导出文件，各阶段耗时和重叠节省的时间放在 pipeline 中；
+    skip_unchanged 开启时导出文件在内存中生成，结果与上次相同则不写文件也不上传（unchanged 为 True），
+    有变化且设置了 upload_url 时直接从内存上传，不写本地文件
+    """
+    progress("init", f"开始爬取流程，使用邮箱: {email}")
+    reset_wait_log()
+    reset_network_stats()
+    # 调用方（CLI / worker）已经开始计时的话沿用，这样浏览器启动也计入同一次运行
+    run = current_run()
+    if run is None or run.finished is not None:
+        start_run(email)
     
-    # 美化表头
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
+    # 登录
+    sessions = sessions or SessionStore()
+    with phase("login"):
+        login_to_jobsdb(driver, email, sessions, mailbox)
     
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+    store = ApplicationStore() if incremental else None
+    cutoff = IncrementalCutoff(store, email) if store else None
+    # 详情页用 HTTP 会话请求，必须在浏览器可能被提前释放之前复制 cookies
+    if enrich and not offline_parser_available():
+        # 详情页同样用 lxml 解析
+        progress("warning", f"{MISSING_DEPENDENCY}，跳过职位详情补充")
+        enrich = False
+    enricher = DetailEnricher(session_from_driver(driver, ENRICH_WORKERS)) if enrich else None
+    # 增量模式要等写入记录库后才知道哪些记录需要输出，不能边提取边送入流水线
+    live = store is None
+    records = RecordStream()
     
-    # 添加数据
-    for item in data:
-        ws.append([
-            item.get("title", ""),
-            item.get("company", ""),
-            item.get("date", ""),
-            item.get("status", ""),
-            item.get("link", "")
-        ])
+    # 断点只能在选项相同的运行之间复用（增量模式截断过的列表、没有补充字段的记录都不通用）
+    options = {"incremental": bool(incremental), "enrich": bool(enrich)}
+    checkpoint = Checkpoint.load(email, options) if resume else None
+    if checkpoint is not None:
+        progress("info", f"找到未完成的断点（{checkpoint.phase}，已有 {len(checkpoint.records)} 条记录），从断点继续")
+    else:
+        checkpoint = Checkpoint(email, options)
+    processed = checkpoint.phase == PROCESSED
     
-    # 调整列宽
-    ws.column_dimensions['A'].width = 40
-    ws.column_dimensions['B'].width = 30
-    ws.column_dimensions['C'].width = 15
-    ws.column_dimensions['D'].width = 15
-    ws.column_dimensions['E'].width = 50
+    try:
+        # 规整、详情补充、导出和上传在后台线程里与提取同时进行，处理完的记录在本线程流式写出
+        pipeline = Pipeline(
+            export_format, output_dir, columns=ENRICHED_COLUMNS if enricher is not None else COLUMNS,
+            enricher=enricher, upload_url=upload_url, on_output=records.add,
+            index_key=export_index_key(email, export_format) if skip_unchanged else None
+        )
+        with pipeline:
+            # 爬取数据
+            applications = None
+            if checkpoint.phase in (EXTRACTED, PROCESSED):
+                # 列表已经完整提取过，不再打开页面
+                applications = checkpoint.records
+            elif http_fastpath:
+                with phase("http_fastpath"):
+                    applications = scrape_with_http(driver, cutoff=cutoff)
+            if applications is None:
+                applications = scrape_application_history(
+                    driver, email=email, extract_mode=extract_mode, on_list_loaded=release_driver,
+                    cutoff=cutoff, on_records=pipeline.put if live else None, checkpoint=checkpoint
+                )
+            elif live:
+                pipeline.put(applications)
+            
+            if not processed:
+                checkpoint.update(phase=EXTRACTED, records=applications, force=True)
+                if store is not None:
+                    # 只保留新增和状态变化的记录（增量模式下也只补充这些记录的详情）
+                    with phase("incremental_store"):
+                        changes = store.upsert(email, applications)
+                    applications = [dict(record, change=change) for change, record in changes]
+                # 记录库已经更新，之后失败也不能再重复 upsert（否则变化会丢失）
+                checkpoint.update(phase=PROCESSED, records=applications, force=True)
+            if not live:
+                pipeline.put(applications)
+            
+            # 等待流水线处理完剩余的记录
+            with phase("export"):
+                applications = pipeline.close()
+        
+        summary = {}
+        if store is not None:
+            summary = {
+                "inserted": sum(1 for record in applications if record.get("change") == INSERT),
+                "updated": sum(1 for record in applications if record.get("change") == UPDATE),
+                "total_known": store.count(email),
+            }
+    except Exception:
+        # 会话可能在"最近已验证"期间失效了，下次运行重新验证而不是直接信任
+        sessions.clear_verified(email)
+        # 已提取的部分留在断点里，下次运行从这里继续
+        checkpoint.save()
+        if checkpoint.phase is not None:
+            progress("warning", f"爬取中断，已保存断点（{len(checkpoint.records)} 条记录），重新运行将从断点继续")
+        raise
+    finally:
+        if store is not None:
+            store.close()
+        if enricher is not None:
+            enricher.close()
     
-    wb.save(filepath)
+    records.flush()
+    sessions.mark_verified(email)
+    # snapshot 模式下浏览器已经释放，日志在释放前已读取
+    drain_network_log(driver)
+    export_path = pipeline.export_path
+    checkpoint.clear()
     
-    # 返回绝对路径
-    return os.path.abspath(filepath)
+    result = {
+        "success": True,
+        "count": len(applications),
+        "data": applications,
+        # 前端按 excel_path 显示 Excel 文件位置，其他格式只在 export_path 中给出
+        "excel_path": export_path if export_format == "xlsx" else None,
+        "export_path": export_path,
+        "export_format": export_format,
+        "message": f"成功爬取 {len(applications)} 条记录",
+        "waits": wait_report(),
+        "timings": finish_and_export(True, len(applications), metrics_file),
+        # 各阶段忙碌时间、背压等待时间，以及与串行执行相比节省的时间
+        "pipeline": pipeline.report(),
+    }
+    if upload_url:
+        # 上传成功为 blob 信息（url 等），失败为 {"error": ...}
+        result["upload"] = pipeline.upload
+    network = network_report()
+    if network is not None:
+        # 精简模式下的请求/字节统计（拦截数、缓存命中等）
+        result["network"] = network
+    if enricher is not None:
+        # 每条记录的详情补充结果：新请求 / 304 复用缓存 / 缓存未过期 / 失败
+        result["enrichment"] = enricher.report()
+    if incremental:
+        result.update(summary, incremental=True)
+        result["message"] = f"新增 {summary['inserted']} 条，状态更新 {summary['updated']} 条"
+    if skip_unchanged:
+        # 与上次导出的结果相同：没有写文件也没有上传，export_path / upload 为上次的结果
+        result["unchanged"] = pipeline.unchanged
+        if pipeline.unchanged:
+            result["message"] += "（与上次结果相同，未重新导出）"
+    return result
+
+def parse_args(argv=None):
+    """解析命令行参数（第一个位置参数仍然是邮箱，保持与 route.ts 兼容）"""
+    parser = argparse.ArgumentParser(description="JobsDB 投递记录爬虫")
+    parser.add_argument("email", nargs="?", help="JobsDB 登录邮箱")
+    parser.add_argument(
+        "--extract-mode",
+        choices=EXTRACT_MODES,
+        default=EXTRACT_MODE,
+        help="字段提取方式：browser 在页面内提取，snapshot 取快照后离线解析"
+    )
+    parser.add_argument(
+        "--http-fastpath",
+        action="store_true",
+        default=HTTP_FASTPATH,
+        help="登录后先尝试用 HTTP 直接获取申请记录"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=INCREMENTAL,
+        help="增量爬取，只返回新增和状态变化的记录"
+    )
+    parser.add_argument(
+        "--format",
+        dest="export_format",
+        choices=FORMATS,
+        default=DEFAULT_FORMAT,
+        help="导出格式（parquet 需要安装 pyarrow）"
+    )
+    parser.add_argument(
+        "--enrich",
+        action="store_true",
+        default=ENRICH,
+        help="并发请求职位详情页，补充工作地点、薪资、工作类型和描述"
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        default=not RESUME,
+        help="忽略上次未完成的断点，从头开始爬取"
+    )
+    parser.add_argument(
+        "--upload-url",
+        default=UPLOAD_URL,
+        help="导出的同时把文件上传到该地址（app/api/blob/upload 接口）"
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        default=SKIP_UNCHANGED,
+        help="结果与上次相同时不写导出文件也不上传；有变化时直接从内存上传"
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        default=LEAN_MODE,
+        help="精简模式：拦截图片、字体、广告和统计请求，页面 DOM 就绪即返回"
+    )
+    parser.add_argument(
+        "--mailbox",
+        default=MAILBOX,
+        help="自动读取验证邮件的邮箱（imaps://user@host/INBOX 或 maildir 目录）"
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        default=RECORD_DIR,
+        help="录制本次运行（DOM 快照、响应和结果）到该目录，供 replay.py 回放"
+    )
+    parser.add_argument(
+        "--job-timeout",
+        type=int,
+        default=JOB_TIMEOUT,
+        help="整次爬取的硬超时（秒），超时后强制结束浏览器；0 表示不限制"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        default=METRICS_FILE,
+        help="每次运行结束后写出 Prometheus 文本格式的指标文件"
+    )
+    parser.add_argument(
+        "--worker",
+        default=os.environ.get("JOBSDB_WORKER_ADDR"),
+        help="常驻 worker 地址 (host:port)，设置后本进程只作为客户端转发任务"
+    )
+    return parser.parse_args(argv)
 
-def main_scrape_logic():
+def close_driver(driver):
+    """关闭浏览器；quit() 失败或卡住时强制结束残留进程，并发出警告"""
+    outcome = shutdown_driver(driver)
+    if outcome["error"]:
+        progress("warning", f"关闭浏览器失败: {outcome['error']}，已结束 {outcome['killed']} 个残留进程")
+    return outcome
+
+def main_scrape_logic(args=None):
     """主爬虫逻辑"""
     driver = None
+    governor = None
     
     try:
+        if args is None:
+            args = parse_args()
+        
         # 从命令行参数获取邮箱
-        email = sys.argv[1] if len(sys.argv) > 1 else None
+        email = args.email
         
         if not email:
             raise Exception("未提供邮箱地址")
         
-        print(json.dumps({
-            "status": "init",
-            "message": f"开始爬取流程，使用邮箱: {email}"
-        }))
-        sys.stdout.flush()
+        # 配置了常驻 worker 时，直接把任务交给它（复用预热的浏览器）
+        if args.worker:
+            from scraper_worker import submit_job
+            # 浏览器配置、录制和指标文件由 worker 进程决定，不能按任务指定
+            unsupported = [flag for flag, changed in (
+                ("--lean", args.lean != LEAN_MODE),
+                ("--record", bool(args.record)),
+                ("--metrics-file", args.metrics_file != METRICS_FILE),
+            ) if changed]
+            if unsupported:
+                raise Exception(f"--worker 模式不支持 {', '.join(unsupported)}，请在启动 worker 时配置")
+            return submit_job(
+                args.worker, email, export_format=args.export_format, extract_mode=args.extract_mode,
+                http_fastpath=args.http_fastpath, incremental=args.incremental, enrich=args.enrich,
+                resume=not args.fresh, mailbox=args.mailbox, upload_url=args.upload_url,
+                skip_unchanged=args.skip_unchanged, job_timeout=args.job_timeout
+            )
         
         # 初始化浏览器
-        driver = setup_driver()
-        
-        # 登录
-        login_to_jobsdb(driver, email)
-        
-        # 爬取数据
-        applications = scrape_application_history(driver)
-        
-        # 保存到 Excel
-        excel_path = save_to_excel(applications)
-        
-        return {
-            "success": True,
-            "count": len(applications),
-            "data": applications,
-            "excel_path": excel_path,
-            "message": f"成功爬取 {len(applications)} 条记录"
-        }
+        start_run(email)
+        if args.record:
+            start_recording(recording_path(args.record, email))
+        # 之前的运行崩溃时可能留下 chromedriver / Chrome 进程
+        reaped = reap_orphans()
+        if reaped:
+            progress("info", f"已清理 {reaped} 个残留的浏览器进程")
+        with phase("driver_startup"):
+            driver = setup_driver(lean=args.lean, record=bool(args.record))
+        # 浏览器进程树的内存、CPU 和导航次数随运行报告输出
+        governor = SessionGovernor(driver).start()
+        attach_resources(governor.stats)
+        
+        def release_driver():
+            nonlocal driver
+            drain_network_log(driver)
+            governor.sample()
+            close_driver(driver)
+            driver = None
+        
+        with JobWatchdog(driver, args.job_timeout):
+            result = scrape_account(
+                driver, email, extract_mode=args.extract_mode, release_driver=release_driver,
+                http_fastpath=args.http_fastpath, incremental=args.incremental,
+                metrics_file=args.metrics_file, export_format=args.export_format, enrich=args.enrich,
+                resume=not args.fresh, mailbox=args.mailbox, upload_url=args.upload_url,
+                skip_unchanged=args.skip_unchanged
+            )
+        if args.record:
+            result["recording"] = stop_recording(
+                driver, result, extract_mode=args.extract_mode, incremental=args.incremental
+            )
+            progress("info", f"录制已保存: {result['recording']}")
+        return result
         
     except Exception as e:
+        # 失败的运行同样记录耗时，便于定位慢在哪一步
+        finish_and_export(False, metrics_file=args.metrics_file if args else METRICS_FILE)
+        if args is not None and args.record:
+            stop_recording(driver, error=str(e), extract_mode=args.extract_mode, incremental=args.incremental)
         raise Exception(f"爬取过程出错: {str(e)}")
     
     finally:
+        if governor is not None:
+            governor.stop()
         if driver:
-            try:
-                driver.quit()
-            except:
-                pass
+            close_driver(driver)
 
 if __name__ == "__main__":
     try:
         result = main_scrape_logic()
-        print(json.dumps(result, ensure_ascii=False))
-        sys.stdout.flush()
+        # 记录已经逐条写出，最终结果只输出汇总
+        emit_summary(result)
         
     except Exception as e:
         error_msg = str(e)
+        emit_error(error_msg, timings=last_report())
         print(json.dumps({
             "error": error_msg,
             "status": "failed"
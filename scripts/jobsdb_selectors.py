@@ -0,0 +1,121 @@
+"""
+JobsDB 申请记录页面的选择器
+JobsDB 的页面结构经常变化，这里每一项都是按优先级排列的候选列表，
+浏览器内提取和离线 HTML 解析共用同一份定义。
+"""
+
+# 申请记录列表容器（用于判断页面是否加载完成）
+CONTAINER_SELECTORS = [
+    "[data-automation='job-list']",
+    "[data-cy='job-list']",
+    ".job-card",
+    ".application-item",
+    "[class*='ApplicationCard']",
+    "[class*='JobCard']",
+    "[class*='application-card']",
+    "article",
+    "[role='article']"
+]
+
+# 单个职位卡片
+CARD_SELECTORS = [
+    "[data-automation='job-card']",
+    "[data-cy='job-card']",
+    ".job-card",
+    ".application-item",
+    "[class*='ApplicationCard']",
+    "[class*='JobCard']",
+    "article[class*='application']",
+    "div[class*='application-card']"
+]
+
+# 职位名称
+TITLE_SELECTORS = [
+    "h3", "h2", "h4",
+    ".job-title",
+    "[data-automation='job-title']",
+    "[class*='JobTitle']",
+    "[class*='title']",
+    "a[class*='title']"
+]
+
+# 公司名称
+COMPANY_SELECTORS = [
+    ".company-name",
+    "[data-automation='company-name']",
+    "[class*='CompanyName']",
+    "[class*='company']",
+    "span[class*='company']"
+]
+
+# 投递日期
+DATE_SELECTORS = [
+    "time",
+    ".date",
+    ".apply-date",
+    "[class*='date']",
+    "span[class*='date']"
+]
+
+# 状态
+STATUS_SELECTORS = [
+    ".status",
+    "[data-automation='status']",
+    "[class*='Status']",
+    "span[class*='status']",
+    ".badge"
+]
+
+# 职位链接
+LINK_SELECTOR = "a"
+
+# 卡片字段：(字段名, 候选选择器, 全部未命中时的默认值)
+# 默认值为 None 的字段是必填项，取不到时整张卡片会被跳过
+CARD_FIELDS = [
+    ("title", TITLE_SELECTORS, None),
+    ("company", COMPANY_SELECTORS, "未知公司"),
+    ("date", DATE_SELECTORS, "未知"),
+    ("status", STATUS_SELECTORS, "已投递"),
+]
+
+# 职位详情页字段：(字段名, 候选选择器, 默认值)
+# 页面内嵌的 JSON-LD（JobPosting）优先，取不到时才用这些选择器
+DETAIL_FIELDS = [
+    ("location", [
+        "[data-automation='job-detail-location']",
+        "[data-automation='jobLocation']",
+        "[class*='JobLocation']",
+        "[class*='location']"
+    ], ""),
+    ("salary", [
+        "[data-automation='job-detail-salary']",
+        "[data-automation='jobSalary']",
+        "[class*='Salary']",
+        "[class*='salary']"
+    ], ""),
+    ("work_type", [
+        "[data-automation='job-detail-work-type']",
+        "[data-automation='jobWorkType']",
+        "[class*='WorkType']",
+        "[class*='work-type']"
+    ], ""),
+    ("description", [
+        "[data-automation='jobAdDetails']",
+        "[data-automation='jobDescription']",
+        "[class*='JobDescription']",
+        "[class*='job-description']"
+    ], ""),
+]
+
+# 列表仍在加载中的指示器（无限滚动时出现的加载动画等）
+LOADING_SELECTORS = [
+    "[aria-busy='true']",
+    "[data-automation*='loading']",
+    "[class*='Spinner']",
+    "[class*='spinner']",
+    "[class*='Loading']",
+    "[class*='loading']"
+]
+
+# "加载更多" 按钮的文字（正则，不区分大小写）
+LOAD_MORE_PATTERN = r"load more|show more|see more|more applications|加载更多|查看更多|顯示更多|載入更多"
@@ -0,0 +1,409 @@
+"""
+本地 JobsDB 替身服务器
+
+模拟 hk.jobsdb.com 中爬虫会访问的几个页面，用于在没有真实账号和网络的情况下
+测试 HTTP 快速路径、浏览器流程和性能：
+- /                       首页（未登录时有 "Sign in" 链接，已登录时有用户菜单）
+- /login                  登录页（邮箱输入框 + 提交按钮）
+- /login/verify           模拟邮件里的验证链接，写入会话 cookie 后跳回首页
+- /login/submit           配置了 mail_dir 时登录表单提交到这里：把带一次性令牌的验证邮件
+                          投递到该 maildir，页面提示查收邮件（/login/verify 此时要求有效令牌）
+- /profile/applications   申请记录列表（需要登录），支持 ?page=N 分页；
+                          页面内嵌 __NEXT_DATA__ JSON，并带有 rel="next" 链接。
+                          list_mode 为 scroll / load_more 时没有 rel="next"，
+                          改为滚动到底部或点击 "Load more" 按钮后由页面脚本追加下一批卡片
+- /profile/applications/more?offset=N&limit=M
+                          无限滚动使用的卡片片段（需要登录）
+- /job/<id>               职位详情页（不需要登录），内嵌 JobPosting JSON-LD，
+                          带 ETag/Last-Modified，条件请求命中时返回 304
+- POST /api/blob/upload?filename=NAME
+                          模拟前端的 Blob 上传接口（支持 chunked 请求体），文件保存在内存
+                          （config.uploads），返回与 Vercel Blob 相同结构的 JSON；
+                          设置 upload_token 时没有匹配的 Authorization: Bearer 头的请求
+                          像前端中间件一样被重定向到 /signin
+- /signin                 前端的登录页（200 的 HTML，跟随重定向的上传请求会拿到它）
+- /blob/<filename>        读取上传的文件
+- 其他路径返回 404
+
+用法:
+    python jobsdb_standin.py --port 8900 --count 120 --page-size 30
+    python jobsdb_standin.py --count 1000 --page-size 50 --list-mode scroll --batch-delay 0.2
+    python jobsdb_standin.py --mail-dir /tmp/standin-mail   # 配合 --mailbox /tmp/standin-mail 测试自动登录
+    JOBSDB_BASE_URL=http://127.0.0.1:8900 python jobsdb_scraper.py you@example.com
+    JOBSDB_UPLOAD_URL=http://127.0.0.1:8900/api/blob/upload python jobsdb_scraper.py you@example.com
+"""
+import json
+import time
+import uuid
+import argparse
+import mailbox
+import threading
+from email.message import EmailMessage
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, urlencode, quote, unquote
+
+from synthetic_pages import VARIANTS, render_cards, synthetic_record, render_detail_page
+
+SESSION_COOKIE = "JobseekerSessionId"
+SESSION_VALUE = "standin-session"
+APPLICATIONS_PATH = "/profile/applications"
+JOB_PATH_PREFIX = "/job/"
+MORE_PATH = APPLICATIONS_PATH + "/more"
+UPLOAD_PATH = "/api/blob/upload"
+BLOB_PATH_PREFIX = "/blob/"
+LIST_MODES = ("pages", "scroll", "load_more")
+# 详情页的固定修改时间（内容由序号决定，只有 detail_version 变化时才算修改）
+DETAIL_LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class StandinConfig:
+    """替身服务器的行为配置"""
+
+    def __init__(self, count=50, page_size=20, variant="automation", payload=True,
+                 detail_json_ld=True, detail_version=1, list_mode="pages", batch_delay=0.0,
+                 mail_dir=None, upload_token=None):
+        self.count = count
+        self.page_size = page_size
+        self.variant = variant
+        # pages: rel="next" 分页；scroll: 无限滚动；load_more: "Load more" 按钮
+        # 后两种模式每批追加 page_size 张卡片，每批的响应延迟 batch_delay 秒
+        self.list_mode = list_mode
+        self.batch_delay = batch_delay
+        # 设置后登录走邮件验证：验证邮件投递到这个 maildir
+        self.mail_dir = mail_dir
+        self.tokens = set()
+        # 上传接口收到的文件：文件名 -> 内容；upload_count 为收到的上传请求数
+        self.uploads = {}
+        self.upload_count = 0
+        self.upload_token = upload_token
+        # False 时不输出内嵌 JSON，只能解析 HTML 卡片
+        self.payload = payload
+        # False 时详情页没有 JSON-LD，只能用选择器解析
+        self.detail_json_ld = detail_json_ld
+        # 改变该值相当于所有职位详情都被修改过（ETag 随之变化）
+        self.detail_version = detail_version
+
+
+def _page(title, body, head=""):
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{title}</title>{head}</head><body>{body}</body></html>"
+    )
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "JobsDBStandin/1.0"
+
+    def log_message(self, format, *args):
+        # 默认的访问日志会刷屏，替身服务器保持安静
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def _authenticated(self):
+        cookies = self.headers.get("Cookie", "")
+        return f"{SESSION_COOKIE}={SESSION_VALUE}" in cookies
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _redirect(self, location, headers=None):
+        self.send_response(302)
+        self.send_header("Location", location)
+        self.send_header("Content-Length", "0")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        routes = {
+            "/": self._home,
+            "/login": self._login,
+            "/login/verify": self._verify,
+            "/login/submit": self._submit,
+            APPLICATIONS_PATH: self._applications,
+            MORE_PATH: self._more,
+            "/signin": self._signin,
+        }
+        handler = routes.get(url.path.rstrip("/") or "/")
+        if handler is None and url.path.startswith(JOB_PATH_PREFIX):
+            handler = self._job_detail
+        if handler is None and url.path.startswith(BLOB_PATH_PREFIX):
+            handler = self._blob
+        if handler is None:
+            return self._send(404, _page("404", "<h1>404 Not Found</h1>"))
+        handler(query)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != UPLOAD_PATH:
+            return self._send(404, _page("404", "<h1>404 Not Found</h1>"))
+        self._upload(parse_qs(url.query))
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # 跳过 trailer 直到空行
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+
+    def _upload(self, query):
+        # 与 app/api/blob/upload/route.ts 的行为一致
+        filename = query.get("filename", [""])[0]
+        body = self._read_body()
+        token = self.config.upload_token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            return self._send(302, "", headers={"Location": "/signin?callbackUrl=%2Fapi%2Fblob%2Fupload"})
+        if not filename:
+            return self._send(400, json.dumps({"error": "Filename is required"}), "application/json")
+        self.config.uploads[filename] = body
+        self.config.upload_count += 1
+        host = self.headers.get("Host") or "127.0.0.1"
+        url = f"http://{host}{BLOB_PATH_PREFIX}{quote(filename)}"
+        self._send(200, json.dumps({
+            "url": url,
+            "downloadUrl": f"{url}?download=1",
+            "pathname": filename,
+            "contentType": "application/octet-stream",
+            "contentDisposition": f'attachment; filename="{filename}"',
+        }), "application/json")
+
+    def _signin(self, query):
+        self._send(200, _page("Sign in", "<h1>Sign in to continue</h1>"))
+
+    def _blob(self, query):
+        filename = unquote(urlparse(self.path).path[len(BLOB_PATH_PREFIX):])
+        if filename not in self.config.uploads:
+            return self._send(404, _page("404", "<h1>404 Not Found</h1>"))
+        self._send(200, self.config.uploads[filename], "application/octet-stream")
+
+    def _home(self, query):
+        if self._authenticated():
+            header = "<button data-automation='user-menu' aria-label='Account'>Account</button>"
+        else:
+            header = "<a href='/login'>Sign in</a>"
+        self._send(200, _page("JobsDB", f"<header>{header}</header><main>Home</main>"))
+
+    def _login(self, query):
+        action = "/login/submit" if self.config.mail_dir else "/login/verify"
+        form = (
+            f"<form action='{action}' method='get'>"
+            "<input type='email' name='email' autocomplete='email'>"
+            "<button type='submit' data-cy='submit'>Continue</button>"
+            "</form>"
+        )
+        self._send(200, _page("Sign in", form))
+
+    def _submit(self, query):
+        email = query.get("email", [""])[0]
+        if not self.config.mail_dir or not email:
+            return self._redirect("/login")
+        token = uuid.uuid4().hex
+        self.config.tokens.add(token)
+        host = self.headers.get("Host") or "127.0.0.1"
+        link = f"http://{host}/login/verify?{urlencode({'token': token, 'email': email})}"
+        message = EmailMessage()
+        message["From"] = "JobsDB <noreply@jobsdb.com>"
+        message["To"] = email
+        message["Subject"] = "Sign in to Jobsdb"
+        message["Date"] = formatdate(localtime=True)
+        message.set_content(f"Use this link to sign in: {link}\n")
+        message.add_alternative(
+            f"<p><a href=\"{link.replace('&', '&amp;')}\">Sign in</a></p>", subtype="html"
+        )
+        mailbox.Maildir(self.config.mail_dir, create=True).add(message)
+        self._send(200, _page("Check your email", f"<h1>Check your email</h1><p>{email}</p>"))
+
+    def _verify(self, query):
+        if self.config.mail_dir:
+            token = query.get("token", [""])[0]
+            if token not in self.config.tokens:
+                return self._redirect("/login")
+            self.config.tokens.discard(token)
+        self._redirect("/", headers={
+            "Set-Cookie": f"{SESSION_COOKIE}={SESSION_VALUE}; Path=/; Max-Age=86400",
+        })
+
+    def _applications(self, query):
+        if not self._authenticated():
+            return self._redirect(f"/login?returnUrl={APPLICATIONS_PATH}")
+
+        config = self.config
+        page = max(1, int(query.get("page", ["1"])[0]))
+        total_pages = max(1, -(-config.count // config.page_size))
+        start = (page - 1) * config.page_size
+        stop = min(config.count, start + config.page_size)
+
+        head = ""
+        if config.payload:
+            items = []
+            for index in range(start, stop):
+                record = synthetic_record(index)
+                items.append({
+                    "jobId": 100000 + index,
+                    "title": record["title"],
+                    "companyName": record["company"],
+                    "appliedAt": record["date"],
+                    "status": {"label": record["status"]},
+                })
+            payload = {"props": {"pageProps": {"applications": {
+                "items": items,
+                "pagination": {
+                    "page": page,
+                    "totalPages": total_pages,
+                    "hasNextPage": page < total_pages,
+                },
+            }}}}
+            head = (
+                "<script id=\"__NEXT_DATA__\" type=\"application/json\">"
+                f"{json.dumps(payload)}</script>"
+            )
+
+        next_link = ""
+        if config.list_mode != "pages":
+            next_link = _infinite_list(config, stop)
+        elif page < total_pages:
+            next_link = f"<a rel=\"next\" href=\"{APPLICATIONS_PATH}?page={page + 1}\">Next</a>"
+        body = (
+            "<header><button data-automation='user-menu'>Account</button></header>"
+            "<main><div data-automation='job-list'>"
+            f"{render_cards(start, stop, config.variant)}"
+            f"</div>{next_link}</main>"
+        )
+        self._send(200, _page("My applications", body, head))
+
+    def _more(self, query):
+        if not self._authenticated():
+            return self._send(401, "")
+        config = self.config
+        offset = max(0, int(query.get("offset", ["0"])[0]))
+        limit = max(1, int(query.get("limit", [str(config.page_size)])[0]))
+        if config.batch_delay:
+            time.sleep(config.batch_delay)
+        self._send(200, render_cards(offset, min(config.count, offset + limit), config.variant))
+
+    def _job_detail(self, query):
+        try:
+            index = int(urlparse(self.path).path[len(JOB_PATH_PREFIX):].strip("/")) - 100000
+        except ValueError:
+            index = -1
+        if not 0 <= index < self.config.count:
+            return self._send(404, _page("404", "<h1>404 Not Found</h1>"))
+
+        etag = f'"{index}-{self.config.detail_version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(200, render_detail_page(index, self.config.detail_json_ld), headers={
+            "ETag": etag,
+            "Last-Modified": DETAIL_LAST_MODIFIED,
+        })
+
+
+# 无限滚动/加载更多：列表底部进入视口（或点击按钮）时请求下一批卡片并追加到列表末尾；
+# 请求期间显示加载指示器（匹配 LOADING_SELECTORS），列表下方留出一屏空白保证页面总能滚动
+_INFINITE_SCRIPT = """
+<script>
+(function () {
+  var list = document.querySelector("[data-automation='job-list']");
+  var loader = document.getElementById('list-loading');
+  var button = document.getElementById('load-more');
+  var offset = %(offset)d, total = %(total)d, limit = %(limit)d, busy = false;
+  function more() {
+    if (busy || offset >= total) { return; }
+    busy = true;
+    loader.style.display = 'block';
+    loader.setAttribute('aria-busy', 'true');
+    fetch('%(path)s?offset=' + offset + '&limit=' + limit, { credentials: 'same-origin' })
+      .then(function (response) { return response.text(); })
+      .then(function (html) {
+        list.insertAdjacentHTML('beforeend', html);
+        offset += limit;
+        busy = false;
+        loader.style.display = 'none';
+        loader.removeAttribute('aria-busy');
+        if (button && offset >= total) { button.remove(); }
+      });
+  }
+  if (button) {
+    button.addEventListener('click', more);
+  } else {
+    window.addEventListener('scroll', function () {
+      if (list.getBoundingClientRect().bottom < window.innerHeight + 400) { more(); }
+    });
+  }
+})();
+</script>
+"""
+
+
+def _infinite_list(config, offset):
+    """无限滚动 / 加载更多模式下列表之后的标记和脚本"""
+    markup = "<div id='list-loading' class='list-loading' style='display:none'>Loading...</div>"
+    if config.list_mode == "load_more" and offset < config.count:
+        markup += "<button id='load-more' type='button'>Load more</button>"
+    markup += "<div style='height:100vh'></div>"
+    return markup + _INFINITE_SCRIPT % {
+        "offset": offset, "total": config.count, "limit": config.page_size, "path": MORE_PATH,
+    }
+
+
+def start_standin(port=0, config=None, host="127.0.0.1"):
+    """在后台线程启动替身服务器，返回 (server, base_url)；用 server.shutdown() 停止"""
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.config = config or StandinConfig()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 JobsDB 替身服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--count", type=int, default=50, help="申请记录总数")
+    parser.add_argument("--page-size", type=int, default=20, help="每页记录数")
+    parser.add_argument("--variant", default="automation", choices=VARIANTS, help="卡片标记变体")
+    parser.add_argument("--no-payload", action="store_true", help="不输出内嵌 JSON")
+    parser.add_argument("--list-mode", default="pages", choices=LIST_MODES, help="列表翻页方式")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="无限滚动每批的响应延迟（秒）")
+    parser.add_argument("--mail-dir", help="登录验证邮件投递到的 maildir（不设置时提交邮箱即登录）")
+    parser.add_argument("--upload-token", help="上传接口要求的 Bearer 令牌（对应 JOBSDB_UPLOAD_TOKEN）")
+    args = parser.parse_args()
+
+    config = StandinConfig(
+        args.count, args.page_size, args.variant, payload=not args.no_payload,
+        list_mode=args.list_mode, batch_delay=args.batch_delay, mail_dir=args.mail_dir,
+        upload_token=args.upload_token
+    )
+    server = ThreadingHTTPServer((args.host, args.port), StandinHandler)
+    server.config = config
+    print(json.dumps({
+        "status": "info",
+        "message": f"替身服务器已启动: http://{args.host}:{args.port}"
+    }, ensure_ascii=False))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,192 @@
+"""
+精简浏览模式
+
+爬虫只读取申请记录页面的文字，图片、字体、媒体、广告和统计脚本都是浪费的流量和时间。
+开启后：
+- 通过 CDP Network.setBlockedURLs 按 URL 模式拦截请求（资源类型映射为对应的扩展名模式，
+  外加常见的广告/统计域名），图片同时在渲染器层面禁用
+- 页面加载策略改为 eager（DOMContentLoaded 即返回，不等图片等子资源）
+- 可选的持久磁盘缓存目录，跨运行复用 JS/CSS 等静态资源
+
+浏览器的 performance 日志用于统计每次运行的请求数、被拦截的请求数、传输字节数和缓存命中。
+
+环境变量:
+    JOBSDB_LEAN=1                       开启精简模式
+    JOBSDB_BLOCK_TYPES=Image,Font,Media 拦截的资源类型
+    JOBSDB_BLOCK_PATTERNS=*ads*,*.gif   额外拦截的 URL 模式（逗号分隔）
+    JOBSDB_DISK_CACHE_DIR=.chrome_cache 持久磁盘缓存目录
+"""
+import os
+import json
+import threading
+from collections import Counter
+
+LEAN_MODE = os.environ.get("JOBSDB_LEAN") == "1"
+DISK_CACHE_DIR = os.environ.get("JOBSDB_DISK_CACHE_DIR")
+DISK_CACHE_SIZE = 200 * 1024 * 1024
+
+# 资源类型对应的 URL 模式（setBlockedURLs 只支持 URL 通配）
+TYPE_PATTERNS = {
+    "Image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico", "*.svg"],
+    "Font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "Media": ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg"],
+    "Stylesheet": ["*.css"],
+}
+DEFAULT_BLOCK_TYPES = ["Image", "Font", "Media"]
+
+# 广告和统计
+DEFAULT_BLOCK_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*connect.facebook.com*",
+    "*hotjar.com*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+    "*segment.io*",
+    "*tiktok.com*",
+    "*bat.bing.com*",
+]
+
+
+def _env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def blocked_patterns(types=None, patterns=None):
+    """拦截的 URL 模式：资源类型映射出的模式 + 额外模式"""
+    types = _env_list("JOBSDB_BLOCK_TYPES", DEFAULT_BLOCK_TYPES) if types is None else types
+    result = []
+    for resource_type in types:
+        result.extend(TYPE_PATTERNS.get(resource_type, []))
+    result.extend(DEFAULT_BLOCK_PATTERNS)
+    result.extend(_env_list("JOBSDB_BLOCK_PATTERNS", []) if patterns is None else patterns)
+    return list(dict.fromkeys(result))
+
+
+def configure_options(options, types=None, disk_cache_dir=DISK_CACHE_DIR):
+    """创建浏览器前调整 ChromeOptions"""
+    types = _env_list("JOBSDB_BLOCK_TYPES", DEFAULT_BLOCK_TYPES) if types is None else types
+    options.page_load_strategy = "eager"
+    if "Image" in types:
+        options.add_experimental_option(
+            "prefs", {"profile.managed_default_content_settings.images": 2}
+        )
+    if disk_cache_dir:
+        options.add_argument(f"--disk-cache-dir={os.path.abspath(disk_cache_dir)}")
+        options.add_argument(f"--disk-cache-size={DISK_CACHE_SIZE}")
+    # 用 performance 日志统计请求和字节数
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def enable_blocking(driver, patterns=None):
+    """浏览器启动后开启 URL 拦截，返回生效的模式列表；CDP 不可用时返回空列表"""
+    patterns = blocked_patterns(patterns=patterns) if patterns is None else patterns
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        # 允许使用磁盘缓存（部分环境默认会在开启 Network 域后禁用）
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": False})
+    except Exception:
+        return []
+    return patterns
+
+
+# ---- 网络统计 ----
+
+_local = threading.local()
+
+
+class NetworkStats:
+    """从 performance 日志累计的网络统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.blocked_by_type = Counter()
+        self.failed = 0
+        self.bytes_transferred = 0
+        self.cache_hits = 0
+        self.cache_bytes = 0
+        self._types = {}
+        self._cached = set()
+        self._sizes = {}
+
+    def add_entries(self, entries):
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                self.requests += 1
+                self._types[request_id] = params.get("type", "Other")
+            elif method == "Network.requestServedFromCache":
+                self._cached.add(request_id)
+            elif method == "Network.responseReceived":
+                response = params.get("response", {})
+                if response.get("fromDiskCache") or response.get("fromPrefetchCache"):
+                    self._cached.add(request_id)
+                headers = {k.lower(): v for k, v in (response.get("headers") or {}).items()}
+                try:
+                    self._sizes[request_id] = int(headers.get("content-length", 0))
+                except ValueError:
+                    pass
+            elif method == "Network.loadingFinished":
+                if request_id in self._cached:
+                    self.cache_hits += 1
+                    self.cache_bytes += self._sizes.get(request_id, 0)
+                else:
+                    self.bytes_transferred += int(params.get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed":
+                if params.get("blockedReason") or "BLOCKED_BY_CLIENT" in params.get("errorText", ""):
+                    self.blocked += 1
+                    self.blocked_by_type[params.get("type") or self._types.get(request_id, "Other")] += 1
+                else:
+                    self.failed += 1
+
+    def report(self):
+        return {
+            "requests": self.requests,
+            "blocked_requests": self.blocked,
+            "blocked_by_type": dict(self.blocked_by_type.most_common()),
+            "failed_requests": self.failed,
+            "bytes_transferred": self.bytes_transferred,
+            "cache_hits": self.cache_hits,
+            "bytes_from_cache": self.cache_bytes,
+        }
+
+
+def reset_network_stats():
+    _local.stats = NetworkStats()
+
+
+def drain(driver):
+    """
+    读取并清空浏览器的 performance 日志，累计到当前线程的统计中，返回读到的日志条目
+    浏览器关闭前调用一次，避免丢失最后一段日志；没有开启日志时什么也不做（返回空列表）
+    """
+    if not hasattr(_local, "stats"):
+        reset_network_stats()
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return []
+    _local.stats.add_entries(entries)
+    return entries
+
+
+def network_report():
+    """当前线程累计的网络统计（没有任何日志时返回 None）"""
+    stats = getattr(_local, "stats", None)
+    if stats is None or not stats.requests:
+        return None
+    return stats.report()
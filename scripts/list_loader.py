@@ -0,0 +1,192 @@
+"""
+流式列表加载
+
+边加载边提取：每批新卡片出现后立即在页面内提取并标记，然后再触发下一批加载，
+直到列表真正到底为止，没有固定的滚动次数上限。
+- 新一批是否到达：等待卡片数量增长（或出现未提取的卡片），而不是比较页面高度后固定 sleep
+- 触发下一批：优先点击 "加载更多" 按钮，没有按钮时滚动到底部
+- 判断到底：等待超时、没有加载指示器、也没有可点击的 "加载更多" 按钮
+Python 侧不持有 WebElement，只保存提取出的字段。
+从断点恢复时用 skip_known() 先不提取地加载到上次的位置，并跳过已提取过的卡片。
+"""
+import time
+
+from events import progress
+from instrumentation import phase
+from waits import wait_for
+from card_extractor import ranked_selectors, run_extraction, record_extraction_stats
+from jobsdb_selectors import LOADING_SELECTORS, LOAD_MORE_PATTERN, LINK_SELECTOR
+
+# 每批最长等待时间（秒）
+BATCH_TIMEOUT = 6
+# 超时时页面仍显示加载中，最多再额外等待几轮
+LOADING_GRACE_ROUNDS = 3
+# 整个列表加载的安全上限（秒），防止页面无休止地追加内容
+MAX_DURATION = 1800
+
+_LIST_STATE_SCRIPT = """
+var cardSelectors = arguments[0], loadingSelectors = arguments[1];
+var cards = [];
+for (var i = 0; i < cardSelectors.length; i++) {
+    try { cards = document.querySelectorAll(cardSelectors[i]); } catch (e) { cards = []; }
+    if (cards.length) { break; }
+}
+var unseen = 0;
+for (var c = 0; c < cards.length; c++) {
+    if (!cards[c].hasAttribute('data-acr-seen')) { unseen++; }
+}
+var loading = false;
+for (var l = 0; l < loadingSelectors.length && !loading; l++) {
+    try {
+        var el = document.querySelector(loadingSelectors[l]);
+        loading = !!(el && el.offsetParent !== null);
+    } catch (e) {}
+}
+return { count: cards.length, unseen: unseen, loading: loading };
+"""
+
+_ADVANCE_SCRIPT = """
+var pattern = new RegExp(arguments[0], 'i');
+var buttons = document.querySelectorAll('button, a[role="button"], [role="button"]');
+for (var i = 0; i < buttons.length; i++) {
+    var button = buttons[i], text = (button.innerText || '').trim();
+    if (text && pattern.test(text) && !button.disabled && button.offsetParent !== null) {
+        button.scrollIntoView({ block: 'center' });
+        button.click();
+        return 'load_more';
+    }
+}
+window.scrollTo(0, document.body.scrollHeight);
+return 'scroll';
+"""
+
+# 把链接已知的卡片标记为已提取（与 EXTRACT_CARDS_SCRIPT 使用同一个标记）
+_MARK_KNOWN_SCRIPT = """
+var cardSelectors = arguments[0], linkSelector = arguments[1], known = {};
+for (var k = 0; k < arguments[2].length; k++) { known[arguments[2][k]] = true; }
+var cards = [];
+for (var i = 0; i < cardSelectors.length; i++) {
+    try { cards = document.querySelectorAll(cardSelectors[i]); } catch (e) { cards = []; }
+    if (cards.length) { break; }
+}
+var marked = 0;
+for (var c = 0; c < cards.length; c++) {
+    var link = cards[c].querySelector(linkSelector);
+    if (link && link.href && known[link.href]) {
+        cards[c].setAttribute('data-acr-seen', '1');
+        marked++;
+    }
+}
+return marked;
+"""
+
+
+class StreamingListLoader:
+    """按批加载并提取申请记录列表"""
+
+    def __init__(self, driver, stats=None, batch_timeout=BATCH_TIMEOUT,
+                 loading_grace_rounds=LOADING_GRACE_ROUNDS, max_duration=MAX_DURATION):
+        self.driver = driver
+        self.stats = stats
+        self.batch_timeout = batch_timeout
+        self.loading_grace_rounds = loading_grace_rounds
+        self.max_duration = max_duration
+
+        # 运行后可读取的结果
+        self.card_selector = None
+        self.card_count = 0
+        self.batches_loaded = 0
+
+    def _state(self, card_selectors):
+        return self.driver.execute_script(
+            _LIST_STATE_SCRIPT, list(card_selectors), LOADING_SELECTORS
+        )
+
+    def _advance(self, card_selectors, extract=True):
+        """
+        触发下一批加载，新卡片出现返回 True，列表已到底返回 False
+        只有提取时卡片才会被打上已提取标记，extract=False 时只看卡片数量是否增长
+        """
+        before = self._state(card_selectors)["count"]
+        self.driver.execute_script(_ADVANCE_SCRIPT, LOAD_MORE_PATTERN)
+
+        def more_cards(driver):
+            state = self._state(card_selectors)
+            return state["count"] > before or (extract and state["unseen"] > 0)
+
+        for _ in range(1 + self.loading_grace_rounds):
+            if wait_for(self.driver, more_cards, self.batch_timeout, "list_batch"):
+                return True
+            # 超时了但页面还显示加载中，说明网络慢而不是到底了
+            if not self._state(card_selectors)["loading"]:
+                return False
+        return False
+
+    def skip_known(self, links, position):
+        """
+        断点恢复：不提取地把列表加载到至少 position 张卡片，再把链接在 links 中的卡片
+        标记为已提取，之后 batches() 只产出新卡片。按链接而不是位置跳过，
+        列表顶部新增了记录也不会漏掉。返回被跳过的卡片数
+        """
+        card_selectors, _ = ranked_selectors(self.stats)
+        started = time.time()
+        with phase("list_loading"):
+            while self._state(card_selectors)["count"] < position:
+                if time.time() - started > self.max_duration or not self._advance(card_selectors, extract=False):
+                    break
+            return self.driver.execute_script(
+                _MARK_KNOWN_SCRIPT, card_selectors, LINK_SELECTOR, list(links)
+            ) or 0
+
+    def batches(self, extract=True):
+        """
+        生成器：extract=True 时每次产出一批新提取的记录；
+        extract=False 时只负责把列表加载完整，每批产出当前卡片总数
+        调用方提前结束迭代即停止加载
+        """
+        card_selectors, fields = ranked_selectors(self.stats)
+        field_stats = {}
+        started = time.time()
+        extracted = False
+
+        try:
+            while True:
+                selectors = [self.card_selector] if self.card_selector else card_selectors
+                if extract:
+                    with phase("extraction"):
+                        result = run_extraction(self.driver, selectors, fields, only_new=True)
+                    extracted = True
+                    self.card_selector = self.card_selector or result.get("selector")
+                    self.card_count = result.get("count", 0)
+                    _merge_field_stats(field_stats, result.get("stats", {}))
+                    records = [r for r in result.get("records", []) if r.get("title")]
+                    if records:
+                        self.batches_loaded += 1
+                        yield records
+                else:
+                    with phase("list_loading"):
+                        self.card_count = self._state(selectors)["count"]
+                    self.batches_loaded += 1
+                    yield self.card_count
+
+                if time.time() - started > self.max_duration:
+                    progress("warning", f"列表加载超过 {self.max_duration} 秒，停止继续加载")
+                    break
+                with phase("list_loading"):
+                    advanced = self._advance(selectors, extract)
+                if not advanced:
+                    break
+        finally:
+            if self.stats is not None and extracted:
+                record_extraction_stats(
+                    self.stats, card_selectors, fields, self.card_selector, field_stats
+                )
+
+
+def _merge_field_stats(total, batch):
+    for name, counts in batch.items():
+        if name not in total:
+            total[name] = {"hits": list(counts["hits"]), "misses": list(counts["misses"])}
+            continue
+        for key in ("hits", "misses"):
+            total[name][key] = [a + b for a, b in zip(total[name][key], counts[key])]
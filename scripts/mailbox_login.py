@@ -0,0 +1,299 @@
+"""
+从邮箱自动读取登录验证链接
+
+JobsDB 登录需要点击邮件里的验证链接。配置了邮箱后，提交登录邮箱的同时开始轮询邮箱，
+收到 JobsDB 的验证邮件后取出链接，由同一个浏览器直接打开，不再等待人工点击。
+支持两种邮箱：
+- IMAP     imaps://user@imap.example.com/INBOX（密码放在 JOBSDB_MAILBOX_PASSWORD，
+           也可以写在 URL 里；imap:// 为明文连接，仅用于本地测试）
+- maildir  maildir:///home/me/Maildir、maildir:///C:/Users/me/Maildir（或直接写目录路径，
+           包括 C:\\Users\\me\\Maildir 这样的 Windows 路径），本地邮件投递/同步工具写入的目录
+
+只读取提交登录之后送达、发件人匹配、收件人是当前账号的邮件，不修改邮箱内容
+（IMAP 用 BODY.PEEK 读取，不会标记为已读）。可以用 jobsdb_standin.py --mail-dir 测试。
+
+环境变量:
+    JOBSDB_MAILBOX=imaps://me@imap.example.com/INBOX
+    JOBSDB_MAILBOX_PASSWORD=...
+    JOBSDB_MAILBOX_TIMEOUT=120          最长等待验证邮件的时间（秒）
+    JOBSDB_MAIL_SENDER=jobsdb|seek      发件人匹配（正则，不区分大小写）
+"""
+import os
+import re
+import time
+import email
+import email.utils
+from html import unescape
+from email import policy
+from urllib.parse import urlparse, unquote
+
+from events import progress
+
+MAILBOX = os.environ.get("JOBSDB_MAILBOX")
+MAILBOX_PASSWORD = os.environ.get("JOBSDB_MAILBOX_PASSWORD")
+MAIL_TIMEOUT = int(os.environ.get("JOBSDB_MAILBOX_TIMEOUT", 120))
+SENDER_PATTERN = re.compile(os.environ.get("JOBSDB_MAIL_SENDER", r"jobsdb|seek"), re.I)
+POLL_INTERVAL = 1
+# 连接 IMAP 服务器的超时（秒）
+IMAP_TIMEOUT = 15
+# 邮件送达时间与本机时间允许的误差（秒）
+CLOCK_SKEW = 60
+
+# 验证链接：指向这些域名（或当前使用的站点），路径/查询里带登录验证相关的词
+LINK_HOSTS = ("jobsdb.com", "seek.com", "seek.com.au")
+_LINK_PATH_RE = re.compile(r"login|verify|signin|sign-in|auth|magic|token|passwordless", re.I)
+_HREF_RE = re.compile(r'href\s*=\s*["\']([^"\']+)["\']', re.I)
+_URL_RE = re.compile(r"https?://[^\s\"'<>]+")
+# Windows 盘符路径：C:\Maildir、C:/Maildir（urlparse 会把盘符当成 scheme）
+_DRIVE_RE = re.compile(r"^/?[A-Za-z]:[\\/]")
+_FETCH_UID_RE = re.compile(rb"UID (\d+)")
+_UIDNEXT_RE = re.compile(rb"UIDNEXT (\d+)")
+
+
+class MailboxError(Exception):
+    """邮箱配置错误或无法连接"""
+
+
+# ---- 邮箱 ----
+
+class MaildirMailbox:
+    """本地 maildir，按文件修改时间（投递时间）筛选"""
+
+    def __init__(self, path):
+        if not os.path.isdir(path):
+            raise MailboxError(f"maildir 目录不存在: {path}")
+        self.path = path
+        self._seen = set()
+
+    def messages_since(self, since):
+        """返回 [(键, 邮件)]，只包含 since 之后送达、且之前的调用没有返回过的邮件"""
+        result = []
+        for subdir in ("new", "cur"):
+            directory = os.path.join(self.path, subdir)
+            for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+                key = name.split(":")[0]
+                if key in self._seen:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < since - CLOCK_SKEW:
+                        continue
+                    with open(path, "rb") as f:
+                        message = email.message_from_binary_file(f, policy=policy.default)
+                except OSError:
+                    # 邮件同步工具可能正在移动文件
+                    continue
+                self._seen.add(key)
+                result.append((key, message))
+        return result
+
+    def close(self):
+        pass
+
+
+class ImapMailbox:
+    """
+    IMAP 邮箱，按服务器收到邮件的时间（INTERNALDATE）筛选
+    第一次按日期搜索，之后只搜索 UID 大于已见过的最大 UID 的新邮件；
+    先只取 INTERNALDATE 筛选，再对送达时间符合的邮件读取正文
+    """
+
+    def __init__(self, host, port=None, user=None, password=None, folder="INBOX", use_ssl=True,
+                 timeout=IMAP_TIMEOUT):
+        import imaplib
+
+        self.folder = folder
+        self.last_uid = None
+        try:
+            if use_ssl:
+                self.conn = imaplib.IMAP4_SSL(host, port or 993, timeout=timeout)
+            else:
+                self.conn = imaplib.IMAP4(host, port or 143, timeout=timeout)
+            if user:
+                self.conn.login(user, password or "")
+            self.conn.select(folder, readonly=True)
+        except (OSError, imaplib.IMAP4.error) as e:
+            raise MailboxError(f"无法连接 IMAP 邮箱 {host}: {e}")
+
+    def _highest_uid(self):
+        """文件夹中当前最大的 UID：优先用 STATUS UIDNEXT，不支持时取 SEARCH ALL 的最大值"""
+        status, data = self.conn.status(self.folder, "(UIDNEXT)")
+        match = _UIDNEXT_RE.search(data[0] or b"") if status == "OK" and data else None
+        if match is not None:
+            return int(match.group(1)) - 1
+        status, data = self.conn.uid("SEARCH", None, "ALL")
+        if status != "OK" or not data or not data[0]:
+            return 0
+        return max(int(uid) for uid in data[0].split())
+
+    def _search(self, since):
+        """返回新邮件的 UID 列表（升序）"""
+        self.conn.noop()
+        if self.last_uid is None:
+            # 先记下当前最大的 UID：没有搜到邮件时从这里继续，而不是从 UID 1 开始
+            highest = self._highest_uid()
+            # SEARCH SINCE 只精确到天，准确的时间用 INTERNALDATE 再筛一次
+            day = time.strftime("%d-%b-%Y", time.gmtime(since - CLOCK_SKEW - 86400))
+            status, data = self.conn.uid("SEARCH", None, "SINCE", day)
+        else:
+            status, data = self.conn.uid("SEARCH", None, "UID", f"{self.last_uid + 1}:*")
+        if status != "OK" or not data or not data[0]:
+            if self.last_uid is None:
+                self.last_uid = highest
+            return []
+        uids = sorted(int(uid) for uid in data[0].split())
+        # n:* 在没有新邮件时仍会返回当前最大的 UID
+        if self.last_uid is not None:
+            uids = [uid for uid in uids if uid > self.last_uid]
+        return uids
+
+    def messages_since(self, since):
+        """返回 [(键, 邮件)]，只包含 since 之后送达、且之前的调用没有返回过的邮件"""
+        import imaplib
+
+        uids = self._search(since)
+        if not uids:
+            return []
+        self.last_uid = max(uids[-1], self.last_uid or 0)
+
+        status, parts = self.conn.uid("FETCH", ",".join(map(str, uids)), "(INTERNALDATE)")
+        if status != "OK":
+            return []
+        recent = []
+        for part in parts:
+            line = part[0] if isinstance(part, tuple) else part
+            match = _FETCH_UID_RE.search(line or b"")
+            received = imaplib.Internaldate2tuple(line) if line else None
+            if match is None or received is None or time.mktime(received) < since - CLOCK_SKEW:
+                continue
+            recent.append(match.group(1).decode())
+
+        result = []
+        for uid in recent:
+            status, parts = self.conn.uid("FETCH", uid, "(BODY.PEEK[])")
+            if status != "OK":
+                continue
+            for part in parts:
+                if isinstance(part, tuple):
+                    result.append((uid, email.message_from_bytes(part[1], policy=policy.default)))
+        return result
+
+    def close(self):
+        try:
+            self.conn.logout()
+        except Exception:
+            pass
+
+
+def open_mailbox(spec, password=MAILBOX_PASSWORD):
+    """根据配置字符串打开邮箱（见模块说明）"""
+    if os.path.isabs(spec) or _DRIVE_RE.match(spec):
+        return MaildirMailbox(spec)
+    parsed = urlparse(spec)
+    if parsed.scheme in ("imap", "imaps"):
+        return ImapMailbox(
+            parsed.hostname,
+            parsed.port,
+            unquote(parsed.username) if parsed.username else None,
+            unquote(parsed.password) if parsed.password else password,
+            unquote(parsed.path.strip("/")) or "INBOX",
+            use_ssl=parsed.scheme == "imaps",
+        )
+    if parsed.scheme == "maildir":
+        path = unquote(parsed.path)
+        # maildir:///C:/Maildir 的 path 为 /C:/Maildir
+        if _DRIVE_RE.match(path):
+            path = path[1:]
+        return MaildirMailbox(path)
+    if not parsed.scheme:
+        return MaildirMailbox(spec)
+    raise MailboxError(f"不支持的邮箱类型: {parsed.scheme}")
+
+
+# ---- 验证邮件 ----
+
+def _addresses(message, headers=("To", "Delivered-To", "X-Original-To", "Cc")):
+    values = [str(value) for name in headers for value in message.get_all(name, [])]
+    return {address.lower() for _, address in email.utils.getaddresses(values)}
+
+
+def is_verification_mail(message, account_email):
+    sender = str(message.get("From", ""))
+    if not SENDER_PATTERN.search(sender):
+        return False
+    return account_email.strip().lower() in _addresses(message)
+
+
+def _link_allowed(url, hosts):
+    host = (urlparse(url).hostname or "").lower()
+    if not any(host == allowed or host.endswith("." + allowed) for allowed in hosts):
+        return False
+    parsed = urlparse(url)
+    return bool(_LINK_PATH_RE.search(parsed.path + "?" + parsed.query))
+
+
+def extract_verification_link(message, hosts=LINK_HOSTS):
+    """取出邮件中的验证链接：HTML 正文里的链接优先，其次是纯文本中的 URL"""
+    candidates = []
+    for content_type in ("html", "plain"):
+        part = message.get_body(preferencelist=(content_type,))
+        if part is None:
+            continue
+        text = part.get_content()
+        found = _HREF_RE.findall(text) if content_type == "html" else _URL_RE.findall(text)
+        candidates.extend(unescape(url).strip() for url in found)
+    for url in candidates:
+        if _link_allowed(url, hosts):
+            return url
+    return None
+
+
+def wait_for_verification_link(box, account_email, since, timeout=MAIL_TIMEOUT,
+                               hosts=LINK_HOSTS, poll=POLL_INTERVAL):
+    """轮询邮箱直到收到 since 之后发给该账号的验证邮件，返回链接；超时返回 None"""
+    deadline = time.time() + timeout
+    checked = set()
+    while True:
+        # 最新的邮件优先
+        for key, message in reversed(box.messages_since(since)):
+            if key in checked:
+                continue
+            checked.add(key)
+            if not is_verification_mail(message, account_email):
+                continue
+            link = extract_verification_link(message, hosts)
+            if link:
+                return link
+        if time.time() >= deadline:
+            return None
+        time.sleep(poll)
+
+
+def open_verification_link(driver, spec, account_email, since, site_url=None, timeout=MAIL_TIMEOUT):
+    """
+    从邮箱读取验证链接并在浏览器中打开，打开了返回 True
+    邮箱不可用或超时返回 False，调用方改为等待人工验证
+    site_url 为当前使用的站点（如本地替身服务器），其域名也视为可信的链接域名
+    """
+    hosts = LINK_HOSTS
+    if site_url:
+        hosts = hosts + (urlparse(site_url).hostname,)
+    progress("waiting_verification", "正在从邮箱读取验证链接...")
+    try:
+        box = open_mailbox(spec)
+    except MailboxError as e:
+        progress("warning", f"{e}，改为等待手动验证")
+        return False
+    try:
+        link = wait_for_verification_link(box, account_email, since, timeout, hosts)
+    except Exception as e:
+        progress("warning", f"读取邮箱失败: {e}，改为等待手动验证")
+        return False
+    finally:
+        box.close()
+    if not link:
+        progress("warning", f"{timeout} 秒内未收到验证邮件，改为等待手动验证")
+        return False
+    progress("info", "已收到验证邮件，正在打开验证链接...")
+    driver.get(link)
+    return True
@@ -0,0 +1,200 @@
+"""
+离线 HTML 解析
+
+从 driver.page_source 快照或保存下来的 HTML 文件中提取申请记录，
+不依赖浏览器，字段定义与浏览器内提取（card_extractor）共用 jobsdb_selectors。
+
+卡片很多的快照会被切分后交给进程池并行解析；多个文件也会并行解析。
+依赖 lxml 和 cssselect（见 requirements.txt）；未安装时调用方用 available() 判断并回退到浏览器内提取。
+
+用法:
+    python offline_parser.py page.html
+    python offline_parser.py debug_snapshots/<account_key>/<运行>/1_no_records.html.gz
+    python offline_parser.py snapshots/*.html --workers 4 --base-url https://hk.jobsdb.com
+"""
+import os
+import sys
+import gzip
+import json
+import argparse
+from urllib.parse import urljoin
+from concurrent.futures import ProcessPoolExecutor
+
+from jobsdb_selectors import CARD_SELECTORS, CARD_FIELDS, LINK_SELECTOR
+
+DEFAULT_BASE_URL = "https://hk.jobsdb.com"
+MISSING_DEPENDENCY = "离线解析需要安装 lxml 和 cssselect: pip install lxml cssselect"
+
+
+def available():
+    """lxml 和 cssselect 是否已安装"""
+    try:
+        import lxml.html  # noqa: F401
+        import cssselect  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+# 卡片数超过该值时才启用进程池，小页面的进程启动开销得不偿失
+PARALLEL_THRESHOLD = 2000
+
+# 编译后的选择器缓存：{(selector, scoped): XPath 或 None}
+_compiled = {}
+
+
+def _compile(selector, scoped):
+    """
+    把 CSS 选择器编译为 XPath 并缓存
+    scoped=True 时只匹配后代元素，与 element.querySelector 的语义一致
+    无效选择器返回 None（视为未命中）
+    """
+    key = (selector, scoped)
+    if key not in _compiled:
+        from lxml import etree
+        from cssselect import HTMLTranslator, SelectorError
+
+        prefix = "descendant::" if scoped else "descendant-or-self::"
+        try:
+            _compiled[key] = etree.XPath(HTMLTranslator().css_to_xpath(selector, prefix=prefix))
+        except SelectorError:
+            _compiled[key] = None
+    return _compiled[key]
+
+
+def _query(root, selector, scoped=True):
+    xpath = _compile(selector, scoped)
+    return xpath(root) if xpath is not None else []
+
+
+def _text(element):
+    # 近似浏览器的 innerText：合并源码中的排版空白
+    return " ".join(element.text_content().split())
+
+
+def first_text(root, selectors, default=""):
+    """按顺序返回第一个命中且非空的选择器文本"""
+    for selector in selectors:
+        matches = _query(root, selector)
+        if matches:
+            value = _text(matches[0])
+            if value:
+                return value
+    return default
+
+
+def extract_record(card, base_url, fields=CARD_FIELDS, link_selector=LINK_SELECTOR):
+    """从单个卡片元素提取字段，语义与 card_extractor 一致"""
+    record = {}
+    for name, selectors, default in fields:
+        value = default
+        for selector in selectors:
+            matches = _query(card, selector)
+            if not matches:
+                continue
+            value = _text(matches[0])
+            if value:
+                break
+        record[name] = value
+
+    links = _query(card, link_selector)
+    if not links:
+        record["link"] = ""
+    else:
+        href = links[0].get("href")
+        record["link"] = None if href is None else urljoin(base_url, href)
+    return record
+
+
+def find_cards(root, card_selectors=CARD_SELECTORS):
+    """按优先级返回 (命中的选择器, 卡片元素列表)"""
+    for selector in card_selectors:
+        cards = _query(root, selector, scoped=False)
+        if cards:
+            return selector, cards
+    return None, []
+
+
+def _extract_slice(args):
+    """
+    进程池任务：独立解析整份 HTML，只提取第 part 份卡片
+    lxml 解析本身很快，耗时主要在逐卡片的选择器匹配，因此各进程重复解析文档
+    比在主进程序列化卡片再分发更省时间
+    """
+    import lxml.html
+
+    html, base_url, part, parts = args
+    root = lxml.html.document_fromstring(html)
+    card_selector, cards = find_cards(root)
+    start = len(cards) * part // parts
+    stop = len(cards) * (part + 1) // parts
+    records = [extract_record(card, base_url) for card in cards[start:stop]]
+    return card_selector, len(cards), records
+
+
+def parse_html(html, base_url=DEFAULT_BASE_URL, workers=None):
+    """
+    解析一份 HTML 快照
+    返回 (命中的卡片选择器, 卡片总数, 记录列表)；没有标题的卡片已被跳过
+    """
+    import lxml.html
+
+    root = lxml.html.document_fromstring(html)
+    card_selector, cards = find_cards(root)
+    card_count = len(cards)
+
+    parts = workers or os.cpu_count() or 1
+    if parts > 1 and card_count > PARALLEL_THRESHOLD:
+        del root, cards
+        records = []
+        with ProcessPoolExecutor(max_workers=parts) as executor:
+            tasks = [(html, base_url, part, parts) for part in range(parts)]
+            for _, _, part_records in executor.map(_extract_slice, tasks):
+                records.extend(part_records)
+    else:
+        records = [extract_record(card, base_url) for card in cards]
+
+    records = [record for record in records if record.get("title")]
+    return card_selector, card_count, records
+
+
+def parse_file(path, base_url=DEFAULT_BASE_URL, workers=1):
+    # failure_snapshots 保存的快照是 gzip 压缩的
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        html = f.read()
+    card_selector, card_count, records = parse_html(html, base_url, workers=workers)
+    return {
+        "file": path,
+        "selector": card_selector,
+        "count": card_count,
+        "data": records,
+    }
+
+
+def parse_files(paths, base_url=DEFAULT_BASE_URL, workers=None):
+    """并行解析多个 HTML 文件，结果顺序与输入一致"""
+    if len(paths) == 1:
+        return [parse_file(paths[0], base_url, workers=workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(parse_file, paths, [base_url] * len(paths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="离线解析 JobsDB 申请记录 HTML")
+    parser.add_argument("files", nargs="+", help="HTML 文件路径")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="解析相对链接使用的页面地址")
+    parser.add_argument("--workers", type=int, default=None, help="进程池大小，默认使用 CPU 核数")
+    args = parser.parse_args()
+
+    if not available():
+        print(json.dumps({"error": MISSING_DEPENDENCY, "status": "failed"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(json.dumps({"error": f"文件不存在: {', '.join(missing)}", "status": "failed"},
+                         ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    results = parse_files(args.files, args.base_url, workers=args.workers)
+    print(json.dumps(results, ensure_ascii=False))
@@ -0,0 +1,394 @@
+"""
+流水线：提取、规整、详情补充、导出和上传同时进行
+
+原来的流程是严格串行的：浏览器提取完全部记录后才开始导出，导出完才上传，
+浏览器工作时 CPU 和磁盘空闲，导出时浏览器又在空闲。流水线把这些步骤拆成用有界队列连接的阶段：
+
+    提取（调用线程 put）-> 规整 -> 详情补充（可选）-> 导出 -> 上传（可选）
+
+- 每个阶段一个线程，按批处理，记录顺序保持不变
+- 队列最多缓存 QUEUE_SIZE 批，下游处理不过来时 put() 阻塞，提取随之放慢（背压），内存不会无限增长
+- 任一阶段出错或调用方 cancel() 时所有阶段尽快停止：删除不完整的导出文件，中止上传，
+  put() / close() 在调用线程抛出该阶段的异常
+- 导出格式可以边写边读（csv / jsonl）时，第一批记录写出后就开始上传；
+  xlsx / parquet 要关闭时才写完整，导出完成后立即上传。上传失败不影响本地导出
+- 处理完的批次在调用线程里（put() 和 close() 中）交给 on_output，record 事件因此仍从
+  调用线程写出（常驻 worker 按线程转发 stdout）
+
+report() 给出各阶段的忙碌时间、提取被背压阻塞的时间，以及与逐步串行执行相比节省的墙钟时间
+（各阶段忙碌时间之和 - 实际耗时）。
+
+设置 index_key 时开启结果去重（export_index.py）：导出文件写在内存缓冲区里，同时计算记录摘要，
+导出完成后与上次的摘要比较，未变化时不写文件也不上传（unchanged 为 True）；
+有变化时直接从内存上传，没有上传地址时才写本地文件。这种模式下要等摘要算完才能决定是否上传，
+上传不再与写出重叠。
+
+用法:
+    with Pipeline("csv", upload_url=UPLOAD_URL, on_output=stream.add) as pipeline:
+        for batch in batches:
+            pipeline.put(batch)
+        records = pipeline.close()
+    pipeline.export_path, pipeline.upload, pipeline.report()
+
+环境变量:
+    JOBSDB_PIPELINE_QUEUE=4   每个队列最多缓存的批次数
+"""
+import io
+import os
+import time
+import queue
+import threading
+
+from events import progress
+from export_index import ExportIndex, RecordDigest
+from exporters import open_exporter, create_exporter, default_filename, DEFAULT_FORMAT, EXPORT_DIR, COLUMNS
+from uploader import upload, upload_file, CHUNK_SIZE
+
+QUEUE_SIZE = int(os.environ.get("JOBSDB_PIPELINE_QUEUE", 4))
+# 一次送入的大列表（HTTP 快速路径、断点、增量模式）按这个大小切批，下游阶段才能重叠
+BATCH_SIZE = 50
+POLL_INTERVAL = 0.1
+
+# 阶段名
+EXTRACTION = "extraction"
+NORMALISE = "normalise"
+ENRICH = "enrich"
+EXPORT = "export"
+UPLOAD = "upload"
+
+_DONE = object()
+
+
+class PipelineCancelled(Exception):
+    """流水线已被取消"""
+
+
+def _clean(value):
+    return " ".join(value.split()) if isinstance(value, str) else value
+
+
+def normalise_record(record, columns=COLUMNS):
+    """规整一条记录：字符串去掉首尾和连续空白，补齐导出列；返回新字典，不修改原记录"""
+    normalised = {key: _clean(value) for key, value in record.items()}
+    for name, _, _ in columns:
+        normalised.setdefault(name, "")
+    return normalised
+
+
+class Pipeline:
+    """有界队列连接的多阶段流水线，见模块说明"""
+
+    def __init__(self, export_format=DEFAULT_FORMAT, output_dir=EXPORT_DIR, columns=COLUMNS,
+                 enricher=None, upload_url=None, filename=None, on_output=None,
+                 queue_size=QUEUE_SIZE, index_key=None):
+        # 导出器在调用线程里创建，格式或目录有问题时直接抛出
+        self.index_key = index_key
+        if index_key is None:
+            self._exporter = open_exporter(export_format, filename, output_dir, columns)
+            self.filename = os.path.basename(self._exporter.path)
+        else:
+            self._buffer = io.BytesIO()
+            self._exporter = create_exporter(export_format, self._buffer, columns)
+            self.filename = filename or default_filename(export_format)
+            self._digest = RecordDigest()
+            self._index = ExportIndex(output_dir)
+        self.output_dir = output_dir
+        # 去重模式下的记录摘要，以及结果是否与上次相同
+        self.digest = None
+        self.unchanged = False
+        self.columns = columns
+        self.on_output = on_output
+        self.upload_url = upload_url
+        self.export_path = None
+        # 上传成功时为接口返回的 blob 信息，失败时为 {"error": ...}
+        self.upload = None
+        self.records = []
+
+        self._cancel = threading.Event()
+        self._written = threading.Event()
+        self._error = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._output = queue.Queue()
+        self.backpressure = 0.0
+        self.batches = 0
+        self._upload_idle = 0.0
+
+        stages = [(NORMALISE, self._normalise)]
+        if enricher is not None:
+            stages.append((ENRICH, enricher.enrich))
+        stages.append((EXPORT, self._export))
+        # 各阶段的忙碌时间（秒），按流水线顺序排列
+        self.busy = {name: 0.0 for name in [EXTRACTION] + [name for name, _ in stages]}
+        self._queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._threads = []
+        for index, (name, func) in enumerate(stages):
+            sink = self._queues[index + 1] if index + 1 < len(stages) else None
+            self._threads.append(threading.Thread(
+                target=self._run_stage, args=(name, func, self._queues[index], sink),
+                name=f"pipeline-{name}", daemon=True,
+            ))
+        if upload_url:
+            self.busy[UPLOAD] = 0.0
+            self._threads.append(threading.Thread(target=self._run_upload, name="pipeline-upload", daemon=True))
+
+        self._started = time.perf_counter()
+        self._mark = self._started
+        self._wall = None
+        for thread in self._threads:
+            thread.start()
+
+    # ---- 队列 ----
+
+    def _get(self, source):
+        while True:
+            if self._cancel.is_set():
+                raise PipelineCancelled()
+            try:
+                return source.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+
+    def _put(self, sink, item):
+        """放入队列，队列满时等待；返回等待的时间"""
+        started = time.perf_counter()
+        while True:
+            if self._cancel.is_set():
+                raise PipelineCancelled()
+            try:
+                sink.put(item, timeout=POLL_INTERVAL)
+                return time.perf_counter() - started
+            except queue.Full:
+                continue
+
+    def _add_busy(self, name, started):
+        with self._lock:
+            self.busy[name] += time.perf_counter() - started
+
+    def _fail(self, error):
+        with self._lock:
+            if self._error is None:
+                self._error = error
+        self._cancel.set()
+
+    # ---- 阶段 ----
+
+    def _run_stage(self, name, func, source, sink):
+        try:
+            while True:
+                batch = self._get(source)
+                if batch is _DONE:
+                    break
+                started = time.perf_counter()
+                batch = func(batch)
+                self._add_busy(name, started)
+                if batch and sink is not None:
+                    self._put(sink, batch)
+            if sink is not None:
+                self._put(sink, _DONE)
+            else:
+                started = time.perf_counter()
+                self._finish_export()
+                self._add_busy(name, started)
+                self._written.set()
+        except PipelineCancelled:
+            pass
+        except BaseException as e:
+            self._fail(e)
+
+    def _normalise(self, batch):
+        return [normalise_record(record, self.columns) for record in batch]
+
+    def _export(self, batch):
+        self._exporter.write_many(batch)
+        self._exporter.flush()
+        if self.index_key is not None:
+            self._digest.update(batch)
+        self._output.put(batch)
+
+    def _finish_export(self):
+        self.export_path = self._exporter.close()
+        if self.index_key is None:
+            return
+        self.digest = self._digest.hexdigest()
+        previous = self._index.lookup(self.index_key, self.digest, self.upload_url)
+        if previous is not None:
+            self.unchanged = True
+            self.export_path = previous.get("path")
+            self.upload = previous.get("upload")
+        elif not self.upload_url:
+            self.export_path = self._save_buffer()
+
+    def _save_buffer(self):
+        """把内存里的导出文件写到导出目录（先写临时文件，不会留下不完整的文件）"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.abspath(os.path.join(self.output_dir, self.filename))
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self._buffer.getbuffer())
+        os.replace(tmp_path, path)
+        return path
+
+    def _buffer_chunks(self):
+        view = self._buffer.getbuffer()
+        try:
+            for offset in range(0, len(view), CHUNK_SIZE):
+                yield bytes(view[offset:offset + CHUNK_SIZE])
+        finally:
+            view.release()
+
+    def _tail(self):
+        """边写边读导出文件，直到导出完成；等待新数据的时间不计入上传忙碌时间"""
+        with open(self._exporter.path, "rb") as f:
+            while True:
+                done = self._written.is_set()
+                chunk = f.read(CHUNK_SIZE)
+                if chunk:
+                    yield chunk
+                    continue
+                if done:
+                    return
+                started = time.perf_counter()
+                self._written.wait(POLL_INTERVAL)
+                self._upload_idle += time.perf_counter() - started
+                if self._cancel.is_set():
+                    raise PipelineCancelled()
+
+    def _run_upload(self):
+        filename = self.filename
+        started = time.perf_counter()
+        try:
+            if self._exporter.streamable and self.index_key is None:
+                self.upload = upload(self._tail(), filename, self.upload_url)
+            else:
+                while not self._written.wait(POLL_INTERVAL):
+                    if self._cancel.is_set():
+                        return
+                started = time.perf_counter()
+                if self.unchanged:
+                    return
+                if self.index_key is not None:
+                    self.upload = upload(self._buffer_chunks(), filename, self.upload_url)
+                else:
+                    self.upload = upload_file(self._exporter.path, filename, self.upload_url)
+        except Exception as e:
+            if not self._cancel.is_set():
+                self.upload = {"error": str(e)}
+        finally:
+            self._add_busy(UPLOAD, started + self._upload_idle)
+
+    # ---- 调用方 ----
+
+    def _drain_output(self):
+        while True:
+            try:
+                batch = self._output.get_nowait()
+            except queue.Empty:
+                return
+            self.records.extend(batch)
+            self.batches += 1
+            if self.on_output:
+                self.on_output(batch)
+
+    def _account_extraction(self):
+        """上一次 put() 返回以来调用方所做的工作都计为提取时间"""
+        now = time.perf_counter()
+        self.busy[EXTRACTION] += now - self._mark
+        self._mark = now
+
+    def _raise_if_failed(self):
+        if self._error is not None:
+            raise self._error
+        if self._cancel.is_set():
+            raise PipelineCancelled("流水线已取消")
+
+    def put(self, batch):
+        """送入一批提取出的记录；下游处理不过来时阻塞"""
+        self._account_extraction()
+        batch = list(batch)
+        try:
+            for index in range(0, len(batch), BATCH_SIZE):
+                self.backpressure += self._put(self._queues[0], batch[index:index + BATCH_SIZE])
+        except PipelineCancelled:
+            self._raise_if_failed()
+        finally:
+            self._mark = time.perf_counter()
+        self._drain_output()
+
+    def _join(self):
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(POLL_INTERVAL)
+                self._drain_output()
+        self._drain_output()
+        if self._wall is None:
+            self._wall = time.perf_counter() - self._started
+
+    def _discard(self):
+        try:
+            self._exporter.close()
+        except Exception:
+            pass
+        if self._exporter.path is not None and os.path.exists(self._exporter.path):
+            os.remove(self._exporter.path)
+        self.export_path = None
+
+    def close(self):
+        """所有记录都已送入：等待各阶段处理完，返回处理后的全部记录"""
+        if self._closed:
+            return self.records
+        self._closed = True
+        self._account_extraction()
+        try:
+            self._put(self._queues[0], _DONE)
+        except PipelineCancelled:
+            pass
+        self._join()
+        if self._cancel.is_set():
+            self._discard()
+            self._raise_if_failed()
+        failed = bool(self.upload and "error" in self.upload)
+        if failed and self.export_path is None:
+            # 去重模式下只有内存里的文件，上传失败时写到本地，结果不会丢失
+            self.export_path = self._save_buffer()
+        if failed:
+            progress("warning", f"{self.upload['error']}，导出文件仍保存在本地")
+        if self.index_key is not None and not self.unchanged and not failed:
+            self._index.record(self.index_key, self.digest, len(self.records), self.export_path,
+                               self.upload, self.upload_url)
+        return self.records
+
+    def cancel(self):
+        """取消：各阶段尽快停止，删除不完整的导出文件，中止上传"""
+        if self._closed and not self._cancel.is_set():
+            return
+        self._closed = True
+        self._cancel.set()
+        self._join()
+        self._discard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        else:
+            self.close()
+        return False
+
+    def report(self):
+        """各阶段忙碌时间和重叠执行节省的墙钟时间"""
+        wall = self._wall if self._wall is not None else time.perf_counter() - self._started
+        sequential = sum(self.busy.values())
+        return {
+            "wall_seconds": round(wall, 3),
+            "stage_seconds": {name: round(seconds, 3) for name, seconds in self.busy.items()},
+            "sequential_seconds": round(sequential, 3),
+            "saved_seconds": round(max(0.0, sequential - wall), 3),
+            "backpressure_seconds": round(self.backpressure, 3),
+            "batches": self.batches,
+            "records": len(self.records),
+            "digest": self.digest,
+            "unchanged": self.unchanged,
+        }
@@ -0,0 +1,394 @@
+"""
+录制与回放
+
+录制：一次真实爬取过程中，在各阶段结束时保存 DOM 快照，并从浏览器的 performance 日志中
+取出文档和 XHR/fetch 响应的正文，连同爬取结果和各阶段耗时写成一个压缩归档
+（zip，内含 manifest.json、snapshots/、responses/）。归档包含账号的申请记录，注意保管。
+
+回放：不访问网络，全速重跑提取逻辑，并与录制时的结果和耗时对比：
+- offline  用 offline_parser 解析录制的列表快照（不需要浏览器）
+- browser  启动本地回放服务器，把录制的快照（去掉脚本）按原 URL 路径返回，
+           在无头 Chrome 里运行真实的 scrape_application_history
+
+JobsDB 改版或某次爬取变慢后，可以对历史归档逐个回放，确认提取结果没有回退。
+
+用法:
+    python jobsdb_scraper.py you@example.com --record captures/
+    python replay.py captures/*.acr.zip                  # 离线回放并对比
+    python replay.py captures/x.acr.zip --mode browser   # 浏览器回放
+"""
+import os
+import re
+import sys
+import json
+import time
+import zipfile
+import argparse
+import threading
+from base64 import b64decode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from accounts import account_key
+
+FORMAT_VERSION = 1
+RECORD_DIR = os.environ.get("JOBSDB_RECORD_DIR")
+ARCHIVE_SUFFIX = ".acr.zip"
+# 只保存这些类型的响应正文（图片、脚本、样式对回放没有用）
+RECORDED_TYPES = ("Document", "XHR", "Fetch")
+MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+# 列表加载完成时的快照标签，回放以它为准
+LIST_SNAPSHOT = "list_loaded"
+
+_SCRIPT_RE = re.compile(r"<script\b[^>]*>.*?</script>", re.S | re.I)
+_SEEN_ATTR_RE = re.compile(r'\sdata-acr-seen="[^"]*"')
+
+_local = threading.local()
+
+
+# ---- 录制 ----
+
+class Recorder:
+    """收集一次运行的快照和响应，save() 时写成归档"""
+
+    def __init__(self, path):
+        self.path = path
+        self.created_at = time.time()
+        self._started = time.perf_counter()
+        self.snapshots = []
+        self.responses = []
+        self._pending = {}
+
+    def _elapsed(self):
+        return round(time.perf_counter() - self._started, 3)
+
+    def collect(self, driver):
+        """读取 performance 日志，取出已完成的文档/XHR 响应正文（页面离开后正文就取不到了）"""
+        from lean_mode import drain
+
+        for entry in drain(driver):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            request_id = params.get("requestId")
+            if method == "Network.responseReceived" and params.get("type") in RECORDED_TYPES:
+                response = params.get("response", {})
+                self._pending[request_id] = {
+                    "url": response.get("url"),
+                    "status": response.get("status"),
+                    "mime": response.get("mimeType"),
+                    "type": params.get("type"),
+                }
+            elif method == "Network.loadingFinished" and request_id in self._pending:
+                meta = self._pending.pop(request_id)
+                if params.get("encodedDataLength", 0) > MAX_RESPONSE_BYTES:
+                    continue
+                try:
+                    body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+                except Exception:
+                    continue
+                data = body.get("body", "")
+                data = b64decode(data) if body.get("base64Encoded") else data.encode("utf-8")
+                self.responses.append((dict(meta, t=self._elapsed()), data))
+            elif method == "Network.loadingFailed":
+                self._pending.pop(request_id, None)
+
+    def snapshot(self, driver, label, html=None):
+        """保存当前页面的 DOM 快照（已经取过 page_source 时传入 html，避免重复序列化）"""
+        try:
+            self.collect(driver)
+            url = driver.current_url
+            if html is None:
+                html = driver.page_source
+        except Exception:
+            # 浏览器已经崩溃或被释放
+            return
+        self.snapshots.append(({"label": label, "url": url, "t": self._elapsed()}, html))
+
+    def save(self, records=None, timings=None, success=True, error=None, **info):
+        """写出归档（先写临时文件再替换），返回路径"""
+        manifest = dict(
+            info,
+            version=FORMAT_VERSION,
+            created_at=self.created_at,
+            duration=self._elapsed(),
+            success=success,
+            error=error,
+            timings=timings,
+            records=records or [],
+            snapshots=[],
+            responses=[],
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            for index, (meta, html) in enumerate(self.snapshots):
+                name = f"snapshots/{index:03d}-{meta['label']}.html"
+                archive.writestr(name, html)
+                manifest["snapshots"].append(dict(meta, file=name))
+            for index, (meta, data) in enumerate(self.responses):
+                name = f"responses/{index:03d}.bin"
+                archive.writestr(name, data)
+                manifest["responses"].append(dict(meta, file=name))
+            archive.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+        os.replace(tmp_path, self.path)
+        return self.path
+
+
+def recording_path(record_dir, email):
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(record_dir, f"{account_key(email)}-{stamp}{ARCHIVE_SUFFIX}")
+
+
+def start_recording(path):
+    """开始为当前线程录制"""
+    _local.recorder = Recorder(path)
+    return _local.recorder
+
+
+def current_recorder():
+    return getattr(_local, "recorder", None)
+
+
+def snapshot(driver, label, html=None):
+    """保存一个阶段快照；没有在录制时什么也不做"""
+    recorder = current_recorder()
+    if recorder is not None and driver is not None:
+        recorder.snapshot(driver, label, html)
+
+
+def stop_recording(driver=None, result=None, error=None, **info):
+    """
+    结束录制并写出归档，返回路径（没有在录制时返回 None）
+    driver 为 None（已经释放）时只保存已收集的内容
+    """
+    recorder = current_recorder()
+    if recorder is None:
+        return None
+    _local.recorder = None
+    if driver is not None:
+        try:
+            recorder.collect(driver)
+        except Exception:
+            pass
+    if result is not None:
+        return recorder.save(
+            records=result.get("data"), timings=result.get("timings"), success=True, **info
+        )
+    from instrumentation import last_report
+    return recorder.save(timings=last_report(), success=False, error=error, **info)
+
+
+# ---- 回放 ----
+
+class Capture:
+    """读取一个录制归档"""
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self.manifest = json.loads(self._zip.read("manifest.json").decode("utf-8"))
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(f"不支持的归档版本: {self.manifest.get('version')}")
+
+    @property
+    def records(self):
+        return self.manifest.get("records") or []
+
+    def read(self, name):
+        return self._zip.read(name)
+
+    def list_snapshot(self):
+        """列表加载完成时的快照 (meta, html)，没有时返回最后一个快照"""
+        snapshots = self.manifest.get("snapshots") or []
+        if not snapshots:
+            return None, None
+        matches = [meta for meta in snapshots if meta["label"] == LIST_SNAPSHOT] or snapshots
+        meta = matches[-1]
+        return meta, self.read(meta["file"]).decode("utf-8")
+
+    def pages(self):
+        """
+        回放服务器使用的 {路径?查询: (状态码, 内容类型, 正文)}
+        同一路径有快照时用最后一个快照（页面脚本执行后的 DOM），否则用录制的响应正文
+        """
+        pages = {}
+        for meta in self.manifest.get("responses") or []:
+            pages[_path_key(meta["url"])] = (
+                meta.get("status") or 200, meta.get("mime") or "text/html", self.read(meta["file"])
+            )
+        for meta in self.manifest.get("snapshots") or []:
+            html = self.read(meta["file"]).decode("utf-8")
+            pages[_path_key(meta["url"])] = (200, "text/html", _static_html(html).encode("utf-8"))
+        return pages
+
+    def close(self):
+        self._zip.close()
+
+
+def _path_key(url):
+    parsed = urlparse(url)
+    return (parsed.path.rstrip("/") or "/") + (f"?{parsed.query}" if parsed.query else "")
+
+
+def _static_html(html):
+    """快照已经是脚本执行后的 DOM：去掉脚本（不再请求线上接口）和提取时打的标记"""
+    return _SEEN_ATTR_RE.sub("", _SCRIPT_RE.sub("", html))
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    server_version = "JobsDBReplay/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        page = self.server.pages.get(_path_key(self.path))
+        if page is None:
+            status, content_type = 404, "text/html"
+            body = b"<!DOCTYPE html><html><head><title>404</title></head><body><h1>404 Not Found</h1></body></html>"
+        else:
+            status, content_type, body = page
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_replay_server(capture, host="127.0.0.1", port=0):
+    """在后台线程启动回放服务器，返回 (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.pages = capture.pages()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def _record_key(record):
+    # 回放时链接的域名不同，只比较路径
+    link = record.get("link") or ""
+    return urlparse(link).path or f"{record.get('title')}|{record.get('company')}"
+
+
+def compare_records(recorded, replayed):
+    """按链接路径对比两组记录"""
+    fields = ("title", "company", "date", "status")
+    expected = {_record_key(record): record for record in recorded}
+    actual = {_record_key(record): record for record in replayed}
+    changed = [
+        key for key in expected.keys() & actual.keys()
+        if any(expected[key].get(name) != actual[key].get(name) for name in fields)
+    ]
+    missing = [key for key in expected if key not in actual]
+    unexpected = [key for key in actual if key not in expected]
+    return {
+        "recorded": len(recorded),
+        "replayed": len(replayed),
+        "matched": len(expected.keys() & actual.keys()) - len(changed),
+        "missing": missing[:20],
+        "unexpected": unexpected[:20],
+        "changed": changed[:20],
+        "identical": not (missing or unexpected or changed),
+    }
+
+
+def _phase_durations(report):
+    if not report:
+        return {}
+    return {item["name"]: item["duration"] for item in report.get("phases", [])}
+
+
+def replay_offline(capture):
+    """离线回放：解析录制的列表快照"""
+    from offline_parser import parse_html, available, MISSING_DEPENDENCY
+
+    if not available():
+        raise RuntimeError(MISSING_DEPENDENCY)
+    meta, html = capture.list_snapshot()
+    if html is None:
+        raise ValueError("归档中没有 DOM 快照")
+    started = time.perf_counter()
+    _, _, records = parse_html(_static_html(html), meta["url"], workers=1)
+    return records, {"extraction": round(time.perf_counter() - started, 3)}
+
+
+def replay_browser(capture, headless=True):
+    """浏览器回放：在回放服务器上运行真实的 scrape_application_history"""
+    server, base_url = start_replay_server(capture)
+    # 每个归档的回放服务器地址不同，显式传入（jobsdb_scraper.JOBSDB_URL 只在首次导入时读取环境变量）
+    import jobsdb_scraper as scraper
+    from instrumentation import start_run, finish_run
+
+    start_run("replay")
+    driver = scraper.setup_driver(headless=headless)
+    try:
+        records = scraper.scrape_application_history(
+            driver, extract_mode=capture.manifest.get("extract_mode") or scraper.EXTRACT_MODE,
+            base_url=base_url
+        )
+    finally:
+        driver.quit()
+        server.shutdown()
+    return records, _phase_durations(finish_run(True, len(records)))
+
+
+def replay(path, mode="offline", headless=True):
+    """回放一个归档，返回对比报告"""
+    capture = Capture(path)
+    try:
+        started = time.perf_counter()
+        if mode == "browser":
+            records, phases = replay_browser(capture, headless)
+        else:
+            records, phases = replay_offline(capture)
+        elapsed = time.perf_counter() - started
+        recorded_timings = capture.manifest.get("timings") or {}
+        if capture.manifest.get("incremental"):
+            # 增量模式的录制结果只有变化的记录，无法与完整提取结果对比
+            comparison = {"replayed": len(records), "identical": True, "skipped": "incremental"}
+        else:
+            comparison = compare_records(capture.records, records)
+        return {
+            "archive": path,
+            "mode": mode,
+            "recorded_success": capture.manifest.get("success"),
+            "records": comparison,
+            "timing": {
+                "recorded_total": recorded_timings.get("total_duration"),
+                "replayed_total": round(elapsed, 3),
+                "recorded_phases": _phase_durations(recorded_timings),
+                "replayed_phases": phases,
+            },
+        }
+    finally:
+        capture.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放录制的爬取归档并与录制结果对比")
+    parser.add_argument("archives", nargs="+", help="录制归档（*.acr.zip）")
+    parser.add_argument("--mode", choices=["offline", "browser"], default="offline")
+    parser.add_argument("--headed", action="store_true", help="浏览器回放时显示窗口")
+    args = parser.parse_args()
+
+    reports = []
+    for path in args.archives:
+        try:
+            reports.append(replay(path, args.mode, headless=not args.headed))
+        except Exception as e:
+            reports.append({"archive": path, "mode": args.mode, "error": str(e)})
+    print(json.dumps({"replay": reports}, ensure_ascii=False, indent=2))
+    # 只对成功录制的归档要求结果一致；失败的录制用于复现问题
+    regressed = [
+        report for report in reports
+        if "error" in report or (report["recorded_success"] and not report["records"]["identical"])
+    ]
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""
+浏览器资源管控
+
+浏览器会话的生命周期超过单次请求之后（常驻 worker 的会话池），Chrome 内存会持续增长，
+chromedriver 可能在父进程崩溃后成为孤儿进程，标签页也可能卡死在某个 WebDriver 调用上。
+- SessionGovernor  跟踪一个会话的进程树（chromedriver 及其全部 Chrome 子进程）：
+                   后台定期采样 RSS 和 CPU 时间，统计导航次数（get / refresh / 前进后退），
+                   导航次数或内存超过上限时 recycle_reason() 给出回收原因
+- JobWatchdog      单个任务的硬超时：超时后强制结束浏览器进程树，阻塞在 WebDriver 调用上的任务
+                   随之失败并抛出 JobTimeout（set_page_load_timeout 只管单次页面加载）
+- shutdown_driver  关闭浏览器：driver.quit() 失败或超时时结束残留的进程，并返回结果，不再静默吞掉异常
+- reap_orphans     结束父进程已经退出的自动化 chrome / chromedriver 进程（只处理当前用户、
+                   带自动化参数的 Chrome，不会动用户自己打开的浏览器）
+
+进程信息优先用 psutil（见 requirements.txt），没有安装时在 Linux 上读取 /proc；两者都不可用时
+（没有 psutil 的 Windows）不采样也不清理孤儿进程，超时和关闭失败时退回到结束 chromedriver 本身
+（driver.service.process；Windows 上用 taskkill /T 连同 Chrome 子进程一起结束）。
+采样结果通过 stats() 给出（worker 的 stats 方法、运行报告和指标文件），用于估算主机容量。
+
+环境变量:
+    JOBSDB_MAX_NAVIGATIONS=300      会话累计导航次数上限，超过后回收
+    JOBSDB_MEMORY_CEILING_MB=1500   会话进程树的内存上限（MB），超过后回收
+    JOBSDB_JOB_TIMEOUT=900          单个任务的硬超时（秒），0 表示不限制
+"""
+import os
+import time
+import signal
+import threading
+import subprocess
+from collections import namedtuple
+
+from events import progress
+
+MAX_NAVIGATIONS = int(os.environ.get("JOBSDB_MAX_NAVIGATIONS", 300))
+MEMORY_CEILING_MB = float(os.environ.get("JOBSDB_MEMORY_CEILING_MB", 1500))
+JOB_TIMEOUT = int(os.environ.get("JOBSDB_JOB_TIMEOUT", 900))
+SAMPLE_INTERVAL = 2
+QUIT_TIMEOUT = 20
+# 发送 SIGTERM 后等待进程退出的时间，之后 SIGKILL
+KILL_GRACE = 3
+
+# 回收原因
+NAVIGATIONS = "navigations"
+MEMORY = "memory"
+
+_NAVIGATION_COMMANDS = {"get", "refresh", "goBack", "goForward"}
+_BROWSER_NAMES = ("chrome", "chromium", "headless_shell")
+_AUTOMATION_FLAGS = ("--enable-automation", "--test-type=webdriver", "--remote-debugging-port")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+_HAS_PROC = os.path.isdir("/proc/self")
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+# start 为进程启动时间，用来识别 pid 被系统复用的情况
+ProcessInfo = namedtuple("ProcessInfo", "pid ppid name start rss cpu zombie")
+
+
+class JobTimeout(Exception):
+    """任务超过硬超时，浏览器已被强制结束"""
+
+
+# ---- 进程信息 ----
+
+def available():
+    """能否读取进程信息"""
+    return psutil is not None or _HAS_PROC
+
+
+def _proc_info(pid):
+    """从 /proc/<pid>/stat 读取进程信息，进程不存在时返回 None"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            raw = f.read().decode("utf-8", "replace")
+    except OSError:
+        return None
+    # 进程名可能包含空格和括号，以最后一个 ')' 为界
+    name = raw[raw.index("(") + 1:raw.rindex(")")]
+    fields = raw[raw.rindex(")") + 2:].split()
+    return ProcessInfo(
+        pid=pid,
+        ppid=int(fields[1]),
+        name=name,
+        start=int(fields[19]),
+        rss=int(fields[21]) * _PAGE_SIZE,
+        cpu=(int(fields[11]) + int(fields[12])) / _CLOCK_TICKS,
+        zombie=fields[0] == "Z",
+    )
+
+
+def _psutil_info(process):
+    try:
+        with process.oneshot():
+            times = process.cpu_times()
+            return ProcessInfo(
+                pid=process.pid,
+                ppid=process.ppid(),
+                name=process.name(),
+                start=process.create_time(),
+                rss=process.memory_info().rss,
+                cpu=times.user + times.system,
+                zombie=process.status() == psutil.STATUS_ZOMBIE,
+            )
+    except psutil.Error:
+        return None
+
+
+def all_processes():
+    if psutil is not None:
+        return [info for info in map(_psutil_info, psutil.process_iter()) if info]
+    if _HAS_PROC:
+        return [info for info in (_proc_info(int(name)) for name in os.listdir("/proc") if name.isdigit())
+                if info]
+    return []
+
+
+def process_tree(pid):
+    """pid 及其全部子孙进程的信息（pid 不存在时为空列表）"""
+    if not pid:
+        return []
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return []
+        return [info for info in map(_psutil_info, processes) if info]
+    if not _HAS_PROC:
+        return []
+    processes = all_processes()
+    children = {}
+    for info in processes:
+        children.setdefault(info.ppid, []).append(info)
+    root = next((info for info in processes if info.pid == pid), None)
+    if root is None:
+        return []
+    tree, pending = [], [root]
+    while pending:
+        info = pending.pop()
+        tree.append(info)
+        pending.extend(children.get(info.pid, []))
+    return tree
+
+
+def _cmdline(pid):
+    if psutil is not None:
+        try:
+            return " ".join(psutil.Process(pid).cmdline())
+        except psutil.Error:
+            return ""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read().replace(b"\0", b" ").decode("utf-8", "replace")
+    except OSError:
+        return ""
+
+
+def _owned_by_me(pid):
+    if not hasattr(os, "getuid"):
+        return True
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).uids().real == os.getuid()
+        except psutil.Error:
+            return False
+    try:
+        return os.stat(f"/proc/{pid}").st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def _same_process(info):
+    """进程仍在运行（已退出但未被回收的僵尸进程不算）且不是复用了同一个 pid 的其他进程"""
+    if psutil is not None:
+        try:
+            current = _psutil_info(psutil.Process(info.pid))
+        except psutil.Error:
+            return False
+    else:
+        current = _proc_info(info.pid)
+    return current is not None and current.start == info.start and not current.zombie
+
+
+def kill_processes(processes, grace=KILL_GRACE):
+    """结束一组进程（先 SIGTERM，grace 秒后仍在运行的 SIGKILL），返回实际结束的进程数"""
+    targets = [info for info in processes if info.pid != os.getpid() and _same_process(info)]
+    for info in targets:
+        try:
+            os.kill(info.pid, signal.SIGTERM)
+        except OSError:
+            pass
+    deadline = time.time() + grace
+    remaining = targets
+    while remaining and time.time() < deadline:
+        time.sleep(0.1)
+        remaining = [info for info in remaining if _same_process(info)]
+    for info in remaining:
+        try:
+            os.kill(info.pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            pass
+    return len(targets)
+
+
+def driver_pid(driver):
+    """chromedriver 进程的 pid，取不到时返回 None"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def kill_driver_service(driver):
+    """
+    读取不到进程树时的兜底：结束 chromedriver 进程（Windows 上连同子进程），返回是否结束了进程
+    """
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is None or process.poll() is not None:
+        return False
+    if os.name == "nt":
+        try:
+            subprocess.run(["taskkill", "/PID", str(process.pid), "/T", "/F"],
+                           capture_output=True, timeout=KILL_GRACE * 5)
+        except (OSError, subprocess.SubprocessError):
+            pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+    return True
+
+
+def kill_driver(driver):
+    """强制结束浏览器进程树，返回结束的进程数"""
+    tree = process_tree(driver_pid(driver))
+    if tree:
+        return kill_processes(tree)
+    return int(kill_driver_service(driver))
+
+
+def reap_orphans():
+    """
+    结束父进程已经退出的 chromedriver，以及带自动化参数的孤儿 Chrome（连同它们的子进程）
+    返回结束的进程数
+    """
+    if not available():
+        return 0
+    processes = all_processes()
+    pids = {info.pid for info in processes}
+    mine = {info.pid for info in process_tree(os.getpid())}
+    reaped = 0
+    for info in processes:
+        orphaned = info.ppid in (0, 1) or info.ppid not in pids
+        if not orphaned or info.pid in mine or info.pid == 1:
+            continue
+        name = info.name.lower()
+        if "chromedriver" in name:
+            pass
+        elif any(browser in name for browser in _BROWSER_NAMES):
+            if not any(flag in _cmdline(info.pid) for flag in _AUTOMATION_FLAGS):
+                continue
+        else:
+            continue
+        if _owned_by_me(info.pid):
+            reaped += kill_processes(process_tree(info.pid))
+    return reaped
+
+
+def shutdown_driver(driver, timeout=QUIT_TIMEOUT):
+    """
+    关闭浏览器，返回 {"quit": 是否正常退出, "killed": 强制结束的进程数, "error": 错误信息}
+    driver.quit() 出错或 timeout 秒内没有返回时，结束整个进程树
+    """
+    tree = process_tree(driver_pid(driver))
+    outcome = {"error": None}
+    finished = threading.Event()
+
+    def quit_driver():
+        try:
+            driver.quit()
+        except Exception as e:
+            outcome["error"] = str(e) or e.__class__.__name__
+        finally:
+            finished.set()
+
+    threading.Thread(target=quit_driver, name="driver-quit", daemon=True).start()
+    if not finished.wait(timeout):
+        outcome["error"] = f"driver.quit() 超过 {timeout} 秒未返回"
+    # 正常退出后进程树也应当已经结束，残留的进程一并清理
+    killed = kill_processes([info for info in tree if _same_process(info)])
+    if outcome["error"] is not None and not tree:
+        killed += int(kill_driver_service(driver))
+    return {"quit": outcome["error"] is None, "killed": killed, "error": outcome["error"]}
+
+
+_warned = threading.Event()
+
+
+def _warn_unavailable():
+    """读取不到进程信息时提示一次，避免内存上限等配置悄悄失效"""
+    if not _warned.is_set():
+        _warned.set()
+        progress("warning", "无法读取进程信息（请安装 psutil），不采样浏览器内存和 CPU，内存上限不生效")
+
+
+# ---- 单个会话 ----
+
+class SessionGovernor:
+    """跟踪一个浏览器会话的资源占用和导航次数"""
+
+    def __init__(self, driver, max_navigations=MAX_NAVIGATIONS, memory_ceiling_mb=MEMORY_CEILING_MB,
+                 interval=SAMPLE_INTERVAL):
+        self.pid = driver_pid(driver)
+        self.max_navigations = max_navigations
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.interval = interval
+        self.navigations = 0
+        self.started_at = time.time()
+        self.last = None
+        self.peak_rss_mb = None
+        self.peak_processes = 0
+        self._cpu_mark = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._count_navigations(driver)
+
+    def _count_navigations(self, driver):
+        original_execute = driver.execute
+
+        def execute(driver_command, params=None):
+            if driver_command in _NAVIGATION_COMMANDS:
+                with self._lock:
+                    self.navigations += 1
+            return original_execute(driver_command, params)
+
+        driver.execute = execute
+
+    def sample(self):
+        """采样一次进程树，返回 {"processes", "rss_mb", "cpu_seconds", "cpu_percent"}；不可用时返回 None"""
+        tree = [info for info in process_tree(self.pid) if not info.zombie]
+        if not tree:
+            return None
+        now = time.perf_counter()
+        cpu = sum(info.cpu for info in tree)
+        rss_mb = round(sum(info.rss for info in tree) / (1024 * 1024), 1)
+        with self._lock:
+            cpu_percent = None
+            if self._cpu_mark is not None and now > self._cpu_mark[0]:
+                # 进程退出后 CPU 时间会变少，此时不计算
+                delta = cpu - self._cpu_mark[1]
+                cpu_percent = round(max(0.0, delta) / (now - self._cpu_mark[0]) * 100, 1)
+            self._cpu_mark = (now, cpu)
+            self.last = {
+                "processes": len(tree),
+                "rss_mb": rss_mb,
+                "cpu_seconds": round(cpu, 2),
+                "cpu_percent": cpu_percent,
+            }
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss_mb)
+            self.peak_processes = max(self.peak_processes, len(tree))
+            return self.last
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception:
+                # 采样失败不影响爬取
+                pass
+
+    def start(self):
+        """启动后台采样线程"""
+        if not available():
+            _warn_unavailable()
+        elif self.pid and self._thread is None:
+            self.sample()
+            self._thread = threading.Thread(target=self._run, name="governor-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def recycle_reason(self):
+        """需要回收会话时返回原因（navigations / memory），否则返回 None"""
+        if self.max_navigations and self.navigations >= self.max_navigations:
+            return NAVIGATIONS
+        sample = self.sample() or self.last
+        if self.memory_ceiling_mb and sample and sample["rss_mb"] >= self.memory_ceiling_mb:
+            return MEMORY
+        return None
+
+    def stats(self):
+        with self._lock:
+            last = dict(self.last) if self.last else {}
+            return dict(
+                last,
+                navigations=self.navigations,
+                peak_rss_mb=self.peak_rss_mb,
+                peak_processes=self.peak_processes,
+                age=round(time.time() - self.started_at, 1),
+            )
+
+
+# ---- 任务看门狗 ----
+
+class JobWatchdog:
+    """
+    单个任务的硬超时（上下文管理器）：超时后结束浏览器进程树，任务中的 WebDriver 调用随之失败，
+    退出上下文时抛出 JobTimeout；timeout 为 0 或 None 时不限制
+    """
+
+    def __init__(self, driver, timeout=JOB_TIMEOUT, on_timeout=None):
+        self.driver = driver
+        self.timeout = timeout
+        self.on_timeout = on_timeout
+        self.fired = False
+        self._timer = None
+
+    def _fire(self):
+        self.fired = True
+        # 此时任务线程可能阻塞在 WebDriver 调用上，只能从这里结束进程
+        progress("warning", f"任务超过 {self.timeout} 秒未完成，强制结束浏览器")
+        kill_driver(self.driver)
+        if self.on_timeout:
+            self.on_timeout()
+
+    def __enter__(self):
+        if self.timeout:
+            self._timer = threading.Timer(self.timeout, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.fired:
+            raise JobTimeout(f"任务超过 {self.timeout} 秒未完成，已强制结束浏览器") from exc
+        return False
+
+
+# ---- 主机信息 ----
+
+def host_info():
+    """主机的 CPU 数和内存，配合会话统计估算一台主机能承载多少个会话"""
+    info = {"cpu_count": os.cpu_count()}
+    if psutil is not None:
+        memory = psutil.virtual_memory()
+        info.update(memory_total_mb=round(memory.total / (1024 * 1024)),
+                    memory_available_mb=round(memory.available / (1024 * 1024)))
+    elif os.path.exists("/proc/meminfo"):
+        values = {}
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                values[key] = int(rest.split()[0]) if rest.split() else 0
+        info.update(memory_total_mb=round(values.get("MemTotal", 0) / 1024),
+                    memory_available_mb=round(values.get("MemAvailable", 0) / 1024))
+    return info
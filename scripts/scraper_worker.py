@@ -0,0 +1,613 @@
+"""
+常驻爬虫 worker
+
+维护一个有上限的预热 Chrome 会话池，通过 JSON-RPC（每行一个 JSON）接收爬取任务，
+避免每次请求都冷启动浏览器。
+
+用法:
+    python scraper_worker.py --listen 127.0.0.1:8765   # 本地 socket 模式
+    python scraper_worker.py --stdio                   # stdin/stdout 模式
+
+一次性 CLI 通过 `jobsdb_scraper.py <email> --worker 127.0.0.1:8765`
+（或环境变量 JOBSDB_WORKER_ADDR）作为瘦客户端转发任务。
+"""
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from enrich import ENRICH
+from exporters import FORMATS, DEFAULT_FORMAT
+from events import RECORD, as_event, write_event, summary_fields
+from instrumentation import phase, start_run, finish_and_export, attach_resources
+from jobsdb_scraper import setup_driver, scrape_account, EXTRACT_MODES
+from resource_governor import (
+    SessionGovernor, JobWatchdog, JobTimeout, shutdown_driver, reap_orphans, host_info,
+    MAX_NAVIGATIONS, MEMORY_CEILING_MB, JOB_TIMEOUT, NAVIGATIONS, MEMORY,
+)
+
+DEFAULT_WORKER_ADDR = "127.0.0.1:8765"
+
+# JSON-RPC 错误码
+RPC_PARSE_ERROR = -32700
+RPC_METHOD_NOT_FOUND = -32601
+RPC_INVALID_PARAMS = -32602
+RPC_JOB_FAILED = -32000
+
+# scrape 请求可以携带的任务参数及其类型（与 scrape_account 的参数对应），
+# 未知参数直接报错，避免客户端的选项被静默忽略
+JOB_OPTIONS = {
+    "extract_mode": str,
+    "http_fastpath": bool,
+    "incremental": bool,
+    "enrich": bool,
+    "resume": bool,
+    "mailbox": str,
+    "upload_url": str,
+    "skip_unchanged": bool,
+    "job_timeout": int,
+}
+
+
+def _job_options(params):
+    """校验 scrape 请求的任务参数，返回 (options, 错误信息)"""
+    options = {}
+    for name, value in params.items():
+        if name in ("email", "format"):
+            continue
+        expected = JOB_OPTIONS.get(name)
+        if expected is None:
+            return None, f"不支持的任务参数: {name}"
+        if value is None:
+            continue
+        if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+            return None, f"任务参数 {name} 应为 {expected.__name__}"
+        options[name] = value
+    if options.get("extract_mode", EXTRACT_MODES[0]) not in EXTRACT_MODES:
+        return None, f"不支持的提取方式: {options['extract_mode']}"
+    return options, None
+
+
+class PooledSession:
+    """池中的一个浏览器会话"""
+
+    def __init__(self, driver, governor):
+        self.driver = driver
+        self.governor = governor
+        self.account = None
+        self.uses = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+        self.in_use = False
+        self.suspect = False
+        self.timed_out = False
+
+
+class DriverPool:
+    """
+    有上限的 WebDriver 会话池
+    - 按账号租用：优先复用同一账号用过的会话（cookies 仍然有效）
+    - 租用前做健康检查，失效会话直接丢弃并重建
+    - 会话使用次数或空闲时间超限后回收
+    - 会话累计导航次数或进程树内存超过上限后回收（resource_governor）
+    - 每个任务有硬超时，超时的会话被强制结束；关闭会话后清理残留和孤儿浏览器进程
+    """
+
+    def __init__(self, max_size=2, min_idle=1, max_uses=20, max_idle=1800,
+                 lease_timeout=600, driver_factory=None, max_navigations=MAX_NAVIGATIONS,
+                 memory_ceiling_mb=MEMORY_CEILING_MB, job_timeout=JOB_TIMEOUT):
+        self.max_size = max_size
+        self.min_idle = min(min_idle, max_size)
+        self.max_uses = max_uses
+        self.max_idle = max_idle
+        self.lease_timeout = lease_timeout
+        self.driver_factory = driver_factory or setup_driver
+        self.max_navigations = max_navigations
+        self.memory_ceiling_mb = memory_ceiling_mb
+        self.job_timeout = job_timeout
+
+        self._sessions = []
+        self._pending = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._counters = {
+            "created": 0, "recycled": 0, "unhealthy": 0, "leases": 0,
+            NAVIGATIONS: 0, MEMORY: 0, "watchdog": 0, "quit_failed": 0, "reaped": 0,
+        }
+
+    # ---- 会话生命周期 ----
+
+    def _create(self):
+        driver = self.driver_factory()
+        governor = SessionGovernor(driver, self.max_navigations, self.memory_ceiling_mb).start()
+        with self._cond:
+            self._counters["created"] += 1
+        return PooledSession(driver, governor)
+
+    def _discard(self, session, reason="recycled"):
+        """从池中移除会话并关闭浏览器（在锁外调用）"""
+        with self._cond:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            self._counters[reason] += 1
+            self._cond.notify_all()
+        session.governor.stop()
+        outcome = shutdown_driver(session.driver)
+        reaped = reap_orphans()
+        with self._cond:
+            self._counters["reaped"] += reaped
+            if outcome["error"]:
+                self._counters["quit_failed"] += 1
+        if outcome["error"]:
+            print(json.dumps({
+                "status": "warning",
+                "message": f"关闭浏览器会话失败: {outcome['error']}，已结束 {outcome['killed']} 个残留进程"
+            }, ensure_ascii=False), file=sys.stderr)
+
+    def _is_healthy(self, session):
+        try:
+            session.driver.execute_script("return document.readyState")
+            session.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def _recycle_reason(self, session):
+        """会话需要回收时返回原因（计数器名），否则返回 None"""
+        if session.uses >= self.max_uses or time.time() - session.last_used > self.max_idle:
+            return "recycled"
+        return session.governor.recycle_reason()
+
+    def _reset_for_account(self, session, account):
+        """会话换给另一个账号前清空浏览器状态，避免串号"""
+        try:
+            session.driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            session.driver.delete_all_cookies()
+        session.driver.get("about:blank")
+        session.account = account
+
+    def _pick_idle(self, account):
+        idle = [s for s in self._sessions if not s.in_use]
+        if not idle:
+            return None
+        for s in idle:
+            if s.account == account:
+                return s
+        for s in idle:
+            if s.account is None:
+                return s
+        # 借用其他账号最久未使用的会话
+        return min(idle, key=lambda s: s.last_used)
+
+    def prewarm(self, count=None):
+        """预先启动浏览器，直到空闲会话数达到 min_idle"""
+        target = self.min_idle if count is None else min(count, self.max_size)
+        while True:
+            with self._cond:
+                idle = sum(1 for s in self._sessions if not s.in_use)
+                total = len(self._sessions) + self._pending
+                if self._closed or idle + self._pending >= target or total >= self.max_size:
+                    return
+                self._pending += 1
+            try:
+                session = self._create()
+            finally:
+                with self._cond:
+                    self._pending -= 1
+            with self._cond:
+                self._sessions.append(session)
+                self._cond.notify_all()
+
+    def _replenish_async(self):
+        threading.Thread(target=self._safe_prewarm, daemon=True).start()
+
+    def _safe_prewarm(self):
+        try:
+            self.prewarm()
+        except Exception as e:
+            print(json.dumps({
+                "status": "warning",
+                "message": f"预热浏览器失败: {str(e)}"
+            }), file=sys.stderr)
+
+    # ---- 租用 / 归还 ----
+
+    def _acquire(self, account):
+        deadline = time.time() + self.lease_timeout
+        while True:
+            session = None
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("会话池已关闭")
+                session = self._pick_idle(account)
+                if session:
+                    session.in_use = True
+                elif len(self._sessions) + self._pending < self.max_size:
+                    self._pending += 1
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError("等待空闲浏览器会话超时")
+                    self._cond.wait(remaining)
+                    continue
+
+            if session is None:
+                try:
+                    session = self._create()
+                finally:
+                    with self._cond:
+                        self._pending -= 1
+                session.in_use = True
+                with self._cond:
+                    self._sessions.append(session)
+            else:
+                reason = self._recycle_reason(session)
+                if reason is None and not self._is_healthy(session):
+                    reason = "unhealthy"
+                if reason:
+                    self._discard(session, reason)
+                    continue
+
+            if session.account != account:
+                try:
+                    self._reset_for_account(session, account)
+                except Exception:
+                    self._discard(session, "unhealthy")
+                    continue
+
+            with self._cond:
+                self._counters["leases"] += 1
+            return session
+
+    def _release(self, session):
+        session.uses += 1
+        session.last_used = time.time()
+        reason = self._recycle_reason(session)
+        if session.timed_out:
+            reason = "watchdog"
+        elif session.suspect and not self._is_healthy(session):
+            reason = "unhealthy"
+        if reason:
+            self._discard(session, reason)
+            self._replenish_async()
+            return
+        with self._cond:
+            session.suspect = False
+            session.in_use = False
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, account, job_timeout=None):
+        """租用一个属于 account 的浏览器会话；job_timeout 覆盖本次任务的硬超时"""
+        with phase("driver_startup"):
+            session = self._acquire(account)
+        # 运行报告和指标文件里带上该会话的资源占用
+        attach_resources(session.governor.stats)
+        try:
+            with JobWatchdog(session.driver, self.job_timeout if job_timeout is None else job_timeout):
+                yield session.driver
+        except JobTimeout:
+            session.timed_out = True
+            raise
+        except Exception:
+            session.suspect = True
+            raise
+        finally:
+            self._release(session)
+
+    def stats(self):
+        with self._cond:
+            now = time.time()
+            return {
+                "max_size": self.max_size,
+                "size": len(self._sessions),
+                "in_use": sum(1 for s in self._sessions if s.in_use),
+                "pending": self._pending,
+                "counters": dict(self._counters),
+                "limits": {
+                    "max_uses": self.max_uses,
+                    "max_navigations": self.max_navigations,
+                    "memory_ceiling_mb": self.memory_ceiling_mb,
+                    "job_timeout": self.job_timeout,
+                },
+                # 所有会话进程树最近一次采样的内存之和，配合 host 估算主机能承载的会话数
+                "browser_rss_mb": round(sum(
+                    s.governor.stats().get("rss_mb") or 0 for s in self._sessions
+                ), 1),
+                "host": host_info(),
+                "sessions": [{
+                    "uses": s.uses,
+                    "in_use": s.in_use,
+                    "has_account": s.account is not None,
+                    "age": round(now - s.created_at, 1),
+                    "idle": round(now - s.last_used, 1),
+                    "resources": s.governor.stats(),
+                } for s in self._sessions],
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            sessions = list(self._sessions)
+            self._cond.notify_all()
+        for session in sessions:
+            self._discard(session, "recycled")
+
+
+class _ThreadRoutedStdout:
+    """
+    按线程转发 stdout
+    任务线程里 scrape_account 打印的状态消息会被转发给对应的客户端，其余输出照常写出
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def bind(self, sink):
+        self._local.sink = sink
+        self._local.buffer = ""
+
+    def unbind(self):
+        self._flush_line_buffer(final=True)
+        self._local.sink = None
+
+    def _flush_line_buffer(self, final=False):
+        sink = getattr(self._local, "sink", None)
+        if sink is None:
+            return
+        lines = self._local.buffer.split("\n")
+        self._local.buffer = "" if final else lines.pop()
+        for line in lines:
+            if line.strip():
+                sink(line)
+
+    def write(self, data):
+        if getattr(self._local, "sink", None) is None:
+            return self._default.write(data)
+        self._local.buffer += data
+        self._flush_line_buffer()
+        return len(data)
+
+    def flush(self):
+        if getattr(self._local, "sink", None) is None:
+            self._default.flush()
+
+
+def _progress_notification(job_id, line):
+    try:
+        params = json.loads(line)
+    except ValueError:
+        params = {"status": "log", "message": line}
+    if not isinstance(params, dict):
+        params = {"status": "log", "message": line}
+    params["job_id"] = job_id
+    return {"jsonrpc": "2.0", "method": "progress", "params": params}
+
+
+class ScraperWorker:
+    """JSON-RPC 方法分发：scrape / ping / stats / shutdown"""
+
+    def __init__(self, pool, stdout_router):
+        self.pool = pool
+        self.router = stdout_router
+        self.shutdown_callback = None
+
+    def handle(self, request, send):
+        """处理一条请求，send(obj) 用于发送通知和最终响应"""
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        def reply_error(code, message):
+            if request_id is not None:
+                send({"jsonrpc": "2.0", "id": request_id,
+                      "error": {"code": code, "message": message}})
+
+        if method == "ping":
+            result = "pong"
+        elif method == "stats":
+            result = self.pool.stats()
+        elif method == "shutdown":
+            result = "bye"
+            if self.shutdown_callback:
+                threading.Thread(target=self.shutdown_callback, daemon=True).start()
+        elif method == "scrape":
+            email = params.get("email")
+            if not email:
+                return reply_error(RPC_INVALID_PARAMS, "未提供邮箱地址")
+            export_format = params.get("format") or DEFAULT_FORMAT
+            if export_format not in FORMATS:
+                return reply_error(RPC_INVALID_PARAMS, f"不支持的导出格式: {export_format}")
+            options, error = _job_options(params)
+            if error:
+                return reply_error(RPC_INVALID_PARAMS, error)
+            options.setdefault("enrich", ENRICH)
+            job_timeout = options.pop("job_timeout", None)
+            self.router.bind(lambda line: send(_progress_notification(request_id, line)))
+            # 计时从租用浏览器开始，排队和新建浏览器的时间计入 driver_startup
+            start_run(email)
+            try:
+                with self.pool.lease(email, job_timeout) as driver:
+                    # 记录已经作为进度通知逐条发出，响应里只带汇总
+                    result = summary_fields(
+                        scrape_account(driver, email, export_format=export_format, **options)
+                    )
+            except Exception as e:
+                finish_and_export(False)
+                return reply_error(RPC_JOB_FAILED, str(e))
+            finally:
+                self.router.unbind()
+        else:
+            return reply_error(RPC_METHOD_NOT_FOUND, f"未知方法: {method}")
+
+        if request_id is not None:
+            send({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+
+def _parse_request(line):
+    try:
+        request = json.loads(line)
+        if isinstance(request, dict):
+            return request, None
+    except ValueError:
+        pass
+    return None, {"jsonrpc": "2.0", "id": None,
+                  "error": {"code": RPC_PARSE_ERROR, "message": "无效的 JSON-RPC 请求"}}
+
+
+def serve_stdio(worker, rpc_out):
+    """stdin 每行一个请求，响应和进度通知写到 rpc_out；任务并发数等于池大小"""
+    write_lock = threading.Lock()
+
+    def send(obj):
+        with write_lock:
+            rpc_out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            rpc_out.flush()
+
+    with ThreadPoolExecutor(max_workers=worker.pool.max_size) as executor:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            request, error = _parse_request(line)
+            if error:
+                send(error)
+                continue
+            if request.get("method") == "shutdown":
+                worker.handle(request, send)
+                break
+            executor.submit(worker.handle, request, send)
+
+
+class _RpcHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        write_lock = threading.Lock()
+
+        def send(obj):
+            with write_lock:
+                self.wfile.write((json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            request, error = _parse_request(line)
+            if error:
+                send(error)
+                continue
+            self.server.worker.handle(request, send)
+
+
+class _RpcServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve_socket(worker, address):
+    host, port = _split_address(address)
+    with _RpcServer((host, port), _RpcHandler) as server:
+        server.worker = worker
+        worker.shutdown_callback = server.shutdown
+        print(json.dumps({
+            "status": "info",
+            "message": f"worker 已启动，监听 {host}:{port}"
+        }), file=sys.stderr)
+        server.serve_forever()
+
+
+def _split_address(address):
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def submit_job(address, email, timeout=900, export_format=None, **options):
+    """
+    瘦客户端：把爬取任务交给常驻 worker
+    options 为任务参数（见 JOB_OPTIONS），值为 None 的沿用 worker 的默认配置；
+    进度通知按事件协议原样写到 stdout（与直接运行脚本时的输出一致），返回最终汇总
+    """
+    host, port = _split_address(address)
+    params = {"email": email}
+    if export_format:
+        params["format"] = export_format
+    params.update((name, value) for name, value in options.items() if value is not None)
+    request = {"jsonrpc": "2.0", "id": 1, "method": "scrape", "params": params}
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        for raw in conn.makefile("rb"):
+            message = json.loads(raw.decode("utf-8"))
+            if message.get("method") == "progress":
+                params = message.get("params", {})
+                params.pop("job_id", None)
+                event = as_event(params)
+                # record 事件由后续的事件一并 flush
+                write_event(event, flush=event["event"] != RECORD)
+            elif message.get("id") == 1:
+                if "error" in message:
+                    raise Exception(message["error"].get("message", "worker 执行失败"))
+                return message["result"]
+    raise Exception("worker 连接意外关闭")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JobsDB 常驻爬虫 worker")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--listen", default=DEFAULT_WORKER_ADDR, help="监听地址 host:port")
+    mode.add_argument("--stdio", action="store_true", help="使用 stdin/stdout 传输 JSON-RPC")
+    parser.add_argument("--pool-size", type=int, default=2, help="最多同时保持的浏览器数")
+    parser.add_argument("--min-idle", type=int, default=1, help="启动时预热的浏览器数")
+    parser.add_argument("--max-uses", type=int, default=20, help="单个会话最多执行的任务数")
+    parser.add_argument("--max-idle", type=int, default=1800, help="会话最长空闲秒数")
+    parser.add_argument("--max-navigations", type=int, default=MAX_NAVIGATIONS,
+                        help="单个会话累计导航次数上限，超过后回收")
+    parser.add_argument("--memory-ceiling", type=float, default=MEMORY_CEILING_MB,
+                        help="单个会话进程树的内存上限（MB），超过后回收")
+    parser.add_argument("--job-timeout", type=int, default=JOB_TIMEOUT,
+                        help="单个任务的硬超时（秒），超时后强制结束浏览器")
+    parser.add_argument("--headless", action="store_true", help="以无头模式启动浏览器")
+    args = parser.parse_args()
+
+    # 状态消息不能混进 JSON-RPC 通道：默认写到 stderr，任务线程内转发给客户端
+    rpc_out = sys.stdout
+    router = _ThreadRoutedStdout(sys.stderr)
+    sys.stdout = router
+
+    pool = DriverPool(
+        max_size=args.pool_size,
+        min_idle=args.min_idle,
+        max_uses=args.max_uses,
+        max_idle=args.max_idle,
+        driver_factory=lambda: setup_driver(headless=args.headless),
+        max_navigations=args.max_navigations,
+        memory_ceiling_mb=args.memory_ceiling,
+        job_timeout=args.job_timeout,
+    )
+    worker = ScraperWorker(pool, router)
+    try:
+        # 上一个 worker 崩溃时留下的浏览器进程
+        reaped = reap_orphans()
+        if reaped:
+            print(json.dumps({
+                "status": "info",
+                "message": f"已清理 {reaped} 个残留的浏览器进程"
+            }, ensure_ascii=False), file=sys.stderr)
+        pool.prewarm()
+        if args.stdio:
+            serve_stdio(worker, rpc_out)
+        else:
+            serve_socket(worker, args.listen)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
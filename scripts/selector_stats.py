@@ -0,0 +1,164 @@
+"""
+自适应选择器统计
+
+记录每个候选选择器（按页面类型和字段分组）的命中与未命中次数，
+下次运行时按近期成功率重新排序候选列表，让最可能命中的选择器排在最前面。
+
+- 分数是指数衰减的命中率：命中 score = score * DECAY + 1，未命中 score = score * DECAY
+- 候选列表本身（代码里的定义）变化时，对应分组的统计自动作废
+- 某个分组的候选全部未命中，说明 JobsDB 很可能改了页面结构，该分组统计清零
+- 也可以手动清空：python selector_stats.py --reset [page]
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+
+STATS_FILE = "selector_stats.json"
+
+DECAY = 0.8
+
+_lock = threading.Lock()
+_store = None
+
+
+def _fingerprint(selectors):
+    return hashlib.sha1("\n".join(selectors).encode("utf-8")).hexdigest()[:12]
+
+
+class SelectorStats:
+    """选择器统计存储，按 "页面:字段" 分组持久化到 JSON 文件"""
+
+    def __init__(self, filepath=STATS_FILE):
+        self.filepath = filepath
+        self.groups = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.filepath):
+            return {}
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                return json.load(f).get("groups", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        tmp_path = f"{self.filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"groups": self.groups}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.filepath)
+
+    def _group(self, page, field, selectors):
+        key = f"{page}:{field}"
+        fingerprint = _fingerprint(sorted(selectors))
+        group = self.groups.get(key)
+        if group is None or group.get("fingerprint") != fingerprint:
+            # 候选列表变了，旧统计不再可信
+            group = self.groups[key] = {"fingerprint": fingerprint, "selectors": {}}
+        return group
+
+    def _entry(self, group, selector):
+        return group["selectors"].setdefault(
+            selector, {"hits": 0, "misses": 0, "score": 0.0, "last_hit": None}
+        )
+
+    def ordered(self, page, field, selectors):
+        """按分数从高到低排列候选选择器，分数相同时保持原顺序"""
+        with _lock:
+            group = self._group(page, field, selectors)
+            scores = {
+                selector: group["selectors"].get(selector, {}).get("score", 0.0)
+                for selector in selectors
+            }
+        return sorted(selectors, key=lambda selector: -scores[selector])
+
+    def record_counts(self, page, field, selectors, hits, misses):
+        """
+        批量记录一组候选的命中/未命中次数（hits、misses 与 selectors 一一对应）
+        全部未命中时清零该分组
+        """
+        with _lock:
+            group = self._group(page, field, selectors)
+            if not any(hits):
+                if any(misses):
+                    group["selectors"] = {}
+                    self.save()
+                return
+            now = time.strftime("%Y-%m-%dT%H:%M:%S")
+            for selector, hit_count, miss_count in zip(selectors, hits, misses):
+                if not hit_count and not miss_count:
+                    continue
+                entry = self._entry(group, selector)
+                entry["hits"] += hit_count
+                entry["misses"] += miss_count
+                # 一批结果按命中率折算成一次衰减更新
+                rate = hit_count / (hit_count + miss_count)
+                entry["score"] = round(entry["score"] * DECAY + rate, 4)
+                if hit_count:
+                    entry["last_hit"] = now
+            self.save()
+
+    def record_match(self, page, field, ranked, matched):
+        """
+        记录一次探测结果：matched 为命中的选择器（None 表示全部未命中），
+        排在它前面的候选视为未命中
+        """
+        if matched is None:
+            hits = [0] * len(ranked)
+            misses = [1] * len(ranked)
+        else:
+            position = ranked.index(matched)
+            hits = [1 if i == position else 0 for i in range(len(ranked))]
+            misses = [1 if i < position else 0 for i in range(len(ranked))]
+        self.record_counts(page, field, ranked, hits, misses)
+
+    def reset(self, page=None):
+        with _lock:
+            if page is None:
+                self.groups = {}
+            else:
+                self.groups = {
+                    key: group for key, group in self.groups.items()
+                    if not key.startswith(f"{page}:")
+                }
+            self.save()
+
+
+def get_stats():
+    """进程内共享的统计实例"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = SelectorStats()
+        return _store
+
+
+def probe_any(driver, page, field, selectors, timeout, label=None):
+    """
+    用一次组合等待同时探测所有候选选择器（按统计排序），返回命中的选择器或 None
+    替代逐个选择器串行等待，最坏情况下也只等一个 timeout
+    """
+    from waits import wait_for, first_matching_selector
+    from instrumentation import count_failed_lookup
+
+    stats = get_stats()
+    ranked = stats.ordered(page, field, selectors)
+    matched = wait_for(driver, first_matching_selector(ranked), timeout, label or f"{page}:{field}")
+    stats.record_match(page, field, ranked, matched or None)
+    if not matched:
+        count_failed_lookup()
+    return matched or None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="查看或清空选择器统计")
+    parser.add_argument("--reset", nargs="?", const="", default=None, metavar="PAGE",
+                        help="清空统计；指定页面类型时只清空该页面")
+    args = parser.parse_args()
+
+    stats = SelectorStats()
+    if args.reset is not None:
+        stats.reset(args.reset or None)
+    print(json.dumps({"groups": stats.groups}, ensure_ascii=False, indent=2))
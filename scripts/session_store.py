@@ -0,0 +1,189 @@
+"""
+按账号保存的登录会话
+
+每个账号一个 JSON 文件（sessions/<account_key>/session.json，不使用 pickle），记录：
+- cookies（WebDriver 格式）
+- 保存时间、最近一次确认会话有效的时间
+- 登录相关 cookies 的最早过期时间
+
+登录流程据此决定：
+- 没有会话或登录 cookies 已过期：直接走登录，不加载任何页面
+- 最近确认过有效：用 CDP 注入 cookies 后直接开始爬取
+- 其他情况：用 cookies 发一个不跟随重定向、不下载正文的 HTTP 请求验证，
+  而不是渲染首页查找 "Sign in" 链接
+"""
+import os
+import re
+import json
+import time
+import threading
+
+from accounts import account_dir, SESSIONS_DIR
+
+SESSION_FILE = "session.json"
+FORMAT_VERSION = 1
+# 距离上次确认有效不超过这么久（秒）时跳过验证
+VERIFY_TTL = int(os.environ.get("JOBSDB_SESSION_VERIFY_TTL", 1800))
+# 名称匹配的 cookies 视为登录凭据，用它们的过期时间判断会话是否过期
+AUTH_COOKIE_PATTERN = re.compile(r"session|auth|token|sid|jwt", re.I)
+
+# 验证结果
+VALID = "valid"
+INVALID = "invalid"
+UNKNOWN = "unknown"
+
+_lock = threading.Lock()
+
+
+def session_file(email, base_dir=SESSIONS_DIR):
+    return os.path.join(account_dir(email, base_dir), SESSION_FILE)
+
+
+def auth_expiry(cookies):
+    """
+    登录 cookies 中最早的过期时间（Unix 秒）
+    没有登录 cookies 时看全部 cookies；都是会话 cookies（无过期时间）时返回 None
+    """
+    auth = [c for c in cookies if AUTH_COOKIE_PATTERN.search(c.get("name", ""))] or cookies
+    expiries = [c["expiry"] for c in auth if c.get("expiry")]
+    return min(expiries) if expiries else None
+
+
+class SessionState:
+    """一个账号已保存的会话"""
+
+    def __init__(self, cookies, saved_at=None, last_verified=None, expires_at=None):
+        self.cookies = cookies
+        self.saved_at = saved_at
+        self.last_verified = last_verified
+        self.expires_at = expires_at
+
+    @property
+    def expired(self):
+        if not self.cookies:
+            return True
+        return self.expires_at is not None and self.expires_at <= time.time()
+
+    def verified_recently(self, ttl=VERIFY_TTL):
+        return bool(self.last_verified) and time.time() - self.last_verified < ttl
+
+    def to_dict(self):
+        return {
+            "version": FORMAT_VERSION,
+            "saved_at": self.saved_at,
+            "last_verified": self.last_verified,
+            "expires_at": self.expires_at,
+            "cookies": self.cookies,
+        }
+
+
+class SessionStore:
+    """读写 sessions/<account_key>/session.json"""
+
+    def __init__(self, base_dir=SESSIONS_DIR):
+        self.base_dir = base_dir
+
+    def _path(self, email):
+        return session_file(email, self.base_dir)
+
+    def load(self, email):
+        """读取会话，不存在或无法解析时返回 None"""
+        path = self._path(email)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != FORMAT_VERSION:
+            return None
+        return SessionState(
+            data.get("cookies") or [], data.get("saved_at"),
+            data.get("last_verified"), data.get("expires_at"),
+        )
+
+    def _write(self, email, state):
+        path = self._path(email)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with _lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state.to_dict(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+
+    def save(self, email, cookies, verified=True):
+        """登录成功后保存 cookies（刚登录成功的会话视为已验证）"""
+        now = time.time()
+        state = SessionState(cookies, now, now if verified else None, auth_expiry(cookies))
+        self._write(email, state)
+        return state
+
+    def mark_verified(self, email, cookies=None):
+        """确认会话仍然有效；提供 cookies 时一并更新（服务器可能续期了 cookies）"""
+        state = self.load(email)
+        if state is None and cookies is None:
+            return
+        if cookies is not None:
+            state = SessionState(cookies, time.time(), None, auth_expiry(cookies))
+        state.last_verified = time.time()
+        self._write(email, state)
+
+    def clear_verified(self, email):
+        """不再信任之前的验证结果（会话仍保留，下次使用前重新验证）"""
+        state = self.load(email)
+        if state is not None and state.last_verified:
+            state.last_verified = None
+            self._write(email, state)
+
+    def invalidate(self, email):
+        path = self._path(email)
+        with _lock:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def inject_cookies(driver, cookies):
+    """
+    用 CDP 把 cookies 写入浏览器，不需要先打开目标域名的页面
+    CDP 不可用时返回 False，调用方需要先导航到域名再用 add_cookie
+    """
+    params = []
+    for cookie in cookies:
+        item = {
+            "name": cookie["name"],
+            "value": cookie["value"],
+            "domain": cookie.get("domain"),
+            "path": cookie.get("path", "/"),
+            "secure": cookie.get("secure", False),
+            "httpOnly": cookie.get("httpOnly", False),
+        }
+        if cookie.get("expiry"):
+            item["expires"] = cookie["expiry"]
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            item["sameSite"] = cookie["sameSite"]
+        params.append(item)
+    try:
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+        return True
+    except Exception:
+        return False
+
+
+def validate_session(cookies, url, user_agent=None):
+    """
+    用 cookies 对需要登录的页面发一个轻量请求判断会话是否有效
+    返回 VALID / INVALID / UNKNOWN（网络错误、页面不存在等无法判断的情况）
+    """
+    from http_fastpath import session_from_cookies
+    from url_resolver import probe_url, OK, REDIRECT, LOGIN_REQUIRED
+
+    session = session_from_cookies(cookies, user_agent, pool_size=1)
+    try:
+        kind, _, _ = probe_url(session, url)
+    finally:
+        session.close()
+    if kind == LOGIN_REQUIRED:
+        return INVALID
+    if kind in (OK, REDIRECT):
+        return VALID
+    return UNKNOWN
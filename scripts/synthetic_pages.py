@@ -0,0 +1,125 @@
+"""
+合成的 JobsDB 申请记录页面
+
+生成与 jobsdb_selectors 中不同候选选择器对应的卡片标记，供离线解析基准测试
+和本地替身服务器使用。每条记录的内容由序号确定，便于核对解析结果。
+职位详情页同理（synthetic_detail / render_detail_page）。
+"""
+import json
+
+# 标记变体：分别命中卡片/字段候选列表里的不同选择器
+VARIANTS = ("automation", "classic", "styled")
+
+STATUSES = ["已投递", "已查看", "邀请面试", "未通过"]
+LOCATIONS = ["Central, Hong Kong Island", "Kwun Tong, Kowloon", "Sha Tin, New Territories"]
+WORK_TYPES = [("FULL_TIME", "Full time"), ("CONTRACT", "Contract"), ("PART_TIME", "Part time")]
+
+
+def synthetic_record(index, base_url=""):
+    """第 index 条合成记录的期望字段"""
+    return {
+        "title": f"Software Engineer {index}",
+        "company": f"Company {index % 97}",
+        "date": f"2025-{(index % 12) + 1:02d}-{(index % 28) + 1:02d}",
+        "status": STATUSES[index % len(STATUSES)],
+        "link": f"{base_url}/job/{100000 + index}",
+    }
+
+
+def synthetic_detail(index):
+    """第 index 条记录详情页的期望补充字段"""
+    low = 20000 + (index % 10) * 1000
+    return {
+        "location": LOCATIONS[index % len(LOCATIONS)],
+        "salary": f"HKD {low:,} - {low + 5000:,} per month",
+        "work_type": WORK_TYPES[index % len(WORK_TYPES)][1],
+        "description": f"Build and maintain services for team {index}. Python and SQL required.",
+    }
+
+
+def render_detail_page(index, json_ld=True):
+    """
+    渲染第 index 条记录的职位详情页
+    json_ld=True 时内嵌 JobPosting JSON-LD，否则只有 data-automation 字段
+    """
+    record = synthetic_record(index)
+    detail = synthetic_detail(index)
+    low = 20000 + (index % 10) * 1000
+    head = ""
+    if json_ld:
+        locality, region = detail["location"].split(", ")
+        posting = {
+            "@context": "https://schema.org",
+            "@type": "JobPosting",
+            "title": record["title"],
+            "hiringOrganization": {"@type": "Organization", "name": record["company"]},
+            "jobLocation": {"@type": "Place", "address": {
+                "@type": "PostalAddress", "addressLocality": locality, "addressRegion": region,
+            }},
+            "baseSalary": {"@type": "MonetaryAmount", "currency": "HKD", "value": {
+                "@type": "QuantitativeValue", "minValue": low, "maxValue": low + 5000, "unitText": "MONTH",
+            }},
+            "employmentType": WORK_TYPES[index % len(WORK_TYPES)][0],
+            "description": f"<p>{detail['description']}</p>",
+        }
+        head = f'<script type="application/ld+json">{json.dumps(posting)}</script>'
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{record['title']}</title>{head}</head><body><main>"
+        f"<h1 data-automation='job-detail-title'>{record['title']}</h1>"
+        f"<span data-automation='job-detail-location'>{detail['location']}</span>"
+        f"<span data-automation='job-detail-salary'>{detail['salary']}</span>"
+        f"<span data-automation='job-detail-work-type'>{detail['work_type']}</span>"
+        f"<div data-automation='jobAdDetails'><p>{detail['description']}</p></div>"
+        "</main></body></html>"
+    )
+
+
+def render_card(index, variant="automation"):
+    record = synthetic_record(index)
+    href = record["link"]
+    if variant == "automation":
+        return (
+            f'<div data-automation="job-card">'
+            f'<a href="{href}"><span data-automation="job-title">{record["title"]}</span></a>'
+            f'<span data-automation="company-name">{record["company"]}</span>'
+            f'<time datetime="{record["date"]}">{record["date"]}</time>'
+            f'<span data-automation="status">{record["status"]}</span>'
+            f'</div>'
+        )
+    if variant == "classic":
+        return (
+            f'<div class="job-card">'
+            f'<h3 class="job-title"><a href="{href}">{record["title"]}</a></h3>'
+            f'<div class="company-name">{record["company"]}</div>'
+            f'<span class="apply-date">{record["date"]}</span>'
+            f'<span class="status badge">{record["status"]}</span>'
+            f'</div>'
+        )
+    if variant == "styled":
+        return (
+            f'<article class="ApplicationCard_root__x1">'
+            f'<a class="CardLink_anchor__x2" href="{href}">'
+            f'<div class="JobTitle_text__y1">{record["title"]}</div></a>'
+            f'<div class="CompanyName_text__y2">{record["company"]}</div>'
+            f'<span class="ApplyDate_date__y3">{record["date"]}</span>'
+            f'<span class="Status_pill__y4">{record["status"]}</span>'
+            f'</article>'
+        )
+    raise ValueError(f"未知的标记变体: {variant}")
+
+
+def render_cards(start, stop, variant="automation"):
+    return "\n".join(render_card(i, variant) for i in range(start, stop))
+
+
+def render_applications_page(count, variant="automation", extra_head="", extra_body=""):
+    """渲染包含 count 张卡片的完整申请记录页面"""
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>My applications</title>{extra_head}</head><body>"
+        "<header><button data-automation='user-menu'>Account</button></header>"
+        "<main><div data-automation='job-list' id='job-list'>"
+        f"{render_cards(0, count, variant)}"
+        f"</div></main>{extra_body}</body></html>"
+    )
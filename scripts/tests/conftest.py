@@ -0,0 +1,28 @@
+"""
+scripts/ 下的模块以顶层模块互相导入（与直接运行脚本时一致），测试同样把 scripts/ 放进 sys.path
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobsdb_standin import StandinConfig, start_standin  # noqa: E402
+
+
+@pytest.fixture
+def standin():
+    """启动替身服务器，返回 start(**配置) -> (config, base_url)，测试结束后关闭"""
+    servers = []
+
+    def start(**options):
+        config = StandinConfig(**options)
+        server, base_url = start_standin(config=config)
+        servers.append(server)
+        return config, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,136 @@
+"""HTTP 快速路径（http_fastpath）对替身服务器的抓取"""
+import pytest
+
+from http_fastpath import (
+    FastPathUnavailable, fetch_applications, fetch_applications_via_http, session_from_cookies,
+)
+from jobsdb_standin import APPLICATIONS_PATH, SESSION_COOKIE, SESSION_VALUE
+from offline_parser import available as offline_parser_available
+from synthetic_pages import synthetic_record
+
+
+def _session(logged_in=True):
+    # 与 WebDriver 返回的 cookies 格式一致
+    cookies = [{"name": SESSION_COOKIE, "value": SESSION_VALUE, "domain": "127.0.0.1"}] if logged_in else []
+    return session_from_cookies(cookies)
+
+
+@pytest.mark.parametrize("payload", [
+    True,
+    pytest.param(False, marks=pytest.mark.skipif(not offline_parser_available(), reason="需要 lxml 和 cssselect")),
+])
+def test_fetches_every_page(standin, payload):
+    _, base_url = standin(count=45, page_size=20, payload=payload)
+    url, records, source = fetch_applications(_session(), base_url + APPLICATIONS_PATH)
+
+    assert url == base_url + APPLICATIONS_PATH
+    assert source == ("payload" if payload else "html")
+    assert [record["title"] for record in records] == [synthetic_record(i)["title"] for i in range(45)]
+    assert [record["company"] for record in records] == [synthetic_record(i)["company"] for i in range(45)]
+    assert all(record["link"] for record in records)
+
+
+def test_stop_when_skips_later_pages(standin):
+    _, base_url = standin(count=100, page_size=20)
+    pages = []
+
+    def stop_when(page_records):
+        pages.append([record["title"] for record in page_records])
+        return len(pages) >= 2
+
+    _, records, _ = fetch_applications(_session(), base_url + APPLICATIONS_PATH, stop_when=stop_when)
+
+    # 每次只传入新的一页
+    assert pages == [[synthetic_record(i)["title"] for i in range(start, start + 20)] for start in (0, 20)]
+    assert len(records) == 40
+
+
+def test_linkless_records_with_same_title_are_kept(monkeypatch):
+    import http_fastpath
+
+    # 两页各有一条没有链接、标题相同但公司不同的记录
+    pages = {
+        "https://example.test/a?page=1": ([{"title": "Clerk", "company": "A", "date": "2025-01-02", "link": ""}],
+                                          "https://example.test/a?page=2"),
+        "https://example.test/a?page=2": ([{"title": "Clerk", "company": "B", "date": "2025-01-01", "link": ""}],
+                                          "https://example.test/a?page=3"),
+        "https://example.test/a?page=3": ([{"title": "Clerk", "company": "B", "date": "2025-01-01", "link": ""}],
+                                          None),
+    }
+
+    class Response:
+        status_code = 200
+
+        def __init__(self, url):
+            self.url = self.text = url
+
+    class Session:
+        def get(self, url, timeout=None):
+            return Response(url)
+
+    monkeypatch.setattr(http_fastpath, "parse_applications_page", lambda html, url: pages[url] + ("payload",))
+    _, records, _ = fetch_applications(Session(), "https://example.test/a?page=1")
+
+    # 第三页与第二页重复，视为分页到底
+    assert [record["company"] for record in records] == ["A", "B"]
+
+
+def test_login_redirect_is_unavailable(standin):
+    _, base_url = standin(count=10)
+    with pytest.raises(FastPathUnavailable):
+        fetch_applications(_session(logged_in=False), base_url + APPLICATIONS_PATH)
+
+
+class _Driver:
+    """只提供快速路径用到的 WebDriver 方法：CDP 读取 cookies 和读取 User-Agent"""
+
+    def __init__(self, cookies=(), error=None):
+        self.cookies = list(cookies)
+        self.error = error
+
+    def execute_cdp_cmd(self, command, params):
+        return {"cookies": self.cookies}
+
+    def execute_script(self, script):
+        if self.error is not None:
+            raise self.error
+        return "Mozilla/5.0"
+
+
+def test_scrape_with_http_uses_browser_cookies(standin, monkeypatch):
+    import jobsdb_scraper
+
+    _, base_url = standin(count=30, page_size=20)
+    monkeypatch.setattr(jobsdb_scraper, "JOBSDB_URL", base_url)
+    driver = _Driver([{"name": SESSION_COOKIE, "value": SESSION_VALUE, "domain": "127.0.0.1", "session": True}])
+
+    records = jobsdb_scraper.scrape_with_http(driver)
+
+    assert len(records) == 30
+
+
+def test_each_candidate_url_gets_its_own_stop_when(standin):
+    _, base_url = standin(count=30, page_size=20)
+    driver = _Driver([{"name": SESSION_COOKIE, "value": SESSION_VALUE, "domain": "127.0.0.1", "session": True}])
+    created = []
+
+    def make_stop_when():
+        fed = []
+        created.append(fed)
+        return lambda page_records: fed.extend(page_records) or False
+
+    url, records, _ = fetch_applications_via_http(
+        driver, [base_url + "/missing", base_url + APPLICATIONS_PATH], make_stop_when=make_stop_when
+    )
+
+    assert url == base_url + APPLICATIONS_PATH
+    assert [len(fed) for fed in created] == [0, 30]
+
+
+def test_scrape_with_http_falls_back_on_unexpected_errors(standin, monkeypatch):
+    import jobsdb_scraper
+
+    _, base_url = standin(count=10)
+    monkeypatch.setattr(jobsdb_scraper, "JOBSDB_URL", base_url)
+
+    assert jobsdb_scraper.scrape_with_http(_Driver(error=RuntimeError("session deleted"))) is None
@@ -0,0 +1,89 @@
+"""流式列表加载（list_loader）对假 driver 的加载与断点跳过"""
+import time
+
+import pytest
+
+import list_loader
+from card_extractor import EXTRACT_CARDS_SCRIPT
+from list_loader import StreamingListLoader
+
+
+class _Driver:
+    """
+    模拟按批追加卡片的列表页：每次触发加载追加 page_size 张卡片，直到 total 张
+    卡片只有被提取或按链接跳过时才会打上已提取标记，与页面脚本一致
+    """
+
+    def __init__(self, total, page_size=10):
+        self.total = total
+        self.page_size = page_size
+        self.cards = []
+        self.advances = 0
+        self._append()
+
+    def _append(self):
+        start = len(self.cards)
+        for i in range(start, min(start + self.page_size, self.total)):
+            self.cards.append({"link": f"https://example.test/job/{i}", "title": f"Job {i}", "seen": False})
+
+    def execute_script(self, script, *args):
+        if script == list_loader._LIST_STATE_SCRIPT:
+            unseen = sum(1 for card in self.cards if not card["seen"])
+            return {"count": len(self.cards), "unseen": unseen, "loading": False}
+        if script == list_loader._ADVANCE_SCRIPT:
+            self.advances += 1
+            self._append()
+            return "scroll"
+        if script == list_loader._MARK_KNOWN_SCRIPT:
+            known = set(args[2])
+            marked = 0
+            for card in self.cards:
+                if card["link"] in known:
+                    card["seen"] = True
+                    marked += 1
+            return marked
+        if script == EXTRACT_CARDS_SCRIPT:
+            records = []
+            for card in self.cards:
+                if not card["seen"]:
+                    card["seen"] = True
+                    records.append({"title": card["title"], "link": card["link"]})
+            return {"selector": args[0][0], "count": len(self.cards), "records": records, "stats": {}}
+        raise AssertionError("unexpected script")
+
+
+def _loader(driver):
+    return StreamingListLoader(driver, batch_timeout=0.2, loading_grace_rounds=0, max_duration=30)
+
+
+def test_load_without_extract_stops_at_end():
+    driver = _Driver(total=35)
+    started = time.time()
+    counts = list(_loader(driver).batches(extract=False))
+
+    assert counts == [10, 20, 30, 35]
+    # 到底后只多触发一次加载，而不是一直等到 max_duration
+    assert driver.advances == 4
+    assert time.time() - started < 5
+
+
+def test_extract_yields_each_batch_once():
+    driver = _Driver(total=25)
+    batches = list(_loader(driver).batches())
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [r["title"] for batch in batches for r in batch] == [f"Job {i}" for i in range(25)]
+
+
+@pytest.mark.parametrize("position", [20, 50])
+def test_skip_known_then_extract_new(position):
+    # position=50：列表比断点时短，加载到底就停止，不会空转
+    driver = _Driver(total=30)
+    loader = _loader(driver)
+    known = [f"https://example.test/job/{i}" for i in range(15)]
+    started = time.time()
+
+    assert loader.skip_known(known, position) == 15
+    assert time.time() - started < 5
+    titles = [r["title"] for batch in loader.batches() for r in batch]
+    assert titles == [f"Job {i}" for i in range(15, 30)]
@@ -0,0 +1,96 @@
+"""流水线导出、上传和结果去重（export_index）"""
+import os
+
+from export_index import ExportIndex, index_key
+from jobsdb_standin import UPLOAD_PATH
+from pipeline import Pipeline
+from synthetic_pages import synthetic_record
+
+ACCOUNT = "me@example.com"
+
+
+def _records(count, suffix=""):
+    return [dict(synthetic_record(i), title=synthetic_record(i)["title"] + suffix) for i in range(count)]
+
+
+def _run(records, output_dir, filename, upload_url=None, skip_unchanged=True, fmt="csv"):
+    key = index_key(ACCOUNT, fmt) if skip_unchanged else None
+    with Pipeline(fmt, output_dir=str(output_dir), upload_url=upload_url, filename=filename,
+                  index_key=key) as pipeline:
+        for index in range(0, len(records), 30):
+            pipeline.put(records[index:index + 30])
+        pipeline.close()
+    return pipeline
+
+
+def test_streaming_upload_matches_local_file(standin, tmp_path):
+    config, base_url = standin()
+    records = _records(120)
+    # 重复的记录原样导出，行数与提取结果一致
+    records.append(dict(records[0]))
+
+    pipeline = _run(records, tmp_path, "a.csv", base_url + UPLOAD_PATH, skip_unchanged=False)
+
+    assert len(pipeline.records) == 121
+    assert pipeline.upload["pathname"] == "a.csv"
+    with open(pipeline.export_path, "rb") as f:
+        assert config.uploads["a.csv"] == f.read()
+
+
+def test_unchanged_results_are_not_uploaded_again(standin, tmp_path):
+    config, base_url = standin()
+    upload_url = base_url + UPLOAD_PATH
+
+    first = _run(_records(80), tmp_path, "first.csv", upload_url)
+    assert not first.unchanged
+    assert config.upload_count == 1
+    # 有上传地址时直接从内存上传，不写本地文件
+    assert first.export_path is None
+    assert not os.path.exists(tmp_path / "first.csv")
+
+    # 只有空白不同，规整后与上次相同
+    second = _run(_records(80, "  "), tmp_path, "second.csv", upload_url)
+    assert second.unchanged
+    assert second.upload == first.upload
+    assert config.upload_count == 1
+
+    third = _run(_records(81), tmp_path, "third.csv", upload_url)
+    assert not third.unchanged
+    assert config.upload_count == 2
+    assert "third.csv" in config.uploads
+
+
+def test_failed_upload_is_saved_locally_and_not_indexed(standin, tmp_path):
+    # 上传接口要求令牌：没有令牌的请求被重定向到登录页，不能当成上传成功
+    config, base_url = standin(upload_token="secret")
+    upload_url = base_url + UPLOAD_PATH
+    records = _records(40)
+
+    failed = _run(records, tmp_path, "failed.csv", upload_url)
+    assert "error" in failed.upload
+    assert config.upload_count == 0
+    assert failed.export_path == str(tmp_path / "failed.csv")
+    assert os.path.getsize(failed.export_path) > 0
+    assert ExportIndex(str(tmp_path)).lookup(index_key(ACCOUNT, "csv"), failed.digest, upload_url) is None
+
+    config.upload_token = None
+    retried = _run(records, tmp_path, "retried.csv", upload_url)
+    assert not retried.unchanged
+    assert retried.upload["pathname"] == "retried.csv"
+    assert config.upload_count == 1
+
+
+def test_local_export_is_skipped_when_unchanged(tmp_path):
+    first = _run(_records(50), tmp_path, "first.xlsx", fmt="xlsx")
+    assert first.export_path == str(tmp_path / "first.xlsx")
+
+    second = _run(_records(50), tmp_path, "second.xlsx", fmt="xlsx")
+    assert second.unchanged
+    assert second.export_path == first.export_path
+    assert not os.path.exists(tmp_path / "second.xlsx")
+
+    # 上次的文件被删除后重新导出
+    os.remove(first.export_path)
+    third = _run(_records(50), tmp_path, "third.xlsx", fmt="xlsx")
+    assert not third.unchanged
+    assert os.path.exists(tmp_path / "third.xlsx")
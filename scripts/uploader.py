@@ -0,0 +1,66 @@
+"""
+导出文件上传
+
+前端的 app/api/blob/upload 路由接收 POST ?filename=<文件名>，请求体就是文件内容，
+原样存到 Vercel Blob（public，不加随机后缀），返回 blob 信息（url、pathname 等）。
+请求体可以是 bytes、文件对象或生成器；生成器按 chunked 编码边产生边发送，
+导出文件还在写的时候就可以开始上传（见 pipeline.py）。
+
+脚本没有 next-auth 会话，接口用 BLOB_UPLOAD_TOKEN 校验 Authorization: Bearer 头。
+不跟随重定向：被重定向（例如到登录页）或返回的不是 blob 信息 JSON 都视为上传失败，
+否则会把登录页当成上传成功，导出索引随之记录一次并没有发生的上传。
+
+环境变量:
+    JOBSDB_UPLOAD_URL=http://localhost:3000/api/blob/upload   不设置则不上传
+    JOBSDB_UPLOAD_TOKEN=...                                   与前端的 BLOB_UPLOAD_TOKEN 相同
+    JOBSDB_UPLOAD_TIMEOUT=300                                 单次上传的超时（秒）
+"""
+import os
+
+UPLOAD_URL = os.environ.get("JOBSDB_UPLOAD_URL")
+UPLOAD_TOKEN = os.environ.get("JOBSDB_UPLOAD_TOKEN")
+UPLOAD_TIMEOUT = int(os.environ.get("JOBSDB_UPLOAD_TIMEOUT", 300))
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """上传接口不可用或返回错误"""
+
+
+def upload(body, filename, url=UPLOAD_URL, timeout=UPLOAD_TIMEOUT, session=None, token=UPLOAD_TOKEN):
+    """把 body 上传为 filename，返回接口返回的 blob 信息"""
+    import requests
+
+    if not url:
+        raise UploadError("未配置上传地址（JOBSDB_UPLOAD_URL）")
+    headers = {"Content-Type": "application/octet-stream"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        response = (session or requests).post(
+            url, params={"filename": filename}, data=body, timeout=timeout,
+            headers=headers, allow_redirects=False,
+        )
+    except requests.RequestException as e:
+        raise UploadError(f"上传 {filename} 失败: {e}")
+    if 300 <= response.status_code < 400:
+        raise UploadError(
+            f"上传 {filename} 失败: 被重定向到 {response.headers.get('Location')}"
+            "（上传接口需要登录，请配置 JOBSDB_UPLOAD_TOKEN）"
+        )
+    if response.status_code != 200:
+        raise UploadError(f"上传 {filename} 失败: HTTP {response.status_code} {response.text[:200]}")
+    try:
+        blob = response.json()
+    except ValueError:
+        blob = None
+    if not isinstance(blob, dict) or not (blob.get("url") or blob.get("pathname")):
+        raise UploadError(f"上传 {filename} 失败: 接口返回的不是 blob 信息 {response.text[:200]}")
+    return blob
+
+
+def upload_file(path, filename=None, url=UPLOAD_URL, timeout=UPLOAD_TIMEOUT, session=None, token=UPLOAD_TOKEN):
+    """上传已经写完的文件（按块读取，不整个读入内存）"""
+    with open(path, "rb") as f:
+        return upload(iter(lambda: f.read(CHUNK_SIZE), b""), filename or os.path.basename(path),
+                      url, timeout, session, token)
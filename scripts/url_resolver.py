@@ -0,0 +1,139 @@
+"""
+申请记录页面 URL 解析
+
+用会话 cookies 并发地对候选 URL 发轻量 HTTP 请求（不跟随重定向、不下载正文），
+按状态码和重定向目标分类，选出真正可用的申请记录页面；
+结果按账号缓存一段时间，之后的运行直接一次导航到正确页面。
+"""
+import os
+import json
+import time
+import threading
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from accounts import account_key
+
+CACHE_FILE = "applications_url_cache.json"
+CACHE_TTL = 7 * 24 * 3600
+PROBE_TIMEOUT = 8
+
+# 探测结果分类
+OK = "ok"
+REDIRECT = "redirect"
+LOGIN_REQUIRED = "login_required"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+_lock = threading.Lock()
+
+
+def _load_cache(filepath=CACHE_FILE):
+    if not os.path.exists(filepath):
+        return {}
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache, filepath=CACHE_FILE):
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, filepath)
+
+
+def cached_url(email, ttl=CACHE_TTL, filepath=CACHE_FILE):
+    """返回该账号未过期的缓存 URL，没有时返回 None"""
+    with _lock:
+        entry = _load_cache(filepath).get(account_key(email))
+    if entry and time.time() - entry.get("resolved_at", 0) < ttl:
+        return entry["url"]
+    return None
+
+
+def remember_url(email, url, filepath=CACHE_FILE):
+    with _lock:
+        cache = _load_cache(filepath)
+        cache[account_key(email)] = {"url": url, "resolved_at": time.time()}
+        _save_cache(cache, filepath)
+
+
+def invalidate(email, filepath=CACHE_FILE):
+    """缓存的 URL 在浏览器里不可用时调用，下次运行重新探测"""
+    with _lock:
+        cache = _load_cache(filepath)
+        if cache.pop(account_key(email), None) is not None:
+            _save_cache(cache, filepath)
+
+
+def probe_url(session, url):
+    """
+    对单个候选 URL 发一次请求并分类
+    返回 (分类, 目标 URL, 状态码)；重定向时目标 URL 为 Location
+    """
+    import requests
+
+    try:
+        response = session.get(url, allow_redirects=False, stream=True, timeout=PROBE_TIMEOUT)
+    except requests.RequestException:
+        return ERROR, url, None
+    # stream=True 且不读取正文，关闭后连接直接归还连接池
+    response.close()
+
+    status = response.status_code
+    if 300 <= status < 400:
+        target = urljoin(url, response.headers.get("Location", ""))
+        if "login" in urlparse(target).path.lower():
+            return LOGIN_REQUIRED, target, status
+        return REDIRECT, target, status
+    if status == 200:
+        return OK, url, status
+    if status in (404, 410):
+        return NOT_FOUND, url, status
+    return ERROR, url, status
+
+
+def probe_candidates(session, candidates):
+    """并发探测全部候选，结果顺序与候选顺序一致"""
+    with ThreadPoolExecutor(max_workers=len(candidates) or 1) as executor:
+        return list(executor.map(lambda url: probe_url(session, url), candidates))
+
+
+def pick_winner(candidates, results):
+    """按候选顺序优先选 200 的页面，其次选非登录页的重定向目标"""
+    for url, (kind, target, _) in zip(candidates, results):
+        if kind == OK:
+            return target
+    for url, (kind, target, _) in zip(candidates, results):
+        if kind == REDIRECT:
+            return target
+    return None
+
+
+def resolve_applications_url(driver, email, candidates, ttl=CACHE_TTL):
+    """
+    返回 (申请记录页面 URL 或 None, 来源 "cache"/"probe", 探测明细)
+    """
+    url = cached_url(email, ttl)
+    if url:
+        return url, "cache", []
+
+    from http_fastpath import session_from_driver
+
+    session = session_from_driver(driver, pool_size=len(candidates))
+    try:
+        results = probe_candidates(session, candidates)
+    finally:
+        session.close()
+
+    url = pick_winner(candidates, results)
+    if url:
+        remember_url(email, url)
+    details = [
+        {"url": candidate, "result": kind, "status": status}
+        for candidate, (kind, _, status) in zip(candidates, results)
+    ]
+    return url, "probe", details
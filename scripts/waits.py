@@ -0,0 +1,217 @@
+"""
+事件驱动的等待工具
+
+用带上限的条件等待替代固定的 time.sleep：条件满足立即返回，超时才会等满上限。
+页面就绪信号来自注入页面的探针：
+- document.readyState
+- 网络空闲（fetch / XHR 未完成请求数为 0）
+- DOM 静默（一段时间内没有节点变化）
+
+每次等待的实际耗时都会记录下来，通过 wait_report() 汇总。
+"""
+import time
+import threading
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    TimeoutException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    JavascriptException,
+)
+
+# 条件函数里出现这些异常时视为"尚未满足"，继续轮询
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException, JavascriptException)
+
+DEFAULT_POLL = 0.1
+# DOM 和网络都静默这么久（毫秒）才算页面稳定
+DEFAULT_QUIET_MS = 500
+
+# 页面探针：统计进行中的 fetch/XHR，并记录最后一次 DOM 变化或网络活动的时间
+PROBE_SCRIPT = """
+(function () {
+    if (window.__acrProbe) { return; }
+    var probe = window.__acrProbe = { pending: 0, last: Date.now() };
+    function touch() { probe.last = Date.now(); }
+    function done() { probe.pending = Math.max(0, probe.pending - 1); touch(); }
+    try {
+        new MutationObserver(touch).observe(document, {
+            childList: true, subtree: true, characterData: true
+        });
+    } catch (e) {}
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            probe.pending++; touch();
+            return originalFetch.apply(this, arguments).finally(done);
+        };
+    }
+    if (window.XMLHttpRequest) {
+        var originalSend = XMLHttpRequest.prototype.send;
+        XMLHttpRequest.prototype.send = function () {
+            probe.pending++; touch();
+            this.addEventListener('loadend', done);
+            return originalSend.apply(this, arguments);
+        };
+    }
+})();
+"""
+
+_SETTLED_SCRIPT = PROBE_SCRIPT + """
+var probe = window.__acrProbe;
+if (document.readyState !== 'complete') { return false; }
+return probe.pending === 0 && (Date.now() - probe.last) >= arguments[0];
+"""
+
+_local = threading.local()
+
+
+def _wait_log():
+    if not hasattr(_local, "log"):
+        _local.log = []
+    return _local.log
+
+
+def reset_wait_log():
+    """清空当前线程的等待记录（每次爬取开始时调用）"""
+    _local.log = []
+
+
+def wait_report():
+    """汇总当前线程的等待记录"""
+    log = _wait_log()
+    return {
+        "total_wait": round(sum(item["waited"] for item in log), 3),
+        "timeouts": sum(1 for item in log if not item["ok"]),
+        "waits": list(log),
+    }
+
+
+def install_page_probe(driver):
+    """
+    让每个新文档在页面脚本执行前就注入探针，这样首屏发出的请求也能被统计
+    CDP 不可用时，探针会在第一次检查时补装
+    """
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": PROBE_SCRIPT})
+    except Exception:
+        pass
+
+
+def wait_for(driver, condition, timeout, label, poll=DEFAULT_POLL, required=False):
+    """
+    等待 condition(driver) 返回真值，最多 timeout 秒
+    返回条件的结果；超时返回 None，required=True 时抛出 TimeoutException
+    """
+    start = time.perf_counter()
+    result = None
+    ok = False
+    try:
+        result = WebDriverWait(
+            driver, timeout, poll_frequency=poll, ignored_exceptions=IGNORED_EXCEPTIONS
+        ).until(condition)
+        ok = True
+    except TimeoutException:
+        if required:
+            raise
+    finally:
+        _wait_log().append({
+            "label": label,
+            "waited": round(time.perf_counter() - start, 3),
+            "timeout": timeout,
+            "ok": ok,
+        })
+    return result
+
+
+# ---- 常用条件 ----
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def page_settled(quiet_ms=DEFAULT_QUIET_MS):
+    """readyState 为 complete，且网络和 DOM 都已静默 quiet_ms 毫秒"""
+    def condition(driver):
+        return driver.execute_script(_SETTLED_SCRIPT, quiet_ms)
+    return condition
+
+
+def url_changed(old_url):
+    def condition(driver):
+        return driver.current_url != old_url
+    return condition
+
+
+def first_present(selectors, by=By.CSS_SELECTOR, root=None):
+    """按列表顺序返回第一个已出现的元素（一次轮询检查全部选择器）"""
+    def condition(driver):
+        scope = root or driver
+        for selector in selectors:
+            try:
+                elements = scope.find_elements(by, selector)
+            except Exception:
+                # 无效选择器等同于未命中
+                continue
+            if elements:
+                return elements[0]
+        return False
+    return condition
+
+
+def any_present(selectors, by=By.CSS_SELECTOR):
+    """任意一个选择器命中时返回 (selector, elements)"""
+    def condition(driver):
+        for selector in selectors:
+            try:
+                elements = driver.find_elements(by, selector)
+            except Exception:
+                continue
+            if elements:
+                return selector, elements
+        return False
+    return condition
+
+
+_FIRST_MATCH_SCRIPT = """
+var selectors = arguments[0];
+for (var i = 0; i < selectors.length; i++) {
+    try {
+        if (document.querySelector(selectors[i])) { return selectors[i]; }
+    } catch (e) {}
+}
+return null;
+"""
+
+
+def first_matching_selector(selectors):
+    """在页面内一次检查全部 CSS 选择器，返回列表中第一个命中的选择器"""
+    def condition(driver):
+        return driver.execute_script(_FIRST_MATCH_SCRIPT, list(selectors))
+    return condition
+
+
+def input_value_is(element, value):
+    def condition(driver):
+        return element.get_attribute("value") == value
+    return condition
+
+
+def element_clickable(element):
+    def condition(driver):
+        return element.is_displayed() and element.is_enabled()
+    return condition
+
+
+def scroll_height_grew(last_height):
+    def condition(driver):
+        return driver.execute_script("return document.body.scrollHeight") > last_height
+    return condition
+
+
+# ---- 组合等待 ----
+
+def wait_for_page(driver, timeout=10, label="page", quiet_ms=DEFAULT_QUIET_MS):
+    """导航后等待页面稳定，替代 driver.get 之后的固定 sleep"""
+    return bool(wait_for(driver, page_settled(quiet_ms), timeout, label))